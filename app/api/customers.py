@@ -0,0 +1,41 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas import CustomerStatsResponse
+from app.core.config import settings
+from app.db.session import get_session
+from app.services.cache import TTLCache
+from app.services.customers import get_customer_stats
+from shared.money import DEFAULT_CURRENCY, from_minor
+
+router = APIRouter()
+
+stats_cache = TTLCache(settings.customer_stats_cache_ttl, settings.customer_stats_cache_size)
+
+
+@router.get("/{customer_id}/stats", response_model=CustomerStatsResponse)
+async def get_customer_stats_handler(
+    customer_id: UUID,
+    currency: str = Query(DEFAULT_CURRENCY, pattern=r"^[A-Z]{3}$"),
+    session: AsyncSession = Depends(get_session),
+):
+    key = (customer_id, currency)
+    cached = stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    stats = await get_customer_stats(session, customer_id, currency)
+    # У клиента без обработанных заказов агрегатов ещё нет: это нули, а не 404
+    total_spent_minor = stats.total_spent_minor if stats else 0
+    response = CustomerStatsResponse(
+        customer_id=customer_id,
+        currency=currency,
+        order_count=stats.order_count if stats else 0,
+        total_spent=from_minor(total_spent_minor, currency),
+        total_spent_minor=total_spent_minor,
+        last_order_at=stats.last_order_at if stats else None,
+    )
+    stats_cache.set(key, response)
+    return response
@@ -3,8 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas import OrderCreate, OrderResponse
+from app.core.config import settings
 from app.db.session import get_session
-from app.services.orders import create_order, get_order
+from app.services.orders import create_order, get_order, order_items
 from app.messaging.producer import OrderProducer
 
 router = APIRouter()
@@ -19,11 +20,12 @@ async def create_order_handler(
         session=session,
         customer_id=payload.customer_id,
         items=payload.items,
+        currency=payload.currency,
     )
 
     producer = OrderProducer()
     await producer.connect()
-    await producer.publish_order_created(order.id, order.total_price)
+    await producer.publish_order_created(order.id, order.total_price_minor, order.currency)
     await producer.close()
 
     return OrderResponse(
@@ -31,14 +33,9 @@ async def create_order_handler(
         customer_id=order.customer_id,
         status=order.status,
         total_price=order.total_price,
-        items=[
-            {
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "price": item.price,
-            }
-            for item in order.items
-        ],
+        total_price_minor=order.total_price_minor,
+        currency=order.currency,
+        items=order_items(order),
         created_at=order.created_at,
         updated_at=order.updated_at,
     )
@@ -49,7 +46,7 @@ async def get_order_handler(
     order_id: UUID,
     session: AsyncSession = Depends(get_session),
 ):
-    order = await get_order(session, order_id)
+    order = await get_order(session, order_id, include_archive=settings.archive_fallback_enabled)
 
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -59,14 +56,9 @@ async def get_order_handler(
         customer_id=order.customer_id,
         status=order.status,
         total_price=order.total_price,
-        items=[
-            {
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "price": item.price,
-            }
-            for item in order.items
-        ],
+        total_price_minor=order.total_price_minor,
+        currency=order.currency,
+        items=order.items,
         created_at=order.created_at,
         updated_at=order.updated_at,
     )
@@ -1,24 +1,43 @@
 from uuid import UUID
 from datetime import datetime
 from decimal import Decimal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from shared.money import DEFAULT_CURRENCY, to_minor
 
 
 class OrderItemCreate(BaseModel):
     product_id: UUID
     quantity: int = Field(gt=0)
-    price: Decimal = Field(gt=0)
+    # Цена либо в минорных единицах, либо десятичной строкой (переводится без потерь)
+    price: Decimal | None = Field(default=None, gt=0)
+    price_minor: int | None = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def check_price(self):
+        if self.price is None and self.price_minor is None:
+            raise ValueError("either price or price_minor is required")
+        return self
 
 
 class OrderCreate(BaseModel):
     customer_id: UUID
+    currency: str = Field(default=DEFAULT_CURRENCY, pattern=r"^[A-Z]{3}$")
     items: list[OrderItemCreate]
 
+    @model_validator(mode="after")
+    def check_price_precision(self):
+        for item in self.items:
+            if item.price_minor is None:
+                to_minor(item.price, self.currency)
+        return self
+
 
 class OrderItemResponse(BaseModel):
     product_id: UUID
     quantity: int
     price: Decimal
+    price_minor: int
 
 
 class OrderResponse(BaseModel):
@@ -26,6 +45,17 @@ class OrderResponse(BaseModel):
     customer_id: UUID
     status: str
     total_price: Decimal
+    total_price_minor: int
+    currency: str
     items: list[OrderItemResponse]
     created_at: datetime
     updated_at: datetime
+
+
+class CustomerStatsResponse(BaseModel):
+    customer_id: UUID
+    currency: str
+    order_count: int
+    total_spent: Decimal
+    total_spent_minor: int
+    last_order_at: datetime | None
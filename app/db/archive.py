@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from prometheus_client import Counter
+from sqlalchemy import delete, insert, select
+
+from app.core.config import settings
+from shared.db.ids import uuid7_lower_bound
+from shared.db.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+ORDERS_ARCHIVED = Counter(
+    "orders_archived_total",
+    "Orders moved from the hot tables into the archive",
+)
+
+ORDER_FIELDS = (
+    "id", "customer_id", "status", "total_price_minor", "currency",
+    "created_at", "updated_at", "processed_at", "items_snapshot",
+)
+ITEM_FIELDS = ("id", "order_id", "product_id", "quantity", "price_minor", "currency")
+
+
+async def archive_batch(session, cutoff: datetime, after: UUID | None, batch_size: int) -> list[UUID]:
+    query = (
+        select(Order.id)
+        # id — UUIDv7 с моментом создания, а заказ создан раньше, чем обработан: граница по id
+        # отсекает партиции свежих месяцев и не даёт последней пачке идти по индексу через горячие строки
+        .where(
+            Order.id < uuid7_lower_bound(cutoff),
+            Order.status == OrderStatus.PROCESSED,
+            Order.processed_at < cutoff,
+        )
+        .order_by(Order.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    if after is not None:
+        query = query.where(Order.id > after)
+    ids = list((await session.execute(query)).scalars())
+    if not ids:
+        return ids
+
+    await session.execute(
+        insert(ArchivedOrder).from_select(
+            ORDER_FIELDS,
+            select(*(Order.__table__.c[name] for name in ORDER_FIELDS)).where(Order.id.in_(ids)),
+        )
+    )
+    await session.execute(
+        insert(ArchivedOrderItem).from_select(
+            ITEM_FIELDS,
+            select(*(OrderItem.__table__.c[name] for name in ITEM_FIELDS)).where(OrderItem.order_id.in_(ids)),
+        )
+    )
+    await session.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+    await session.execute(delete(Order).where(Order.id.in_(ids)))
+    await session.commit()
+
+    ORDERS_ARCHIVED.inc(len(ids))
+    return ids
+
+
+async def archive_orders(
+    session_factory,
+    older_than: timedelta,
+    batch_size: int,
+    throttle: float,
+    max_batches: int | None = None,
+    now: datetime | None = None,
+) -> int:
+    cutoff = (now or datetime.now(timezone.utc)) - older_than
+    archived = 0
+    batches = 0
+    after = None
+
+    while max_batches is None or batches < max_batches:
+        # Короткие транзакции и пауза между ними: реплики и autovacuum успевают за нами
+        async with session_factory() as session:
+            ids = await archive_batch(session, cutoff, after, batch_size)
+        if not ids:
+            break
+        archived += len(ids)
+        batches += 1
+        after = ids[-1]
+        logger.info("Archived %d orders (%d total)", len(ids), archived)
+        if throttle > 0:
+            await asyncio.sleep(throttle)
+
+    return archived
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Move old PROCESSED orders into the archive tables")
+    parser.add_argument("--older-than-days", type=int, default=settings.archive_after_days)
+    parser.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    parser.add_argument("--throttle", type=float, default=settings.archive_throttle_seconds)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    from app.db.session import AsyncSessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    return asyncio.run(archive_orders(
+        AsyncSessionLocal,
+        timedelta(days=args.older_than_days),
+        args.batch_size,
+        args.throttle,
+        args.max_batches,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""add order read indexes
+
+Revision ID: 1960a1bb8ecd
+Revises: 7b2bd30b4b7e
+Create Date: 2026-02-16 10:47:12.903114
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '1960a1bb8ecd'
+down_revision = '7b2bd30b4b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_order_items_order_id', 'order_items', ['order_id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_orders_customer_id_created_at', 'orders', ['customer_id', 'created_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_orders_processed_at', 'orders', ['processed_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_processed_at', table_name='orders', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_orders_customer_id_created_at', table_name='orders', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_order_items_order_id', table_name='order_items', postgresql_concurrently=True, if_exists=True)
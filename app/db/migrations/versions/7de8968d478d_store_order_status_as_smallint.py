@@ -0,0 +1,114 @@
+"""store order status as smallint
+
+Revision ID: 7de8968d478d
+Revises: c1e068969ab9
+Create Date: 2026-03-30 14:08:26.731904
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7de8968d478d'
+down_revision = 'c1e068969ab9'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# Должно совпадать с shared.db.status.STATUS_CODES на момент ревизии
+STATUS_CODES = {'NEW': 1, 'PROCESSED': 2}
+
+TO_CODE = "CASE status " + " ".join(f"WHEN '{name}' THEN {code}" for name, code in STATUS_CODES.items()) + " END"
+FROM_CODE = "CASE status_code " + " ".join(f"WHEN {code} THEN '{name}'" for name, code in STATUS_CODES.items()) + " END"
+
+UNPROCESSED_INDEX = 'ix_orders_unprocessed_created_at'
+UNPROCESSED_WHERE = f"status = {STATUS_CODES['NEW']}"
+
+
+def backfill(table: str) -> None:
+    if context.is_offline_mode():
+        op.execute(f"UPDATE {table} SET status_code = {TO_CODE} WHERE status_code IS NULL")
+        return
+
+    bind = op.get_bind()
+    unknown = bind.execute(
+        sa.text(f"SELECT DISTINCT status FROM {table} WHERE status NOT IN :known").bindparams(
+            sa.bindparam("known", expanding=True)
+        ),
+        {"known": list(STATUS_CODES)},
+    ).scalars().all()
+    if unknown:
+        raise RuntimeError(f"{table} has statuses without a code: {sorted(unknown)}")
+
+    last_id = None
+    while True:
+        query = f"SELECT id FROM {table} WHERE status_code IS NULL"
+        params = {"limit": BATCH_SIZE}
+        if last_id is not None:
+            query += " AND id > :last_id"
+            params["last_id"] = last_id
+        ids = bind.execute(sa.text(query + " ORDER BY id LIMIT :limit"), params).scalars().all()
+        if not ids:
+            break
+        bind.execute(
+            sa.text(f"UPDATE {table} SET status_code = {TO_CODE} WHERE id IN :ids").bindparams(
+                sa.bindparam("ids", expanding=True)
+            ),
+            {"ids": ids},
+        )
+        last_id = ids[-1]
+
+
+def create_unprocessed_index() -> None:
+    if context.is_offline_mode():
+        op.create_index(UNPROCESSED_INDEX, 'orders', ['created_at', 'id'], unique=False,
+                        postgresql_where=sa.text(UNPROCESSED_WHERE))
+        return
+
+    # На партиционированной таблице CONCURRENTLY нельзя: индекс на родителе создаётся пустым
+    # (ON ONLY), а индексы партиций строятся по одному без блокировки записи и подключаются к нему
+    bind = op.get_bind()
+    bind.execute(sa.text(
+        f"CREATE INDEX IF NOT EXISTS {UNPROCESSED_INDEX} ON ONLY orders (created_at, id) WHERE {UNPROCESSED_WHERE}"
+    ))
+    partitions = bind.execute(sa.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = 'orders'::regclass ORDER BY child.relname"
+    )).scalars().all()
+    for partition in partitions:
+        name = f"{partition}_unprocessed_idx"
+        bind.execute(sa.text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {partition} (created_at, id) WHERE {UNPROCESSED_WHERE}"
+        ))
+        bind.execute(sa.text(f"ALTER INDEX {UNPROCESSED_INDEX} ATTACH PARTITION {name}"))
+
+
+def upgrade() -> None:
+    for table in ('orders', 'orders_archive'):
+        op.add_column(table, sa.Column('status_code', sa.SmallInteger(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        for table in ('orders', 'orders_archive'):
+            backfill(table)
+
+    for table in ('orders', 'orders_archive'):
+        # Догоняем строки, вставленные старым кодом во время пакетного переноса
+        op.execute(f"UPDATE {table} SET status_code = {TO_CODE} WHERE status_code IS NULL")
+        op.drop_column(table, 'status')
+        op.alter_column(table, 'status_code', new_column_name='status', existing_type=sa.SmallInteger(), nullable=False)
+
+    with op.get_context().autocommit_block():
+        create_unprocessed_index()
+
+
+def downgrade() -> None:
+    op.drop_index(UNPROCESSED_INDEX, table_name='orders', postgresql_where=sa.text(UNPROCESSED_WHERE))
+    for table in ('orders', 'orders_archive'):
+        op.alter_column(table, 'status', new_column_name='status_code', existing_type=sa.SmallInteger())
+        op.add_column(table, sa.Column('status', sa.String(length=32), nullable=True))
+        op.execute(f"UPDATE {table} SET status = {FROM_CODE}")
+        op.alter_column(table, 'status', existing_type=sa.String(length=32), nullable=False)
+        op.drop_column(table, 'status_code')
@@ -0,0 +1,34 @@
+"""track sweeper republishes and add leases
+
+Revision ID: 9f3b6c2a1d47
+Revises: 7de8968d478d
+Create Date: 2026-04-06 10:21:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3b6c2a1d47'
+down_revision = '7de8968d478d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Константный DEFAULT в PostgreSQL 11+ не переписывает таблицу и её партиции
+    op.add_column('orders', sa.Column('republish_attempts', sa.SmallInteger(), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('last_republished_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table('leases',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('holder', sa.String(length=128), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('leases')
+    op.drop_column('orders', 'last_republished_at')
+    op.drop_column('orders', 'republish_attempts')
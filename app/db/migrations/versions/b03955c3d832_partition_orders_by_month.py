@@ -0,0 +1,148 @@
+"""partition orders by month
+
+Revision ID: b03955c3d832
+Revises: 1960a1bb8ecd
+Create Date: 2026-02-23 11:05:41.377820
+
+"""
+import uuid
+from datetime import date, datetime, timezone
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b03955c3d832'
+down_revision = '1960a1bb8ecd'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+ORDER_COLUMNS = "id, customer_id, status, total_price, created_at, updated_at, processed_at"
+ITEM_COLUMNS = "id, order_id, product_id, quantity, price"
+
+
+def _bound(month: date) -> uuid.UUID:
+    moment = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    return uuid.UUID(int=int(moment.timestamp() * 1000) << 80)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _first_month(current: date) -> date:
+    if context.is_offline_mode():
+        return current
+    # Самый ранний UUIDv7-заказ; uuid4-заказы уходят в DEFAULT-партицию
+    first = op.get_bind().scalar(sa.text(
+        "SELECT min(id) FROM orders_legacy WHERE substring(id::text from 15 for 1) = '7'"
+    ))
+    if first is None:
+        return current
+    moment = datetime.fromtimestamp((first.int >> 80) / 1000, tz=timezone.utc)
+    return min(current, date(moment.year, moment.month, 1))
+
+
+def _order_columns():
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('customer_id', sa.UUID(), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False),
+        sa.Column('total_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def _item_columns():
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('order_id', sa.UUID(), nullable=False),
+        sa.Column('product_id', sa.UUID(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    ]
+
+
+def _create_indexes():
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_orders_customer_id_created_at', 'orders', ['customer_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_processed_at', 'orders', ['processed_at'], unique=False)
+
+
+def _drop_indexes(orders: str, items: str):
+    op.drop_index('ix_order_items_order_id', table_name=items)
+    op.drop_index('ix_orders_customer_id_created_at', table_name=orders)
+    op.drop_index('ix_orders_processed_at', table_name=orders)
+
+
+def upgrade() -> None:
+    # Таблицы переписываются целиком и блокируются на время копирования
+    op.rename_table('order_items', 'order_items_legacy')
+    op.rename_table('orders', 'orders_legacy')
+    op.execute("ALTER INDEX orders_pkey RENAME TO orders_legacy_pkey")
+    op.execute("ALTER INDEX order_items_pkey RENAME TO order_items_legacy_pkey")
+    op.execute("ALTER TABLE order_items_legacy RENAME CONSTRAINT order_items_order_id_fkey TO order_items_legacy_order_id_fkey")
+    _drop_indexes('orders_legacy', 'order_items_legacy')
+
+    op.create_table('orders',
+    *_order_columns(),
+    sa.PrimaryKeyConstraint('id', name='orders_pkey'),
+    postgresql_partition_by='RANGE (id)',
+    )
+    op.create_table('order_items',
+    *_item_columns(),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], name='order_items_order_id_fkey'),
+    sa.PrimaryKeyConstraint('id', 'order_id', name='order_items_pkey'),
+    postgresql_partition_by='RANGE (order_id)',
+    )
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+    op.execute("CREATE TABLE order_items_default PARTITION OF order_items DEFAULT")
+
+    today = datetime.now(timezone.utc).date()
+    current = date(today.year, today.month, 1)
+    month = _first_month(current)
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        bounds = f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(_add_months(month, 1))}')"
+        op.execute(f"CREATE TABLE orders_p{month:%Y_%m} PARTITION OF orders {bounds}")
+        op.execute(f"CREATE TABLE order_items_p{month:%Y_%m} PARTITION OF order_items {bounds}")
+        month = _add_months(month, 1)
+
+    op.execute(f"INSERT INTO orders ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM orders_legacy")
+    op.execute(f"INSERT INTO order_items ({ITEM_COLUMNS}) SELECT {ITEM_COLUMNS} FROM order_items_legacy")
+    op.drop_table('order_items_legacy')
+    op.drop_table('orders_legacy')
+
+    _create_indexes()
+
+
+def downgrade() -> None:
+    op.create_table('orders_plain',
+    *_order_columns(),
+    sa.PrimaryKeyConstraint('id', name='orders_plain_pkey'),
+    )
+    op.create_table('order_items_plain',
+    *_item_columns(),
+    sa.ForeignKeyConstraint(['order_id'], ['orders_plain.id'], name='order_items_plain_order_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='order_items_plain_pkey'),
+    )
+    op.execute(f"INSERT INTO orders_plain ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM orders")
+    op.execute(f"INSERT INTO order_items_plain ({ITEM_COLUMNS}) SELECT {ITEM_COLUMNS} FROM order_items")
+
+    # Партиции удаляются вместе с родительскими таблицами
+    op.drop_table('order_items')
+    op.drop_table('orders')
+
+    op.rename_table('orders_plain', 'orders')
+    op.rename_table('order_items_plain', 'order_items')
+    op.execute("ALTER INDEX orders_plain_pkey RENAME TO orders_pkey")
+    op.execute("ALTER INDEX order_items_plain_pkey RENAME TO order_items_pkey")
+    op.execute("ALTER TABLE order_items RENAME CONSTRAINT order_items_plain_order_id_fkey TO order_items_order_id_fkey")
+
+    _create_indexes()
@@ -0,0 +1,141 @@
+"""store money in minor units
+
+Revision ID: c1e068969ab9
+Revises: 04ee0c3b8436
+Create Date: 2026-03-23 10:17:42.508133
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1e068969ab9'
+down_revision = '04ee0c3b8436'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# До этой ревизии все суммы были в USD с двумя знаками после запятой
+SNAPSHOT_TO_MINOR = """coalesce((
+    SELECT jsonb_agg(
+        (entry - 'price') || jsonb_build_object('price_minor', round((entry->>'price')::numeric * 100)::bigint)
+        ORDER BY position
+    )
+    FROM jsonb_array_elements(items_snapshot) WITH ORDINALITY AS snapshot(entry, position)
+), '[]'::jsonb)"""
+
+SNAPSHOT_FROM_MINOR = """coalesce((
+    SELECT jsonb_agg(
+        (entry - 'price_minor') || jsonb_build_object('price', ((entry->>'price_minor')::numeric / 100)::numeric(10, 2)::text)
+        ORDER BY position
+    )
+    FROM jsonb_array_elements(items_snapshot) WITH ORDINALITY AS snapshot(entry, position)
+), '[]'::jsonb)"""
+
+BACKFILLS = {
+    'orders': (
+        "total_price_minor = round(total_price * 100)::bigint, "
+        f"items_snapshot = CASE WHEN items_snapshot IS NULL THEN NULL ELSE {SNAPSHOT_TO_MINOR} END",
+        "total_price_minor IS NULL",
+    ),
+    'orders_archive': (
+        "total_price_minor = round(total_price * 100)::bigint, "
+        f"items_snapshot = CASE WHEN items_snapshot IS NULL THEN NULL ELSE {SNAPSHOT_TO_MINOR} END",
+        "total_price_minor IS NULL",
+    ),
+    'order_items': (
+        "price_minor = round(price * 100)::bigint",
+        "price_minor IS NULL AND price IS NOT NULL",
+    ),
+    'order_items_archive': (
+        "price_minor = round(price * 100)::bigint",
+        "price_minor IS NULL AND price IS NOT NULL",
+    ),
+}
+
+
+def backfill(table: str, assignments: str, pending: str) -> None:
+    if context.is_offline_mode():
+        op.execute(f"UPDATE {table} SET {assignments} WHERE {pending}")
+        return
+
+    # Пачками по id с коммитом после каждой, как в бэкфилле items_snapshot
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        query = f"SELECT id FROM {table} WHERE {pending}"
+        params = {"limit": BATCH_SIZE}
+        if last_id is not None:
+            query += " AND id > :last_id"
+            params["last_id"] = last_id
+        ids = bind.execute(sa.text(query + " ORDER BY id LIMIT :limit"), params).scalars().all()
+        if not ids:
+            break
+        bind.execute(
+            sa.text(f"UPDATE {table} SET {assignments} WHERE id IN :ids").bindparams(
+                sa.bindparam("ids", expanding=True)
+            ),
+            {"ids": ids},
+        )
+        last_id = ids[-1]
+
+
+def upgrade() -> None:
+    for table in ('orders', 'orders_archive'):
+        op.add_column(table, sa.Column('total_price_minor', sa.BigInteger(), nullable=True))
+        op.add_column(table, sa.Column('currency', sa.String(length=3), server_default='USD', nullable=False))
+    for table in ('order_items', 'order_items_archive'):
+        op.add_column(table, sa.Column('price_minor', sa.BigInteger(), nullable=True))
+        op.add_column(table, sa.Column('currency', sa.String(length=3), server_default='USD', nullable=False))
+
+    with op.get_context().autocommit_block():
+        for table, (assignments, pending) in BACKFILLS.items():
+            backfill(table, assignments, pending)
+
+    for table, (assignments, pending) in BACKFILLS.items():
+        # Догоняем строки, вставленные старым кодом во время пакетного переноса
+        op.execute(f"UPDATE {table} SET {assignments} WHERE {pending}")
+
+    for table in ('orders', 'orders_archive'):
+        op.alter_column(table, 'total_price_minor', existing_type=sa.BigInteger(), nullable=False)
+        op.drop_column(table, 'total_price')
+    for table in ('order_items', 'order_items_archive'):
+        op.drop_column(table, 'price')
+
+    # Агрегаты по клиенту теперь ведутся отдельно для каждой валюты
+    op.add_column('customer_order_stats', sa.Column('currency', sa.String(length=3), server_default='USD', nullable=False))
+    op.add_column('customer_order_stats', sa.Column('total_spent_minor', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE customer_order_stats SET total_spent_minor = round(total_spent * 100)::bigint")
+    op.alter_column('customer_order_stats', 'total_spent_minor', existing_type=sa.BigInteger(), nullable=False)
+    op.drop_column('customer_order_stats', 'total_spent')
+    op.drop_constraint('customer_order_stats_pkey', 'customer_order_stats', type_='primary')
+    op.create_primary_key('customer_order_stats_pkey', 'customer_order_stats', ['customer_id', 'currency'])
+
+
+def downgrade() -> None:
+    # Старая схема знала только центы: агрегаты в других валютах при откате отбрасываются
+    op.drop_constraint('customer_order_stats_pkey', 'customer_order_stats', type_='primary')
+    op.execute("DELETE FROM customer_order_stats WHERE currency <> 'USD'")
+    op.add_column('customer_order_stats', sa.Column('total_spent', sa.Numeric(precision=14, scale=2), nullable=True))
+    op.execute("UPDATE customer_order_stats SET total_spent = total_spent_minor / 100.0")
+    op.alter_column('customer_order_stats', 'total_spent', existing_type=sa.Numeric(precision=14, scale=2), nullable=False)
+    op.drop_column('customer_order_stats', 'total_spent_minor')
+    op.drop_column('customer_order_stats', 'currency')
+    op.create_primary_key('customer_order_stats_pkey', 'customer_order_stats', ['customer_id'])
+
+    for table in ('orders', 'orders_archive'):
+        op.add_column(table, sa.Column('total_price', sa.Numeric(precision=10, scale=2), nullable=True))
+        op.execute(
+            f"UPDATE {table} SET total_price = total_price_minor / 100.0, "
+            f"items_snapshot = CASE WHEN items_snapshot IS NULL THEN NULL ELSE {SNAPSHOT_FROM_MINOR} END"
+        )
+        op.alter_column(table, 'total_price', existing_type=sa.Numeric(precision=10, scale=2), nullable=False)
+        op.drop_column(table, 'currency')
+        op.drop_column(table, 'total_price_minor')
+    for table in ('order_items', 'order_items_archive'):
+        op.add_column(table, sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True))
+        op.execute(f"UPDATE {table} SET price = price_minor / 100.0")
+        op.drop_column(table, 'currency')
+        op.drop_column(table, 'price_minor')
@@ -0,0 +1,64 @@
+"""add orders items snapshot
+
+Revision ID: d42a4fb0e068
+Revises: b03955c3d832
+Create Date: 2026-03-02 09:41:18.662045
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd42a4fb0e068'
+down_revision = 'b03955c3d832'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+BACKFILL = """
+UPDATE orders SET items_snapshot = coalesce((
+    SELECT jsonb_agg(jsonb_build_object(
+        'id', order_items.id::text,
+        'product_id', order_items.product_id::text,
+        'quantity', order_items.quantity,
+        'price', order_items.price::text
+    ) ORDER BY order_items.id)
+    FROM order_items
+    WHERE order_items.order_id = orders.id
+), '[]'::jsonb)
+WHERE orders.id IN ({batch})
+"""
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('items_snapshot', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    if context.is_offline_mode():
+        op.execute(BACKFILL.format(batch="SELECT id FROM orders WHERE items_snapshot IS NULL"))
+        return
+
+    # Каждая пачка коммитится отдельно, чтобы не держать блокировки на всю таблицу
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = None
+        while True:
+            query = "SELECT id FROM orders WHERE items_snapshot IS NULL"
+            params = {"limit": BATCH_SIZE}
+            if last_id is not None:
+                query += " AND id > :last_id"
+                params["last_id"] = last_id
+            ids = bind.execute(sa.text(query + " ORDER BY id LIMIT :limit"), params).scalars().all()
+            if not ids:
+                break
+            bind.execute(
+                sa.text(BACKFILL.format(batch=":ids")).bindparams(sa.bindparam("ids", expanding=True)),
+                {"ids": ids},
+            )
+            last_id = ids[-1]
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'items_snapshot')
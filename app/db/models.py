@@ -1,3 +1,3 @@
-from shared.db.models import Order, OrderItem
+from shared.db.models import ArchivedOrder, ArchivedOrderItem, CustomerOrderStats, Order, OrderItem, OrderStatus
 
-__all__ = ["Order", "OrderItem"]
+__all__ = ["Order", "OrderItem", "OrderStatus", "ArchivedOrder", "ArchivedOrderItem", "CustomerOrderStats"]
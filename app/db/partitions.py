@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import logging
+import re
+import uuid
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from shared.db.ids import uuid7_lower_bound
+
+logger = logging.getLogger(__name__)
+
+# orders партиционирована по id (UUIDv7), order_items по order_id с теми же границами,
+# поэтому позиции всегда лежат в партиции того же месяца, что и их заказ
+PARTITIONED_TABLES = (("orders", "id"), ("order_items", "order_id"))
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def parse_partition_month(table: str, name: str) -> date | None:
+    match = _PARTITION_NAME.match(name)
+    if not match or match.group("table") != table:
+        return None
+    return date(int(match.group("year")), int(match.group("month")), 1)
+
+
+def partition_bounds(month: date) -> tuple[uuid.UUID, uuid.UUID]:
+    start = month_start(month)
+    end = add_months(start, 1)
+    return (
+        uuid7_lower_bound(datetime(start.year, start.month, 1, tzinfo=timezone.utc)),
+        uuid7_lower_bound(datetime(end.year, end.month, 1, tzinfo=timezone.utc)),
+    )
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> list[str]:
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    return [row[0] for row in result]
+
+
+async def create_month(conn: AsyncConnection, month: date) -> bool:
+    month = month_start(month)
+    if partition_name("orders", month) in await list_partitions(conn, "orders"):
+        return False
+
+    lower, upper = partition_bounds(month)
+    bounds = f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+
+    stray = await conn.scalar(
+        text(f"SELECT count(*) FROM {default_partition_name('orders')} WHERE id >= :lower AND id < :upper"),
+        {"lower": lower, "upper": upper},
+    )
+
+    if not stray:
+        for table, _ in PARTITIONED_TABLES:
+            await conn.execute(text(
+                f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} {bounds}"
+            ))
+        return True
+
+    # В DEFAULT-партиции есть старые uuid4-заказы из этого диапазона: переносим их
+    # в новую таблицу и только потом подключаем её как партицию
+    logger.warning("Moving %d orders from default partition into %s", stray, partition_name("orders", month))
+    for table, key in PARTITIONED_TABLES:
+        name = partition_name(table, month)
+        await conn.execute(text(
+            f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        await conn.execute(
+            text(f"INSERT INTO {name} SELECT * FROM {default_partition_name(table)} WHERE {key} >= :lower AND {key} < :upper"),
+            {"lower": lower, "upper": upper},
+        )
+    for table, key in reversed(PARTITIONED_TABLES):
+        await conn.execute(
+            text(f"DELETE FROM {default_partition_name(table)} WHERE {key} >= :lower AND {key} < :upper"),
+            {"lower": lower, "upper": upper},
+        )
+    for table, _ in PARTITIONED_TABLES:
+        await conn.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {partition_name(table, month)} {bounds}"
+        ))
+    return True
+
+
+async def retire_month(conn: AsyncConnection, month: date, drop: bool) -> None:
+    orders_partition = partition_name("orders", month)
+    items_partition = partition_name("order_items", month)
+
+    await conn.execute(text(f"ALTER TABLE order_items DETACH PARTITION {items_partition}"))
+    # После отсоединения FK остаётся на таблице и не даст отсоединить партицию заказов
+    result = await conn.execute(
+        text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"),
+        {"table": items_partition},
+    )
+    for (constraint,) in result.all():
+        await conn.execute(text(f'ALTER TABLE {items_partition} DROP CONSTRAINT "{constraint}"'))
+    await conn.execute(text(f"ALTER TABLE orders DETACH PARTITION {orders_partition}"))
+
+    if drop:
+        await conn.execute(text(f"DROP TABLE {items_partition}"))
+        await conn.execute(text(f"DROP TABLE {orders_partition}"))
+
+
+async def maintain(
+    engine: AsyncEngine,
+    months_ahead: int,
+    retain_months: int,
+    drop: bool,
+    today: date | None = None,
+) -> dict:
+    current = month_start(today or datetime.now(timezone.utc).date())
+    created = []
+    retired = []
+
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        async with engine.begin() as conn:
+            if await create_month(conn, month):
+                created.append(month)
+                logger.info("Created partitions for %s", f"{month:%Y-%m}")
+
+    if retain_months > 0:
+        cutoff = add_months(current, -retain_months)
+        async with engine.begin() as conn:
+            months = sorted(
+                month
+                for name in await list_partitions(conn, "orders")
+                if (month := parse_partition_month("orders", name)) is not None and month < cutoff
+            )
+        for month in months:
+            async with engine.begin() as conn:
+                await retire_month(conn, month, drop)
+            retired.append(month)
+            logger.info("%s partitions for %s", "Dropped" if drop else "Detached", f"{month:%Y-%m}")
+
+    return {"created": created, "retired": retired}
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Create and retire monthly order partitions")
+    parser.add_argument("--months-ahead", type=int, default=settings.partition_months_ahead)
+    parser.add_argument("--retain-months", type=int, default=settings.partition_retain_months)
+    parser.add_argument("--drop", action="store_true", help="drop retired partitions instead of only detaching them")
+    args = parser.parse_args(argv)
+
+    from app.db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    return asyncio.run(maintain(engine, args.months_ahead, args.retain_months, args.drop))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+
+from fastapi import FastAPI, Request
+from prometheus_client import Gauge
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+TOKEN_HEADER = "X-Consistency-Token"
+TOKEN_COOKIE = "consistency_token"
+
+REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of each read replica",
+    ["replica"],
+    multiprocess_mode="livemax",
+)
+
+REPLICA_STATE_QUERY = text(
+    "SELECT coalesce(pg_last_wal_replay_lsn(), pg_current_wal_lsn())::text, "
+    "CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def parse_lsn(value: str) -> int:
+    high, low = value.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+@dataclass
+class ReplicaState:
+    name: str
+    session_factory: object
+    lag: float | None = None
+    replay_lsn: int | None = None
+    caught_up_to: float | None = None
+
+
+class ReplicaRouter:
+    def __init__(self, primary, replicas: dict, max_lag: float):
+        self._primary = primary
+        self._replicas = [ReplicaState(name, factory) for name, factory in replicas.items()]
+        self._max_lag = max_lag
+        self._next = itertools.count()
+
+    @property
+    def replicas(self) -> list[ReplicaState]:
+        return list(self._replicas)
+
+    def _serves(self, replica: ReplicaState, token: str | None) -> bool:
+        if replica.lag is None or replica.lag > self._max_lag:
+            return False
+        if token is None:
+            return True
+
+        # Токен клиента: реплика должна догнать его последнюю запись
+        kind, _, value = token.partition(":")
+        try:
+            if kind == "lsn":
+                target = parse_lsn(value)
+                return replica.replay_lsn is not None and replica.replay_lsn >= target
+            if kind == "ts":
+                target = float(value)
+                return replica.caught_up_to is not None and replica.caught_up_to >= target
+        except ValueError:
+            pass
+        return True
+
+    def reader(self, token: str | None = None):
+        candidates = [replica for replica in self._replicas if self._serves(replica, token)]
+        if not candidates:
+            return self._primary
+        return candidates[next(self._next) % len(candidates)].session_factory
+
+    def writer(self):
+        return self._primary
+
+    async def write_token(self, session: AsyncSession) -> str:
+        if session.bind.dialect.name == "postgresql":
+            lsn = await session.scalar(text("SELECT pg_current_wal_lsn()::text"))
+            return f"lsn:{lsn}"
+        return f"ts:{session.info['committed_at']:.6f}"
+
+    async def _probe(self, replica: ReplicaState):
+        async with replica.session_factory() as session:
+            if session.bind.dialect.name == "postgresql":
+                lsn, lag = (await session.execute(REPLICA_STATE_QUERY)).one()
+                replica.replay_lsn = parse_lsn(lsn)
+                replica.lag = float(lag)
+            else:
+                replica.lag = 0.0
+        replica.caught_up_to = time.time() - replica.lag
+        REPLICA_LAG.labels(replica.name).set(replica.lag)
+
+    async def refresh(self):
+        for replica in self._replicas:
+            try:
+                await self._probe(replica)
+            except Exception:
+                logger.warning("Replica %s is unavailable, reads go to the primary", replica.name, exc_info=True)
+                replica.lag = None
+
+    async def run(self, interval: float):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval)
+
+
+def request_token(request: Request) -> str | None:
+    return request.headers.get(TOKEN_HEADER) or request.cookies.get(TOKEN_COOKIE)
+
+
+def track_commits(session: AsyncSession):
+    @event.listens_for(session.sync_session, "after_commit")
+    def _committed(sync_session):
+        sync_session.info["committed_at"] = time.time()
+
+
+def token_cookie(token: str, max_age: int) -> str:
+    cookie = SimpleCookie()
+    cookie[TOKEN_COOKIE] = token
+    cookie[TOKEN_COOKIE]["max-age"] = max_age
+    cookie[TOKEN_COOKIE]["path"] = "/"
+    cookie[TOKEN_COOKIE]["httponly"] = True
+    cookie[TOKEN_COOKIE]["samesite"] = "lax"
+    return cookie.output(header="").strip()
+
+
+class ConsistencyMiddleware:
+    # Чистый ASGI: токен, выданный get_session в request.state (scope["state"]),
+    # дописываем в заголовки ответа прямо в http.response.start
+    def __init__(self, app, max_age: int):
+        self.app = app
+        self._max_age = max_age
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+
+        async def send_with_token(message):
+            token = state.get("consistency_token")
+            if message["type"] == "http.response.start" and token is not None:
+                headers = MutableHeaders(scope=message)
+                headers.append(TOKEN_HEADER, token)
+                headers.append("set-cookie", token_cookie(token, self._max_age))
+            await send(message)
+
+        await self.app(scope, receive, send_with_token)
+
+
+def setup_consistency(app: FastAPI, max_age: int):
+    app.add_middleware(ConsistencyMiddleware, max_age=max_age)
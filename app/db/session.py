@@ -1,12 +1,12 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.routing import READ_METHODS, ReplicaRouter, request_token, track_commits
+from shared.db.engine import build_engine
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-)
+engine = build_engine(settings, "api")
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -14,7 +14,36 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+replica_engines = {
+    f"replica-{index}": build_engine(settings.model_copy(update={"database_url": url}), f"api-replica-{index}")
+    for index, url in enumerate(settings.replica_urls)
+}
+
+router = ReplicaRouter(
+    AsyncSessionLocal,
+    {
+        name: sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
+        for name, replica_engine in replica_engines.items()
+    },
+    max_lag=settings.replica_max_lag_seconds,
+)
+
+
+async def get_session(request: Request = None) -> AsyncSession:
+    if request is None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    # GET/HEAD читают с реплики, если она догнала последнюю запись клиента
+    if request.method in READ_METHODS:
+        session_factory = router.reader(request_token(request))
+    else:
+        session_factory = router.writer()
 
-async def get_session() -> AsyncSession:
-    async with AsyncSessionLocal() as session:
+    async with session_factory() as session:
+        track_commits(session)
         yield session
+        # Без реплик токен не нужен: все чтения и так идут в primary
+        if router.replicas and "committed_at" in session.info:
+            request.state.consistency_token = await router.write_token(session)
@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.services.orders import items_snapshot
+from shared.db.models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CheckResult:
+    checked: int = 0
+    missing: list[UUID] = field(default_factory=list)
+    mismatched: list[UUID] = field(default_factory=list)
+    repaired: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.mismatched
+
+
+def _snapshot_key(entries: list[dict]) -> list[tuple]:
+    return sorted(
+        (UUID(entry["id"]), UUID(entry["product_id"]), entry["quantity"], entry["price_minor"])
+        for entry in entries
+    )
+
+
+def _items_key(items: list[OrderItem]) -> list[tuple]:
+    return sorted((item.id, item.product_id, item.quantity, item.price_minor) for item in items)
+
+
+async def check_batch(session, after: UUID | None, batch_size: int, repair: bool, result: CheckResult) -> UUID | None:
+    query = select(Order.id, Order.items_snapshot).order_by(Order.id).limit(batch_size)
+    if after is not None:
+        query = query.where(Order.id > after)
+    orders = (await session.execute(query)).all()
+    if not orders:
+        return None
+
+    items_by_order: dict[UUID, list[OrderItem]] = {order_id: [] for order_id, _ in orders}
+    items = await session.execute(
+        select(OrderItem).where(OrderItem.order_id.in_(list(items_by_order)))
+    )
+    for item in items.scalars():
+        items_by_order[item.order_id].append(item)
+
+    for order_id, snapshot in orders:
+        result.checked += 1
+        expected = items_by_order[order_id]
+        if snapshot is None:
+            result.missing.append(order_id)
+        elif _snapshot_key(snapshot) != _items_key(expected):
+            result.mismatched.append(order_id)
+        else:
+            continue
+
+        if repair:
+            await session.execute(
+                update(Order)
+                .where(Order.id == order_id)
+                .values(items_snapshot=items_snapshot(sorted(expected, key=lambda item: item.id)))
+            )
+            result.repaired += 1
+
+    if repair:
+        await session.commit()
+    return orders[-1][0]
+
+
+async def check_snapshots(session_factory, batch_size: int = 1000, repair: bool = False) -> CheckResult:
+    result = CheckResult()
+    after = None
+    while True:
+        async with session_factory() as session:
+            after = await check_batch(session, after, batch_size, repair, result)
+        if after is None:
+            return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify orders.items_snapshot against order_items")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repair", action="store_true", help="rewrite missing or stale snapshots")
+    args = parser.parse_args(argv)
+
+    from app.db.session import AsyncSessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(check_snapshots(AsyncSessionLocal, args.batch_size, args.repair))
+
+    logger.info(
+        "Checked %d orders: %d without snapshot, %d mismatched, %d repaired",
+        result.checked, len(result.missing), len(result.mismatched), result.repaired,
+    )
+    for order_id in result.mismatched:
+        logger.warning("Snapshot mismatch for order %s", order_id)
+    return 0 if result.ok or args.repair else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.api.customers import router as customers_router
 from app.api.orders import router as orders_router
+from app.core.config import settings
+from app.db.routing import setup_consistency
+from app.db.session import AsyncSessionLocal, router as replica_router
+from app.metrics.lag import ProcessingLagCollector
+from app.metrics.multiprocess import mark_worker_dead
 from app.metrics.prometheus import setup_metrics
+from app.metrics.tracing import setup_tracing
+from shared.debug import create_debug_router
+from shared.runtime import apply_gc_threshold, freeze_after_startup, resolve_profile
+from shared.tracing import tracer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if settings.processing_lag_enabled:
+        tasks.append(asyncio.create_task(
+            ProcessingLagCollector(AsyncSessionLocal).run()
+        ))
+    if replica_router.replicas:
+        tasks.append(asyncio.create_task(
+            replica_router.run(settings.replica_lag_poll_interval)
+        ))
+
+    # uvicorn запускает воркеры через spawn: настройки GC из родителя до них не доходят
+    profile = resolve_profile(settings.runtime_profile)
+    apply_gc_threshold(profile)
+    freeze_after_startup(profile)
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    mark_worker_dead()
+    tracer.shutdown()
+
 
-app = FastAPI(title="Order Processing Service")
+app = FastAPI(title="Order Processing Service", lifespan=lifespan)
 
 setup_metrics(app)
+setup_tracing(app, settings)
+if replica_router.replicas:
+    setup_consistency(app, settings.consistency_token_max_age)
 
 app.include_router(orders_router, prefix="/orders", tags=["orders"])
+app.include_router(customers_router, prefix="/customers", tags=["customers"])
+if settings.debug_endpoints_enabled:
+    app.include_router(
+        create_debug_router(settings.debug_token, settings.debug_profile_max_seconds, "api"),
+        prefix="/debug",
+        tags=["debug"],
+    )
 
 
 @app.get("/health")
@@ -1,46 +1,32 @@
-import json
-import uuid
-from datetime import datetime
-
-import aio_pika
+import asyncio
 
 from app.core.config import settings
+from shared.messaging.events import ORDER_CREATED, order_created_message
+from shared.messaging.transport import create_transport
+from shared.money import DEFAULT_CURRENCY
+from shared.tracing import tracer
 
 
 class OrderProducer:
     def __init__(self):
-        self._connection = None
-        self._channel = None
-        self._exchange = None
+        self._transport = create_transport(settings.rabbitmq_url)
 
     async def connect(self):
-        self._connection = await aio_pika.connect_robust(
-            settings.rabbitmq_url
-        )
-        self._channel = await self._connection.channel()
-        self._exchange = await self._channel.declare_exchange(
-            "orders", aio_pika.ExchangeType.TOPIC
-        )
-
-    async def publish_order_created(self, order_id, total_price):
-        message = {
-            "event_id": str(uuid.uuid4()),
-            "event_type": "order.created",
-            "occurred_at": datetime.utcnow().isoformat(),
-            "payload": {
-                "order_id": str(order_id),
-                "total_price": str(total_price),
-            },
-        }
-
-        await self._exchange.publish(
-            aio_pika.Message(
-                body=json.dumps(message).encode(),
-                content_type="application/json",
-            ),
-            routing_key="order.created",
-        )
+        await self._transport.connect()
+
+    async def publish_order_created(self, order_id, total_price_minor: int, currency: str = DEFAULT_CURRENCY):
+        with tracer.start_span(f"{ORDER_CREATED} publish", kind="producer", attributes={"order.id": str(order_id)}):
+            await self._transport.publish(
+                order_created_message(order_id, total_price_minor, currency),
+                ORDER_CREATED,
+            )
+
+    async def publish_orders_created(self, orders):
+        # Публикуем пачку параллельно: подтверждения брокера ждём все сразу
+        await asyncio.gather(*(
+            self.publish_order_created(order_id, total_price_minor, currency)
+            for order_id, total_price_minor, currency in orders
+        ))
 
     async def close(self):
-        if self._connection:
-            await self._connection.close()
+        await self._transport.close()
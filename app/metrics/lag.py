@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import func, select, tuple_
+
+from app.core.config import settings
+from shared.clock import as_utc
+from shared.db.leases import acquire_lease, release_lease
+from shared.db.models import IS_UNPROCESSED, Order
+
+logger = logging.getLogger(__name__)
+
+ORDER_PROCESSING_LAG = Histogram(
+    "order_processing_lag_seconds",
+    "Time from order creation to PROCESSED",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+ORDER_SLO_BURN_RATE = Gauge(
+    "order_processing_slo_burn_rate",
+    "Error budget burn rate of the processing lag SLO over the window",
+    multiprocess_mode="livemostrecent",
+)
+
+ORDERS_UNPROCESSED = Gauge(
+    "orders_unprocessed",
+    "Orders still waiting in NEW status",
+    multiprocess_mode="livemostrecent",
+)
+
+ORDERS_UNPROCESSED_OLDEST_AGE = Gauge(
+    "orders_unprocessed_oldest_age_seconds",
+    "Age of the oldest order still waiting in NEW status",
+    multiprocess_mode="livemostrecent",
+)
+
+# Коллектор работает в одном процессе на весь кластер: каждый воркер API запускает его,
+# но наблюдения пишет только держатель аренды, иначе гистограмма считала бы заказ N раз
+LEASE_NAME = "processing-lag-collector"
+
+# Читает только частичный индекс ix_orders_unprocessed_created_at, без обращения к обработанным строкам
+BACKLOG = select(func.count(), func.min(Order.created_at)).where(IS_UNPROCESSED)
+
+
+class ProcessingLagCollector:
+    def __init__(
+        self,
+        session_factory,
+        slo_seconds: float = settings.processing_slo_seconds,
+        slo_target: float = settings.processing_slo_target,
+        window_seconds: float = settings.processing_slo_window_seconds,
+        grace_seconds: float = settings.processing_lag_grace_seconds,
+        batch_size: int = 5000,
+    ):
+        self._session_factory = session_factory
+        self._slo_seconds = slo_seconds
+        self._slo_target = slo_target
+        self._window = timedelta(seconds=window_seconds)
+        self._grace = timedelta(seconds=grace_seconds)
+        self._batch_size = batch_size
+        self._watermark: datetime | None = None
+        # id учтённых заказов за последние grace секунд до watermark
+        self._seen: dict[UUID, datetime] = {}
+        # По корзине на опрос: (время опроса, всего заказов, из них с нарушением SLO)
+        self._buckets: deque[tuple[datetime, int, int]] = deque()
+        self._total = 0
+        self._breached = 0
+        # Заказы раньше этой отметки уже учёл прошлый держатель аренды: в гистограмму их не пишем
+        self._observe_from: datetime | None = None
+
+    @property
+    def burn_rate(self) -> float:
+        if not self._total:
+            return 0.0
+        return (self._breached / self._total) / (1 - self._slo_target)
+
+    async def collect_once(self) -> int:
+        now = datetime.now(timezone.utc)
+        if self._watermark is None:
+            self._watermark = now - self._window
+
+        collected = breached = 0
+        columns = select(Order.id, Order.created_at, Order.processed_at).order_by(Order.processed_at, Order.id)
+        # Заказ может закоммититься позже, чем заказ с бОльшим processed_at (параллельные consumer'ы,
+        # ожидание блокировок): перечитываем grace-окно до watermark и отсекаем уже учтённые по id
+        query = columns.where(Order.processed_at >= self._watermark - self._grace)
+        async with self._session_factory() as session:
+            while True:
+                rows = (await session.execute(query.limit(self._batch_size))).all()
+
+                for order_id, created_at, processed_at in rows:
+                    processed_at = as_utc(processed_at)
+                    if order_id in self._seen:
+                        continue
+                    self._seen[order_id] = processed_at
+                    self._watermark = max(self._watermark, processed_at)
+
+                    lag = (processed_at - as_utc(created_at)).total_seconds()
+                    if self._observe_from is None or processed_at >= self._observe_from:
+                        ORDER_PROCESSING_LAG.observe(max(lag, 0.0))
+                    collected += 1
+                    breached += lag > self._slo_seconds
+
+                if len(rows) < self._batch_size:
+                    break
+                last_id, _, last_processed_at = rows[-1]
+                query = columns.where(tuple_(Order.processed_at, Order.id) > tuple_(last_processed_at, last_id))
+
+            backlog, oldest = (await session.execute(BACKLOG)).one()
+
+        horizon = self._watermark - self._grace
+        self._seen = {order_id: at for order_id, at in self._seen.items() if at >= horizon}
+
+        if collected:
+            self._buckets.append((now, collected, breached))
+            self._total += collected
+            self._breached += breached
+        while self._buckets and self._buckets[0][0] < now - self._window:
+            _, total, bad = self._buckets.popleft()
+            self._total -= total
+            self._breached -= bad
+        ORDER_SLO_BURN_RATE.set(self.burn_rate)
+        ORDERS_UNPROCESSED.set(backlog)
+        ORDERS_UNPROCESSED_OLDEST_AGE.set((now - as_utc(oldest)).total_seconds() if oldest else 0)
+
+        return collected
+
+    def take_over(self, now: datetime):
+        # Окно burn rate набираем заново, а гистограмму продолжаем с момента захвата аренды
+        self._watermark = now - self._window
+        self._seen = {}
+        self._buckets.clear()
+        self._total = self._breached = 0
+        self._observe_from = now
+
+    async def _renew(self, ttl: timedelta) -> bool:
+        async with self._session_factory() as session:
+            leader = await acquire_lease(session, LEASE_NAME, ttl, datetime.now(timezone.utc))
+            await session.commit()
+        return leader
+
+    async def run(self, interval: float = settings.processing_lag_poll_interval):
+        ttl = timedelta(seconds=interval * 3)
+        leader = False
+        try:
+            while True:
+                try:
+                    was_leader, leader = leader, await self._renew(ttl)
+                    if leader and not was_leader:
+                        self.take_over(datetime.now(timezone.utc))
+                    if leader:
+                        await self.collect_once()
+                except Exception:
+                    logger.exception("Processing lag collection failed")
+                await asyncio.sleep(interval)
+        finally:
+            if leader:
+                # Отпускаем аренду сразу, чтобы другой воркер не ждал её истечения
+                async with self._session_factory() as session:
+                    await release_lease(session, LEASE_NAME, datetime.now(timezone.utc))
+                    await session.commit()
@@ -0,0 +1,51 @@
+import os
+import re
+
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+LIVE_GAUGE_FILE = re.compile(r"^gauge_live[a-z]+_(\d+)\.db$")
+
+
+def multiprocess_dir() -> str | None:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def metrics_registry():
+    if multiprocess_dir() is None:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def reset_multiprocess_dir(path: str) -> None:
+    # Вызывается до запуска воркеров: файлы прошлого запуска иначе попадут в счётчики
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def reap_dead_workers(path: str) -> list[int]:
+    # Упавший воркер не успевает вызвать mark_process_dead, и его live-гейджи висят вечно
+    pids = {int(match.group(1)) for match in map(LIVE_GAUGE_FILE.match, os.listdir(path)) if match}
+    dead = sorted(pid for pid in pids if not _alive(pid))
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, path)
+    return dead
+
+
+def mark_worker_dead() -> None:
+    path = multiprocess_dir()
+    if path is not None:
+        multiprocess.mark_process_dead(os.getpid(), path)
@@ -1,35 +1,161 @@
-from prometheus_client import Counter, Histogram, make_asgi_app
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
 from fastapi import FastAPI
+from starlette.routing import Match
+import asyncio
+import gzip
 import time
 
+from app.core.config import settings
+from app.metrics.multiprocess import metrics_registry, multiprocess_dir, reap_dead_workers
+from shared.db.statements import statement_source
+
 REQUEST_COUNT = Counter(
     "http_requests_total",
     "Total HTTP requests",
-    ["method", "path"],
+    ["method", "path", "status"],
 )
 
 REQUEST_LATENCY = Histogram(
     "http_request_duration_seconds",
     "HTTP request latency",
+    ["method", "path", "status"],
+)
+
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size",
     ["method", "path"],
+    buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576),
 )
 
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+
+OTHER = "other"
+
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class PathLabels:
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._seen: set[str] = set()
+
+    def __call__(self, path: str | None) -> str:
+        if path is None:
+            return OTHER
+        if path in self._seen:
+            return path
+        # Жёсткий предел числа временных рядов: всё сверх него уходит в общий "other"
+        if len(self._seen) >= self._limit:
+            return OTHER
+        self._seen.add(path)
+        return path
+
+
+def route_template(routes, scope) -> str | None:
+    # Шаблон маршрута вместо сырого пути: /orders/{order_id} — один ряд на все заказы
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial
 
-def setup_metrics(app: FastAPI):
-    metrics_app = make_asgi_app()
-    app.mount("/metrics", metrics_app)
 
-    @app.middleware("http")
-    async def metrics_middleware(request, call_next):
-        start = time.time()
-        response = await call_next(request)
-        duration = time.time() - start
+class MetricsMiddleware:
+    # Чистый ASGI вместо BaseHTTPMiddleware: без лишней задачи и потока на каждый запрос
+    def __init__(self, app, router, max_path_labels: int):
+        self.app = app
+        self._router = router
+        self._path_labels = PathLabels(max_path_labels)
 
-        REQUEST_COUNT.labels(
-            request.method, request.url.path
-        ).inc()
-        REQUEST_LATENCY.labels(
-            request.method, request.url.path
-        ).observe(duration)
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Маршрут ищем до вызова приложения: роутер дописывает в scope данные смонтированных приложений
+        method = scope["method"] if scope["method"] in METHODS else OTHER
+        path = self._path_labels(route_template(self._router.routes, scope))
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        source = statement_source.set(f"{method} {path}")
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            duration = time.perf_counter() - start
+            statement_source.reset(source)
+            IN_FLIGHT.dec()
+
+            REQUEST_COUNT.labels(method, path, str(status)).inc()
+            REQUEST_LATENCY.labels(method, path, str(status)).observe(duration)
+            RESPONSE_SIZE.labels(method, path).observe(size)
+
+
+class CachedMetricsApp:
+    # Сборка из файлов всех воркеров недешёвая: частые scrape'ы получают готовый ответ
+    def __init__(self, registry, ttl: float):
+        self._registry = registry
+        self._ttl = ttl
+        self._expires_at = 0.0
+        self._body = b""
+        self._gzipped: bytes | None = None
+
+    def _render(self) -> bytes:
+        path = multiprocess_dir()
+        if path is not None:
+            reap_dead_workers(path)
+        return generate_latest(self._registry)
+
+    async def body(self, accept_gzip: bool) -> bytes:
+        if time.monotonic() >= self._expires_at:
+            self._body = await asyncio.to_thread(self._render)
+            self._gzipped = None
+            self._expires_at = time.monotonic() + self._ttl
+        if not accept_gzip:
+            return self._body
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self._body)
+        return self._gzipped
+
+    async def __call__(self, scope, receive, send):
+        accept_encoding = dict(scope.get("headers", ())).get(b"accept-encoding", b"")
+        accept_gzip = b"gzip" in accept_encoding
+        body = await self.body(accept_gzip)
+
+        headers = [
+            (b"content-type", CONTENT_TYPE_LATEST.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if accept_gzip:
+            headers.append((b"content-encoding", b"gzip"))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def setup_metrics(
+    app: FastAPI,
+    max_path_labels: int = settings.metrics_max_path_labels,
+    cache_ttl: float = settings.metrics_cache_ttl,
+):
+    metrics_app = CachedMetricsApp(metrics_registry(), cache_ttl)
+    app.mount("/metrics", metrics_app)
 
-        return response
+    app.add_middleware(MetricsMiddleware, router=app.router, max_path_labels=max_path_labels)
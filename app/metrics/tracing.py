@@ -0,0 +1,46 @@
+from fastapi import FastAPI
+
+from app.metrics.prometheus import OTHER, route_template
+from shared.tracing import TRACEPARENT, configure_tracing, extract, tracer
+
+
+class TracingMiddleware:
+    def __init__(self, app, router):
+        self.app = app
+        self._router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(self._router.routes, scope) or OTHER
+        headers = {
+            TRACEPARENT: value.decode("latin-1")
+            for key, value in scope.get("headers", ())
+            if key == TRACEPARENT.encode()
+        }
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # Запрос от клиента с traceparent продолжает его трейс, иначе здесь начинается новый
+        with tracer.start_span(
+            f"{scope['method']} {route}",
+            kind="server",
+            parent=extract(headers),
+            attributes={"http.method": scope["method"], "http.route": route},
+        ) as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                span.set_attribute("http.status_code", status)
+
+
+def setup_tracing(app: FastAPI, settings):
+    configure_tracing("api", settings)
+    app.add_middleware(TracingMiddleware, router=app.router)
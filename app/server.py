@@ -0,0 +1,32 @@
+import logging
+
+import uvicorn
+
+from app.core.config import settings
+from app.metrics.multiprocess import multiprocess_dir, reset_multiprocess_dir
+from shared.runtime import resolve_profile
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    profile = resolve_profile(settings.runtime_profile)
+
+    path = multiprocess_dir()
+    if path is not None:
+        reset_multiprocess_dir(path)
+    elif settings.api_workers > 1:
+        logger.warning("API_WORKERS=%d without PROMETHEUS_MULTIPROC_DIR: /metrics shows only the worker that answers", settings.api_workers)
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=settings.api_workers,
+        loop=profile.loop,
+        http=profile.http,
+    )
+
+
+if __name__ == "__main__":
+    main()
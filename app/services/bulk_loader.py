@@ -0,0 +1,364 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+from uuid import UUID
+
+import asyncpg
+
+from app.core.config import settings
+from app.messaging.producer import OrderProducer
+from app.services.orders import items_snapshot
+from shared.clock import as_utc
+from shared.db.ids import uuid7_at
+from shared.db.status import STATUS_CODES, OrderStatus
+from shared.money import DEFAULT_CURRENCY, to_minor
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+CSV_FIELDS = ("order_id", "customer_id", "status", "created_at", "product_id", "quantity")
+CSV_PRICE_FIELDS = ("price", "price_minor")
+
+ORDER_COLUMNS = (
+    "id", "customer_id", "status", "total_price_minor", "currency",
+    "created_at", "updated_at", "processed_at", "items_snapshot",
+)
+ITEM_COLUMNS = ("id", "order_id", "product_id", "quantity", "price_minor", "currency")
+
+# Тот же агрегат, что consumer ведёт при переводе заказа в PROCESSED (increment_statement):
+# импортированная история обработанных заказов тоже попадает в /customers/{id}/stats
+UPSERT_CUSTOMER_STATS = """
+INSERT INTO customer_order_stats (customer_id, currency, order_count, total_spent_minor, last_order_at)
+VALUES ($1, $2, $3, $4, $5)
+ON CONFLICT (customer_id, currency) DO UPDATE SET
+    order_count = customer_order_stats.order_count + EXCLUDED.order_count,
+    total_spent_minor = customer_order_stats.total_spent_minor + EXCLUDED.total_spent_minor,
+    last_order_at = GREATEST(customer_order_stats.last_order_at, EXCLUDED.last_order_at),
+    updated_at = now()
+"""
+
+
+@dataclass
+class BulkItem:
+    id: UUID
+    product_id: UUID
+    quantity: int
+    price_minor: int
+
+
+@dataclass
+class BulkOrder:
+    id: UUID
+    customer_id: UUID
+    status: OrderStatus
+    currency: str
+    created_at: datetime
+    processed_at: datetime | None
+    items: list[BulkItem] = field(default_factory=list)
+
+    @property
+    def total_price_minor(self) -> int:
+        return sum(item.quantity * item.price_minor for item in self.items)
+
+
+def _price_minor(item: dict, currency: str) -> int:
+    if item.get("price_minor") not in (None, ""):
+        return int(item["price_minor"])
+    return to_minor(Decimal(str(item["price"])), currency)
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    return as_utc(datetime.fromisoformat(value))
+
+
+def build_order(record: dict) -> BulkOrder:
+    try:
+        created_at = _parse_datetime(record.get("created_at")) or datetime.now(timezone.utc)
+        # id с меткой created_at: исторические заказы ложатся в партицию своего месяца
+        order = BulkOrder(
+            id=UUID(record["id"]) if record.get("id") else uuid7_at(created_at),
+            customer_id=UUID(record["customer_id"]),
+            status=OrderStatus(record.get("status") or OrderStatus.NEW),
+            currency=record.get("currency") or DEFAULT_CURRENCY,
+            created_at=created_at,
+            processed_at=_parse_datetime(record.get("processed_at")),
+        )
+        for item in record["items"]:
+            quantity = int(item["quantity"])
+            price_minor = _price_minor(item, order.currency)
+            if quantity <= 0 or price_minor <= 0:
+                raise ValueError("quantity and price must be positive")
+            order.items.append(BulkItem(
+                id=uuid7_at(created_at),
+                product_id=UUID(item["product_id"]),
+                quantity=quantity,
+                price_minor=price_minor,
+            ))
+    except (ArithmeticError, KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid order record {record!r}: {exc}") from exc
+    return order
+
+
+def _line_start(f, offset: int) -> int:
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def _line_before(f, position: int, block: int = 65536) -> bytes:
+    end = position - 1
+    start = end
+    data = b""
+    while start > 0:
+        start = max(0, start - block)
+        f.seek(start)
+        data = f.read(end - start)
+        index = data.rfind(b"\n")
+        if index >= 0:
+            return data[index + 1:]
+    return data
+
+
+def read_segment(
+    path: str,
+    start: int,
+    end: int,
+    data_start: int = 0,
+    key: Callable[[bytes], object] | None = None,
+) -> Iterator[bytes]:
+    # Сегмент владеет заказами, чья первая строка начинается в [start, end):
+    # заказ, начатый раньше, дочитывает предыдущий воркер
+    with open(path, "rb") as f:
+        position = _line_start(f, max(start, data_start))
+        previous_key = None
+        if key is not None and position > data_start:
+            previous_key = key(_line_before(f, position))
+        f.seek(position)
+
+        current_key = None
+        while True:
+            line_start = f.tell()
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            line_key = key(line) if key is not None else None
+            if previous_key is not None:
+                if line_key == previous_key:
+                    continue
+                previous_key = None
+            if line_start >= end and (key is None or line_key != current_key):
+                return
+            current_key = line_key
+            yield line
+
+
+def segments(size: int, workers: int, data_start: int = 0) -> list[tuple[int, int]]:
+    step = max(1, -(-(size - data_start) // workers))
+    return [
+        (offset, min(size, offset + step))
+        for offset in range(data_start, max(size, data_start + 1), step)
+    ]
+
+
+def csv_header(path: str) -> tuple[list[str], int]:
+    with open(path, "rb") as f:
+        line = f.readline()
+        header = next(csv.reader([line.decode()]))
+        missing = set(CSV_FIELDS) - set(header) - {"created_at", "status"}
+        if not set(CSV_PRICE_FIELDS) & set(header):
+            missing.add(" or ".join(CSV_PRICE_FIELDS))
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {sorted(missing)}")
+        return header, f.tell()
+
+
+def csv_key(header: list[str]) -> Callable[[bytes], str]:
+    index = header.index("order_id")
+
+    def key(line: bytes) -> str:
+        return next(csv.reader([line.decode()]))[index]
+
+    return key
+
+
+def csv_records(lines: Iterable[bytes], header: list[str]) -> Iterator[dict]:
+    # Строка CSV — одна позиция; позиции одного заказа должны идти подряд
+    record = None
+    for row in csv.DictReader((line.decode() for line in lines), fieldnames=header):
+        if record is None or row["order_id"] != record["id"]:
+            if record is not None:
+                yield record
+            record = {
+                "id": row["order_id"],
+                "customer_id": row["customer_id"],
+                "status": row.get("status"),
+                "currency": row.get("currency"),
+                "created_at": row.get("created_at"),
+                "processed_at": row.get("processed_at"),
+                "items": [],
+            }
+        record["items"].append({
+            "product_id": row["product_id"],
+            "quantity": row["quantity"],
+            "price": row.get("price"),
+            "price_minor": row.get("price_minor"),
+        })
+    if record is not None:
+        yield record
+
+
+def ndjson_records(lines: Iterable[bytes]) -> Iterator[dict]:
+    for line in lines:
+        yield json.loads(line)
+
+
+def customer_stats(orders: list[BulkOrder]) -> list[tuple]:
+    totals: dict[tuple[UUID, str], list] = {}
+    for order in orders:
+        if order.status is not OrderStatus.PROCESSED:
+            continue
+        entry = totals.setdefault((order.customer_id, order.currency), [0, 0, order.created_at])
+        entry[0] += 1
+        entry[1] += order.total_price_minor
+        entry[2] = max(entry[2], order.created_at)
+    # В порядке ключа: параллельные воркеры блокируют строки агрегата в одном порядке, без дедлоков
+    return [(customer_id, currency, *entry) for (customer_id, currency), entry in sorted(totals.items())]
+
+
+async def copy_chunk(conn, orders: list[BulkOrder]):
+    async with conn.transaction():
+        await conn.copy_records_to_table(
+            "orders",
+            records=[
+                (
+                    order.id, order.customer_id, STATUS_CODES[order.status], order.total_price_minor, order.currency,
+                    order.created_at, order.created_at, order.processed_at,
+                    json.dumps(items_snapshot(order.items)),
+                )
+                for order in orders
+            ],
+            columns=ORDER_COLUMNS,
+        )
+        await conn.copy_records_to_table(
+            "order_items",
+            records=[
+                (item.id, order.id, item.product_id, item.quantity, item.price_minor, order.currency)
+                for order in orders
+                for item in order.items
+            ],
+            columns=ITEM_COLUMNS,
+        )
+        stats = customer_stats(orders)
+        if stats:
+            await conn.executemany(UPSERT_CUSTOMER_STATS, stats)
+
+
+async def load_records(conn, records: Iterable[dict], chunk_size: int, producer=None) -> dict:
+    stats = {"orders": 0, "items": 0, "events": 0}
+    records = iter(records)
+    while chunk := list(islice(records, chunk_size)):
+        orders = [build_order(record) for record in chunk]
+        await copy_chunk(conn, orders)
+        stats["orders"] += len(orders)
+        stats["items"] += sum(len(order.items) for order in orders)
+
+        if producer is not None:
+            created = [
+                (order.id, order.total_price_minor, order.currency)
+                for order in orders
+                if order.status is OrderStatus.NEW
+            ]
+            await producer.publish_orders_created(created)
+            stats["events"] += len(created)
+    return stats
+
+
+def asyncpg_dsn(url: str) -> str:
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def load_segment(
+    dsn: str,
+    path: str,
+    fmt: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    emit_events: bool,
+) -> dict:
+    if fmt == "csv":
+        header, data_start = csv_header(path)
+        lines = read_segment(path, start, end, data_start, csv_key(header))
+        records = csv_records(lines, header)
+    else:
+        records = ndjson_records(read_segment(path, start, end))
+
+    conn = await asyncpg.connect(dsn)
+    producer = None
+    try:
+        if emit_events:
+            producer = OrderProducer()
+            await producer.connect()
+        return await load_records(conn, records, chunk_size, producer)
+    finally:
+        if producer is not None:
+            await producer.close()
+        await conn.close()
+
+
+def _run_segment(args: tuple) -> dict:
+    return asyncio.run(load_segment(*args))
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.endswith(".csv") else "ndjson"
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Bulk-load orders with binary COPY")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--emit-events", action="store_true", help="publish order.created for imported NEW orders")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    fmt = args.format or detect_format(args.path)
+    data_start = csv_header(args.path)[1] if fmt == "csv" else 0
+    jobs = [
+        (asyncpg_dsn(settings.database_url), args.path, fmt, start, end, args.chunk_size, args.emit_events)
+        for start, end in segments(os.path.getsize(args.path), args.workers, data_start)
+    ]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(_run_segment, jobs))
+    elapsed = time.perf_counter() - started
+
+    totals = {name: sum(result[name] for result in results) for name in ("orders", "items", "events")}
+    logger.info(
+        "Loaded %d orders and %d items in %.1fs (%.0f orders/s), published %d events",
+        totals["orders"], totals["items"], elapsed, totals["orders"] / max(elapsed, 1e-9), totals["events"],
+    )
+    return totals
+
+
+if __name__ == "__main__":
+    main()
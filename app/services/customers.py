@@ -0,0 +1,22 @@
+from uuid import UUID
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.db.models import CustomerOrderStats
+
+STATS_BY_CUSTOMER = select(
+    CustomerOrderStats.order_count,
+    CustomerOrderStats.total_spent_minor,
+    CustomerOrderStats.last_order_at,
+).where(
+    CustomerOrderStats.customer_id == bindparam("customer_id"),
+    CustomerOrderStats.currency == bindparam("currency"),
+)
+
+
+async def get_customer_stats(session: AsyncSession, customer_id: UUID, currency: str):
+    result = await session.execute(
+        STATS_BY_CUSTOMER, {"customer_id": customer_id, "currency": currency}
+    )
+    return result.first()
@@ -1,60 +1,192 @@
 from uuid import UUID
-from decimal import Decimal
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import bindparam, select
 
-from shared.db.models import Order, OrderItem
+from shared.db.ids import uuid7
+from shared.db.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+from shared.money import DEFAULT_CURRENCY, from_minor, to_minor
 
 
-def calculate_total_price(items) -> Decimal:
-    return sum(item.quantity * item.price for item in items)
+def item_price_minor(item, currency: str = DEFAULT_CURRENCY) -> int:
+    if item.price_minor is not None:
+        return item.price_minor
+    return to_minor(item.price, currency)
+
+
+def calculate_total_price(items, currency: str = DEFAULT_CURRENCY) -> int:
+    return sum(item.quantity * item_price_minor(item, currency) for item in items)
+
+
+def items_snapshot(items) -> list[dict]:
+    return [
+        {
+            "id": str(item.id),
+            "product_id": str(item.product_id),
+            "quantity": item.quantity,
+            "price_minor": item.price_minor,
+        }
+        for item in items
+    ]
+
+
+def snapshot_items(snapshot: list[dict], currency: str) -> list[dict]:
+    return [
+        {
+            "product_id": UUID(item["product_id"]),
+            "quantity": item["quantity"],
+            "price_minor": item["price_minor"],
+            "price": from_minor(item["price_minor"], currency),
+        }
+        for item in snapshot
+    ]
+
+
+def order_items(order: Order) -> list[dict]:
+    if order.items_snapshot is not None:
+        return snapshot_items(order.items_snapshot, order.currency)
+    return [
+        {
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "price_minor": item.price_minor,
+            "price": item.price,
+        }
+        for item in order.items
+    ]
 
 
 async def create_order(
     session: AsyncSession,
     customer_id: UUID,
     items: list,
+    currency: str = DEFAULT_CURRENCY,
 ) -> Order:
-    total_price = calculate_total_price(items)
-
-    order = Order(
-        customer_id=customer_id,
-        status="NEW",
-        total_price=total_price,
-    )
-
-    session.add(order)
-    await session.flush()
+    total_price_minor = calculate_total_price(items, currency)
+    order_id = uuid7()
 
     order_items = [
         OrderItem(
-            order_id=order.id,
+            id=uuid7(),
+            order_id=order_id,
             product_id=item.product_id,
             quantity=item.quantity,
-            price=item.price,
+            price_minor=item_price_minor(item, currency),
+            currency=currency,
         )
         for item in items
     ]
 
+    order = Order(
+        id=order_id,
+        customer_id=customer_id,
+        status=OrderStatus.NEW,
+        total_price_minor=total_price_minor,
+        currency=currency,
+        items_snapshot=items_snapshot(order_items),
+    )
+
+    session.add(order)
+    await session.flush()
+
     session.add_all(order_items)
     await session.commit()
     
     result = await session.execute(
-        select(Order)
-        .where(Order.id == order.id)
-        .options(selectinload(Order.items))
+        select(Order).where(Order.id == order.id)
     )
     order = result.scalar_one()
 
     return order
 
 
-async def get_order(session: AsyncSession, order_id: UUID) -> Order | None:
-    result = await session.execute(
-        select(Order)
-        .where(Order.id == order_id)
-        .options(selectinload(Order.items))
+def _order_by_id(model):
+    return select(
+        model.id,
+        model.customer_id,
+        model.status,
+        model.total_price_minor,
+        model.currency,
+        model.created_at,
+        model.updated_at,
+        model.items_snapshot,
+    ).where(model.id == bindparam("order_id"))
+
+
+def _items_by_order(model):
+    return (
+        select(model.product_id, model.quantity, model.price_minor)
+        .where(model.order_id == bindparam("order_id"))
+        .order_by(model.id)
+    )
+
+
+# Запросы собраны один раз: на каждом вызове меняются только параметры,
+# а скомпилированный SQL берётся из кэша движка
+ORDER_BY_ID = _order_by_id(Order)
+ITEMS_BY_ORDER = _items_by_order(OrderItem)
+ARCHIVED_ORDER_BY_ID = _order_by_id(ArchivedOrder)
+ARCHIVED_ITEMS_BY_ORDER = _items_by_order(ArchivedOrderItem)
+
+
+class OrderRow:
+    __slots__ = (
+        "id", "customer_id", "status", "total_price_minor", "currency",
+        "created_at", "updated_at", "items",
+    )
+
+    def __init__(self, id, customer_id, status, total_price_minor, currency, created_at, updated_at, items):
+        self.id = id
+        self.customer_id = customer_id
+        self.status = status
+        self.total_price_minor = total_price_minor
+        self.currency = currency
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.items = items
+
+    @property
+    def total_price(self):
+        return from_minor(self.total_price_minor, self.currency)
+
+
+async def get_order(
+    session: AsyncSession,
+    order_id: UUID,
+    include_archive: bool = False,
+) -> OrderRow | None:
+    params = {"order_id": order_id}
+    items_query = ITEMS_BY_ORDER
+    row = (await session.execute(ORDER_BY_ID, params)).first()
+
+    if row is None and include_archive:
+        items_query = ARCHIVED_ITEMS_BY_ORDER
+        row = (await session.execute(ARCHIVED_ORDER_BY_ID, params)).first()
+
+    if row is None:
+        return None
+
+    if row.items_snapshot is not None:
+        items = snapshot_items(row.items_snapshot, row.currency)
+    else:
+        # Заказы без снимка (созданные до его появления) дочитываем из order_items
+        items = [
+            {
+                "product_id": product_id,
+                "quantity": quantity,
+                "price_minor": price_minor,
+                "price": from_minor(price_minor, row.currency),
+            }
+            for product_id, quantity, price_minor in await session.execute(items_query, params)
+        ]
+
+    return OrderRow(
+        row.id,
+        row.customer_id,
+        row.status,
+        row.total_price_minor,
+        row.currency,
+        row.created_at,
+        row.updated_at,
+        items,
     )
-    return result.scalar_one_or_none()
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+DEFAULT_DATABASE = "standalone.db"
+
+
+def configure(database: str) -> None:
+    # Настройки app и consumer читаются при импорте, поэтому окружение подменяем до него
+    os.environ["RABBITMQ_URL"] = "memory://"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database}?timeout=30"
+    os.environ["DATABASE_REPLICA_URLS"] = ""
+
+
+@asynccontextmanager
+async def pipeline():
+    from app.db.session import engine
+    from consumer.main import background_tasks, shutdown
+    from consumer.messaging.consumer import OrderConsumer
+    from shared.db.base import Base
+
+    # WAL: API и consumer пишут в один файл через разные пулы, читатели не ждут писателя
+    async with engine.connect() as connection:
+        await connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    consumer = OrderConsumer()
+    await consumer.start()
+    tasks = [asyncio.create_task(task) for task in background_tasks(consumer)]
+    try:
+        yield consumer
+    finally:
+        await shutdown(consumer, tasks)
+
+
+async def serve(host: str, port: int):
+    import uvicorn
+
+    from app.main import app
+
+    async with pipeline():
+        await uvicorn.Server(uvicorn.Config(app, host=host, port=port)).serve()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the API and the consumer in one process without RabbitMQ or Postgres")
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="SQLite database file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    configure(args.database)
+    logging.basicConfig(level=logging.INFO)
+
+    from app.core.config import settings
+    from shared.runtime import resolve_profile, run
+
+    run(serve(args.host, args.port), resolve_profile(settings.runtime_profile))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Per-request cost of the HTTP metrics middleware.
+
+    python -m benchmarks.bench_metrics_middleware --requests 20000
+
+Calls the ASGI app directly with an in-memory receive/send, so the numbers
+are the framework and middleware cost alone, without sockets or an HTTP
+parser. Compares a bare app, the previous @app.middleware("http")
+(BaseHTTPMiddleware + time.time) implementation, MetricsMiddleware, and
+"app" — the same endpoint behind the full middleware stack of
+app.main.app, so middleware added elsewhere shows up here too. Prints the
+overhead each adds on top of the bare app.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from app.metrics.prometheus import REQUEST_COUNT, REQUEST_LATENCY, setup_metrics
+
+VARIANTS = ("bare", "base-http", "asgi", "app")
+
+
+def _base_http_middleware(app: FastAPI):
+    @app.middleware("http")
+    async def metrics_middleware(request, call_next):
+        start = time.time()
+        response = await call_next(request)
+        duration = time.time() - start
+
+        REQUEST_COUNT.labels(request.method, request.url.path, str(response.status_code)).inc()
+        REQUEST_LATENCY.labels(request.method, request.url.path, str(response.status_code)).observe(duration)
+
+        return response
+
+
+def _build(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/orders/{order_id}")
+    async def get_order(order_id: str):
+        return {"order_id": order_id, "status": "PROCESSED"}
+
+    if variant == "base-http":
+        _base_http_middleware(app)
+    elif variant == "asgi":
+        setup_metrics(app)
+    elif variant == "app":
+        from app.main import app as real_app
+
+        # Эндпоинт тот же, а middleware — ровно те, что стоят в настоящем приложении
+        app.user_middleware = list(real_app.user_middleware)
+    return app
+
+
+async def _run(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/orders/550e8400-e29b-41d4-a716-446655440000",
+        "raw_path": b"/orders/550e8400-e29b-41d4-a716-446655440000",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 12345),
+    }
+
+    disconnected = asyncio.Event()
+
+    def receiver():
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                # Как настоящий сервер: после тела запроса ждём, пока клиент не отключится
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        return receive
+
+    async def send(message):
+        pass
+
+    for _ in range(1000):
+        await app(dict(scope), receiver(), send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receiver(), send)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for variant in VARIANTS:
+        app = _build(variant)
+        results[variant] = min(asyncio.run(_run(app, args.requests)) for _ in range(args.rounds))
+
+    bare = results["bare"]
+    for variant, per_request in results.items():
+        overhead = per_request - bare
+        print(f"{variant:<10} {per_request * 1e6:8.1f} us/request   overhead {overhead * 1e6:+8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""End-to-end API -> broker -> consumer throughput and latency in one process.
+
+    python -m benchmarks.bench_pipeline --orders 5000 --concurrency 32
+
+Runs the app.standalone pipeline: the in-memory broker instead of RabbitMQ
+and a throwaway SQLite file instead of Postgres, so it needs no services
+and fits in CI. Requests go straight to the ASGI app without sockets.
+Latency is counted from sending POST /orders/ to the consumer committing
+PROCESSED; absolute numbers are not comparable with Postgres, use them to
+compare revisions against each other.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from app.standalone import configure
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _bench(orders: int, concurrency: int, timeout: float) -> dict:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.main import app
+    from app.standalone import pipeline
+
+    async with pipeline() as consumer:
+        sent: dict[uuid.UUID, float] = {}
+        processed: dict[uuid.UUID, float] = {}
+        api_latencies: list[float] = []
+        finished = asyncio.Event()
+
+        process = consumer._processor.process
+
+        async def timed_process(session, order_id):
+            await process(session, order_id)
+            processed[order_id] = time.perf_counter()
+            if len(processed) >= orders:
+                finished.set()
+
+        consumer._processor.process = timed_process
+
+        remaining = iter(range(orders))
+        payload = {
+            "customer_id": str(uuid.uuid4()),
+            "items": [{"product_id": str(uuid.uuid4()), "quantity": 2, "price": "99.99"}],
+        }
+
+        async def client_worker(client: AsyncClient):
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.post("/orders/", json=payload)
+                api_latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+                sent[uuid.UUID(response.json()["order_id"])] = started
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(client_worker(client) for _ in range(concurrency)))
+            await asyncio.wait_for(finished.wait(), timeout)
+            elapsed = time.perf_counter() - start
+
+    end_to_end = [processed[order_id] - started for order_id, started in sent.items()]
+    return {
+        "throughput": orders / elapsed,
+        "api_p50": statistics.median(api_latencies),
+        "api_p99": _percentile(api_latencies, 0.99),
+        "e2e_p50": statistics.median(end_to_end),
+        "e2e_p99": _percentile(end_to_end, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+    # consumer.main настраивает INFO при импорте; логи каждого запроса искажают замер
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(os.path.join(directory, "bench.db"))
+        os.environ.setdefault("PROCESSING_LAG_ENABLED", "false")
+
+        from app.core.config import settings
+        from shared.runtime import resolve_profile, run
+
+        result = run(_bench(args.orders, args.concurrency, args.timeout), resolve_profile(settings.runtime_profile))
+
+    print(f"orders       {args.orders:>10,}")
+    print(f"throughput   {result['throughput']:>10,.0f} orders/s")
+    for name in ("api", "e2e"):
+        print(f"{name} latency  p50 {result[name + '_p50'] * 1000:8.2f} ms   p99 {result[name + '_p99'] * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""CPU time and peak allocation per get_order call: ORM read path vs lean rows.
+
+    python -m benchmarks.bench_read_path --orders 500 --calls 5000
+
+Runs against in-memory SQLite, so database time is small and the numbers
+mostly reflect Python-side work: statement construction, compilation
+cache lookups, ORM hydration and serialization.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+from app.api.schemas import OrderItemCreate, OrderResponse
+from app.services.orders import create_order, get_order
+from shared.db.base import Base
+from shared.db.models import Order
+
+
+async def orm_get_order(session, order_id):
+    result = await session.execute(
+        select(Order)
+        .where(Order.id == order_id)
+        .options(selectinload(Order.items))
+    )
+    order = result.scalar_one_or_none()
+    return OrderResponse(
+        order_id=order.id,
+        customer_id=order.customer_id,
+        status=order.status,
+        total_price=order.total_price,
+        total_price_minor=order.total_price_minor,
+        currency=order.currency,
+        items=[
+            {
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price": item.price,
+                "price_minor": item.price_minor,
+            }
+            for item in order.items
+        ],
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+    )
+
+
+async def lean_get_order(session, order_id):
+    order = await get_order(session, order_id)
+    return OrderResponse(
+        order_id=order.id,
+        customer_id=order.customer_id,
+        status=order.status,
+        total_price=order.total_price,
+        total_price_minor=order.total_price_minor,
+        currency=order.currency,
+        items=order.items,
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+    )
+
+
+async def _seed(session_factory, orders: int) -> list[uuid.UUID]:
+    ids = []
+    async with session_factory() as session:
+        for _ in range(orders):
+            order = await create_order(
+                session,
+                uuid.uuid4(),
+                [
+                    OrderItemCreate(product_id=uuid.uuid4(), quantity=index + 1, price=Decimal("9.99"))
+                    for index in range(3)
+                ],
+            )
+            ids.append(order.id)
+    return ids
+
+
+async def _measure(session_factory, read, ids, calls: int) -> dict:
+    async with session_factory() as session:
+        for order_id in ids[:50]:
+            await read(session, order_id)
+
+    # Каждый вызов в свежей сессии, как в обработчике запроса
+    cpu_start = time.process_time()
+    for index in range(calls):
+        async with session_factory() as session:
+            await read(session, ids[index % len(ids)])
+    cpu = time.process_time() - cpu_start
+
+    # Пиковый прирост памяти внутри вызова: сколько аллоцирует сам путь чтения
+    samples = min(calls, 500)
+    peak = 0
+    tracemalloc.start()
+    for index in range(samples):
+        async with session_factory() as session:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await read(session, ids[index % len(ids)])
+            peak += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return {"cpu_us": cpu / calls * 1e6, "peak_bytes": peak / samples}
+
+
+async def main(orders: int, calls: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    ids = await _seed(session_factory, orders)
+    results = {
+        "orm": await _measure(session_factory, orm_get_order, ids, calls),
+        "lean": await _measure(session_factory, lean_get_order, ids, calls),
+    }
+    await engine.dispose()
+
+    baseline = results["orm"]["cpu_us"]
+    for name, result in results.items():
+        print(
+            f"{name:<5} {result['cpu_us']:>8.0f} us/call CPU ({baseline / result['cpu_us']:.2f}x)  "
+            f"{result['peak_bytes']:>9,.0f} B peak allocation/call"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.calls))
@@ -0,0 +1,198 @@
+"""Throughput of the API and consumer under each runtime profile.
+
+    python -m benchmarks.bench_runtime api --seconds 10 --connections 64
+    python -m benchmarks.bench_runtime consumer --messages 200000
+
+Every profile runs in a fresh subprocess so loop policy and GC settings
+don't leak between runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from shared.runtime import PROFILES
+
+REQUEST = b"GET /health HTTP/1.1\r\nHost: bench\r\n\r\n"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        return
+    raise RuntimeError(f"API did not start on port {port}")
+
+
+async def _http_worker(port: int, stop_at: float) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    done = 0
+    try:
+        while time.monotonic() < stop_at:
+            writer.write(REQUEST)
+            await writer.drain()
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in headers.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            done += 1
+    finally:
+        writer.close()
+    return done
+
+
+async def _load(port: int, seconds: float, connections: int) -> float:
+    await _wait_for_port(port)
+    await asyncio.gather(*(_http_worker(port, time.monotonic() + 1) for _ in range(4)))
+
+    start = time.monotonic()
+    counts = await asyncio.gather(
+        *(_http_worker(port, start + seconds) for _ in range(connections))
+    )
+    return sum(counts) / (time.monotonic() - start)
+
+
+def bench_api(profile: str, seconds: float, connections: int) -> float:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        RUNTIME_PROFILE=profile,
+        API_HOST="127.0.0.1",
+        API_PORT=str(port),
+        PROCESSING_LAG_ENABLED="false",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        return asyncio.run(_load(port, seconds, connections))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+class _Process:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Message:
+    redelivered = False
+    timestamp = None
+    headers = {}
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def process(self):
+        return _Process()
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def _consume(messages: int, concurrency: int) -> float:
+    from consumer.messaging import consumer as consumer_module
+
+    class _Processor:
+        async def process(self, session, order_id):
+            await asyncio.sleep(0)
+
+    consumer_module.AsyncSessionLocal = _Session
+    consumer = consumer_module.OrderConsumer()
+    consumer._processor = _Processor()
+    await consumer.set_concurrency(concurrency)
+
+    body = json.dumps({
+        "event_id": "bench",
+        "occurred_at": "2026-01-01T00:00:00+00:00",
+        "payload": {"order_id": "550e8400-e29b-41d4-a716-446655440000"},
+    }).encode()
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(messages):
+        queue.put_nowait(_Message(body))
+
+    async def worker():
+        while not queue.empty():
+            await consumer.handle_message(queue.get_nowait())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return messages / (time.perf_counter() - start)
+
+
+def bench_consumer_inline(profile: str, messages: int, concurrency: int) -> float:
+    from shared.runtime import resolve_profile, run
+
+    return run(_consume(messages, concurrency), resolve_profile(profile))
+
+
+def bench_consumer(profile: str, messages: int, concurrency: int) -> float:
+    output = subprocess.check_output([
+        sys.executable, "-m", "benchmarks.bench_runtime", "consumer-inline",
+        "--profile", profile,
+        "--messages", str(messages),
+        "--concurrency", str(concurrency),
+    ])
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("target", choices=["api", "consumer", "consumer-inline"])
+    parser.add_argument("--profile", choices=sorted(PROFILES))
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.target == "consumer-inline":
+        print(bench_consumer_inline(args.profile, args.messages, args.concurrency))
+        return
+
+    profiles = [args.profile] if args.profile else sorted(PROFILES)
+    results = {}
+    for profile in profiles:
+        if args.target == "api":
+            results[profile] = bench_api(profile, args.seconds, args.connections)
+        else:
+            results[profile] = bench_consumer(profile, args.messages, args.concurrency)
+
+    unit = "req/s" if args.target == "api" else "msg/s"
+    baseline = results.get("default")
+    for profile, rate in results.items():
+        gain = f" ({rate / baseline:.2f}x)" if baseline else ""
+        print(f"{args.target:<9} {profile:<12} {rate:>12,.0f} {unit}{gain}")
+
+
+if __name__ == "__main__":
+    main()
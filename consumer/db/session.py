@@ -1,12 +1,10 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from consumer.core.config import settings
+from shared.db.engine import build_engine
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-)
+engine = build_engine(settings, "consumer")
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
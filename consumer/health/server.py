@@ -0,0 +1,45 @@
+import uvicorn
+from fastapi import FastAPI, Response, status
+from prometheus_client import make_asgi_app
+
+from consumer.core.config import settings
+from shared.debug import create_debug_router
+
+
+def create_health_app(consumer) -> FastAPI:
+    app = FastAPI(title="Order Consumer Health")
+    app.mount("/metrics", make_asgi_app())
+    if settings.debug_endpoints_enabled:
+        app.include_router(
+            create_debug_router(settings.debug_token, settings.debug_profile_max_seconds, "consumer"),
+            prefix="/debug",
+        )
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/ready")
+    async def ready(response: Response):
+        if not consumer.is_ready:
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+            return {"status": "not ready"}
+        return {"status": "ready"}
+
+    return app
+
+
+class HealthServer(uvicorn.Server):
+    # Сигналы обрабатывает consumer/main.py: иначе uvicorn перехватит SIGTERM и остановит только себя
+    def install_signal_handlers(self) -> None:
+        pass
+
+
+def health_server(consumer) -> HealthServer:
+    config = uvicorn.Config(
+        create_health_app(consumer),
+        host=settings.health_host,
+        port=settings.health_port,
+        log_level="warning",
+    )
+    return HealthServer(config)
@@ -1,18 +1,77 @@
 import asyncio
 import logging
+import signal
+from datetime import timedelta
 
+from consumer.core.config import settings
+from consumer.db.session import AsyncSessionLocal
+from consumer.health.server import health_server
+from consumer.messaging.concurrency import AdaptiveConcurrencyController
 from consumer.messaging.consumer import OrderConsumer
+from consumer.services.sweeper import StuckOrderSweeper
+from shared.runtime import freeze_after_startup, resolve_profile, run
+from shared.tracing import configure_tracing
 
 logging.basicConfig(level=logging.INFO)
 
 
+def background_tasks(consumer: OrderConsumer) -> list:
+    tasks = [consumer.poll_queue_depth()]
+    if settings.adaptive_concurrency_enabled:
+        tasks.append(AdaptiveConcurrencyController(consumer).run())
+    if settings.sweeper_enabled:
+        sweeper = StuckOrderSweeper(
+            AsyncSessionLocal,
+            consumer.publish_order_created,
+            timedelta(seconds=settings.sweeper_stuck_after_seconds),
+            settings.sweeper_batch_size,
+            settings.sweeper_max_rate,
+            queue_depth=lambda: consumer.queue_depth,
+            max_queue_depth=settings.sweeper_max_queue_depth,
+            max_attempts=settings.sweeper_max_attempts,
+        )
+        tasks.append(sweeper.run(settings.sweeper_interval))
+    return tasks
+
+
+async def shutdown(consumer: OrderConsumer, tasks: list[asyncio.Task]):
+    # Сначала перестаём брать сообщения и дожидаемся начатых, потом гасим фоновые задачи
+    await consumer.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def main():
+    configure_tracing("consumer", settings)
     consumer = OrderConsumer()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    health = health_server(consumer)
+    health_task = asyncio.create_task(health.serve())
     await consumer.start()
+    freeze_after_startup(resolve_profile(settings.runtime_profile))
+
+    # consumer живёт до SIGTERM/SIGINT или до падения одной из фоновых задач
+    tasks = [asyncio.create_task(task) for task in background_tasks(consumer)]
+    stop = asyncio.create_task(stopping.wait())
+    try:
+        done, _ = await asyncio.wait([stop, health_task, *tasks], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stop.cancel()
+        health.should_exit = True
+        await shutdown(consumer, tasks)
+        await asyncio.gather(health_task, return_exceptions=True)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
 
-    # consumer живёт вечно
-    await asyncio.Future()
+    for task in done - {stop}:
+        task.result()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main(), resolve_profile(settings.runtime_profile))
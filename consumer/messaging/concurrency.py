@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import math
+
+from consumer.core.config import settings
+from consumer.metrics.prometheus import CONCURRENCY_ADJUSTMENTS, CONCURRENCY_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+class AdjustableLimiter:
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._active = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def set_limit(self, limit: int):
+        async with self._condition:
+            self._limit = limit
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+
+class HandlerStats:
+    def __init__(self):
+        self._db_latencies: list[float] = []
+        self._total = 0
+        self._errors = 0
+
+    def record(self, db_latency: float | None, ok: bool):
+        if db_latency is not None:
+            self._db_latencies.append(db_latency)
+        self._total += 1
+        if not ok:
+            self._errors += 1
+
+    def drain(self) -> tuple[list[float], int, int]:
+        window = (self._db_latencies, self._total, self._errors)
+        self._db_latencies = []
+        self._total = 0
+        self._errors = 0
+        return window
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)
+    return ordered[max(index, 0)]
+
+
+class AdaptiveConcurrencyController:
+    def __init__(
+        self,
+        consumer,
+        min_limit: int = settings.min_concurrency,
+        max_limit: int = settings.max_concurrency,
+        target_db_latency: float = settings.target_db_latency,
+        max_error_rate: float = settings.max_error_rate,
+        increase_step: int = settings.concurrency_increase_step,
+        decrease_factor: float = settings.concurrency_decrease_factor,
+    ):
+        self._consumer = consumer
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._target_db_latency = target_db_latency
+        self._max_error_rate = max_error_rate
+        self._increase_step = increase_step
+        self._decrease_factor = decrease_factor
+
+    def decide(self, limit: int, db_latencies: list[float], total: int, errors: int, queue_depth: int | None) -> tuple[int, str | None]:
+        if total and errors / total > self._max_error_rate:
+            return max(self._min_limit, math.floor(limit * self._decrease_factor)), "errors"
+
+        if db_latencies and _percentile(db_latencies, 0.9) > self._target_db_latency:
+            return max(self._min_limit, math.floor(limit * self._decrease_factor)), "db_latency"
+
+        if queue_depth:
+            return min(self._max_limit, limit + self._increase_step), "backlog"
+
+        return limit, None
+
+    async def tick(self) -> int:
+        limit = self._consumer.concurrency
+        db_latencies, total, errors = self._consumer.stats.drain()
+        new_limit, reason = self.decide(
+            limit, db_latencies, total, errors, self._consumer.queue_depth
+        )
+        new_limit = min(self._max_limit, max(self._min_limit, new_limit))
+
+        if new_limit != limit:
+            direction = "up" if new_limit > limit else "down"
+            await self._consumer.set_concurrency(new_limit)
+            CONCURRENCY_ADJUSTMENTS.labels(direction, reason).inc()
+            logger.info(
+                "Concurrency %s %d -> %d (reason=%s, messages=%d, errors=%d, queue_depth=%s)",
+                direction, limit, new_limit, reason, total, errors, self._consumer.queue_depth,
+            )
+
+        CONCURRENCY_LIMIT.set(new_limit)
+        return new_limit
+
+    async def run(self, interval: float = settings.concurrency_control_interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Concurrency controller tick failed")
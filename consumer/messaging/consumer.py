@@ -1,41 +1,178 @@
+import asyncio
 import json
+import logging
+import time
+from datetime import datetime, timezone
 from uuid import UUID
 
-import aio_pika
 from aio_pika.abc import AbstractIncomingMessage
 
 from consumer.core.config import settings
 from consumer.db.session import AsyncSessionLocal
+from consumer.messaging.concurrency import AdjustableLimiter, HandlerStats
+from consumer.metrics.prometheus import (
+    BATCH_SIZE,
+    BROKER_DWELL,
+    CONCURRENCY_LIMIT,
+    DB_LATENCY,
+    EVENT_AGE,
+    HANDLER_LATENCY,
+    IN_FLIGHT,
+    MESSAGES_ACKED,
+    MESSAGES_RECEIVED,
+    MESSAGES_REJECTED,
+    MESSAGES_RETRIED,
+    QUEUE_DEPTH,
+)
 from consumer.services.order_processor import OrderProcessor
+from consumer.services.pipeline import load_pipeline
+from shared.clock import as_utc
+from shared.db.statements import statement_source
+from shared.messaging.events import ORDER_CREATED, order_created_message
+from shared.messaging.transport import create_transport
+from shared.tracing import extract, tracer
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "order-processing"
+
+
+def observe_event_lag(payload: dict, message: AbstractIncomingMessage) -> None:
+    now = datetime.now(timezone.utc)
+
+    occurred_at = payload.get("occurred_at")
+    if occurred_at:
+        try:
+            occurred = as_utc(datetime.fromisoformat(occurred_at))
+        except ValueError:
+            logger.warning("Invalid occurred_at in event: %r", occurred_at)
+        else:
+            EVENT_AGE.observe(max((now - occurred).total_seconds(), 0.0))
+
+    if isinstance(message.timestamp, datetime):
+        published = as_utc(message.timestamp)
+        BROKER_DWELL.observe(max((now - published).total_seconds(), 0.0))
 
 
 class OrderConsumer:
     def __init__(self):
-        self._processor = OrderProcessor()
+        self._processor = OrderProcessor(
+            load_pipeline(settings.pipeline_factory), settings.customer_stats_enabled
+        )
+        self._transport = create_transport(settings.rabbitmq_url)
+        self._consuming = False
+        self._handlers: set[asyncio.Task] = set()
+        self._limiter = AdjustableLimiter(settings.prefetch_count)
+        self.stats = HandlerStats()
+        self.queue_depth: int | None = None
+
+    @property
+    def concurrency(self) -> int:
+        return self._limiter.limit
+
+    async def set_concurrency(self, limit: int):
+        await self._limiter.set_limit(limit)
+        await self._transport.set_prefetch(limit)
+        BATCH_SIZE.set(limit)
+        CONCURRENCY_LIMIT.set(limit)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._consuming and self._transport.is_open
 
     async def start(self):
-        connection = await aio_pika.connect_robust(
-            settings.rabbitmq_url
-        )
-        channel = await connection.channel()
+        await self._transport.connect(prefetch=self.concurrency)
+        BATCH_SIZE.set(self.concurrency)
+        CONCURRENCY_LIMIT.set(self.concurrency)
 
-        exchange = await channel.declare_exchange(
-            "orders", aio_pika.ExchangeType.TOPIC
-        )
+        await self._transport.consume(QUEUE_NAME, ORDER_CREATED, self.handle_message)
+        self._consuming = True
 
-        queue = await channel.declare_queue(
-            "order-processing",
-            durable=True,
-        )
+    async def close(self, timeout: float | None = None):
+        self._consuming = False
+        # Закрытый канал не примет ack начатых сообщений, и брокер доставит их повторно:
+        # сначала отписываемся от очереди, потом ждём обработчики, и только затем закрываем соединение и пулы
+        await self._transport.cancel()
+        if self._handlers:
+            timeout = settings.shutdown_timeout if timeout is None else timeout
+            _, pending = await asyncio.wait(set(self._handlers), timeout=timeout)
+            if pending:
+                logger.warning("%d message handlers still running after %.0fs, closing anyway", len(pending), timeout)
+        await self._transport.close()
+        self._processor.close()
+
+    async def publish_order_created(self, order_id: UUID, total_price_minor: int, currency: str):
+        with tracer.start_span(f"{ORDER_CREATED} publish", kind="producer", attributes={"order.id": str(order_id)}):
+            await self._transport.publish(
+                order_created_message(order_id, total_price_minor, currency),
+                ORDER_CREATED,
+            )
 
-        await queue.bind(exchange, routing_key="order.created")
+    async def poll_queue_depth(self, interval: float | None = None):
+        interval = interval or settings.queue_depth_poll_interval
+        while True:
+            await asyncio.sleep(interval)
+            await self.update_queue_depth()
 
-        await queue.consume(self.handle_message)
+    async def update_queue_depth(self):
+        if not self.is_ready:
+            return
+        try:
+            self.queue_depth = await self._transport.queue_depth(QUEUE_NAME)
+        except Exception:
+            logger.warning("Failed to read depth of queue %s", QUEUE_NAME, exc_info=True)
+            return
+        QUEUE_DEPTH.labels(QUEUE_NAME).set(self.queue_depth)
 
     async def handle_message(self, message: AbstractIncomingMessage):
-        async with message.process():
-            payload = json.loads(message.body)
-            order_id = UUID(payload["payload"]["order_id"])
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            await self._handle_message(message)
+        finally:
+            self._handlers.discard(task)
+
+    async def _handle_message(self, message: AbstractIncomingMessage):
+        MESSAGES_RECEIVED.inc()
+        if message.redelivered:
+            MESSAGES_RETRIED.inc()
+
+        # Спан consumer'а — потомок publish-спана API: так видно, сколько сообщение провело в брокере
+        with tracer.start_span(
+            f"{ORDER_CREATED} process",
+            kind="consumer",
+            parent=extract(message.headers),
+            attributes={"messaging.redelivered": bool(message.redelivered)},
+        ) as span:
+            async with self._limiter:
+                IN_FLIGHT.inc()
+                start = time.perf_counter()
+                db_latency = None
+                try:
+                    async with message.process():
+                        with tracer.start_span("decode"):
+                            payload = json.loads(message.body)
+                            observe_event_lag(payload, message)
+                            order_id = UUID(payload["payload"]["order_id"])
+                        span.set_attribute("order.id", str(order_id))
 
-            async with AsyncSessionLocal() as session:
-                await self._processor.process(session, order_id)
+                        db_start = time.perf_counter()
+                        source = statement_source.set(payload.get("event_type", ORDER_CREATED))
+                        try:
+                            with tracer.start_span("db"):
+                                async with AsyncSessionLocal() as session:
+                                    await self._processor.process(session, order_id)
+                        finally:
+                            statement_source.reset(source)
+                            db_latency = time.perf_counter() - db_start
+                            DB_LATENCY.observe(db_latency)
+                except Exception:
+                    MESSAGES_REJECTED.inc()
+                    self.stats.record(db_latency, ok=False)
+                    raise
+                else:
+                    MESSAGES_ACKED.inc()
+                    self.stats.record(db_latency, ok=True)
+                finally:
+                    IN_FLIGHT.dec()
+                    HANDLER_LATENCY.observe(time.perf_counter() - start)
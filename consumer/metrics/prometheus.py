@@ -0,0 +1,110 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+MESSAGES_RECEIVED = Counter(
+    "consumer_messages_received_total",
+    "Total messages delivered to the consumer",
+)
+
+MESSAGES_ACKED = Counter(
+    "consumer_messages_acked_total",
+    "Total messages acknowledged after successful processing",
+)
+
+MESSAGES_REJECTED = Counter(
+    "consumer_messages_rejected_total",
+    "Total messages rejected because processing failed",
+)
+
+MESSAGES_RETRIED = Counter(
+    "consumer_messages_retried_total",
+    "Total redelivered messages",
+)
+
+HANDLER_LATENCY = Histogram(
+    "consumer_handler_duration_seconds",
+    "Message handler latency",
+)
+
+DB_LATENCY = Histogram(
+    "consumer_db_duration_seconds",
+    "Database work latency per message",
+)
+
+IN_FLIGHT = Gauge(
+    "consumer_messages_in_flight",
+    "Messages currently being handled",
+)
+
+BATCH_SIZE = Gauge(
+    "consumer_batch_size",
+    "Messages the broker may deliver ahead of acknowledgement (prefetch)",
+)
+
+QUEUE_DEPTH = Gauge(
+    "consumer_queue_depth",
+    "Messages waiting in the queue",
+    ["queue"],
+)
+
+LAG_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+EVENT_AGE = Histogram(
+    "consumer_event_age_seconds",
+    "Time from event occurred_at to the start of handling",
+    buckets=LAG_BUCKETS,
+)
+
+BROKER_DWELL = Histogram(
+    "consumer_broker_dwell_seconds",
+    "Time from AMQP publish timestamp to delivery (1s resolution)",
+    buckets=LAG_BUCKETS,
+)
+
+CONCURRENCY_LIMIT = Gauge(
+    "consumer_concurrency_limit",
+    "Current worker concurrency limit",
+)
+
+CONCURRENCY_ADJUSTMENTS = Counter(
+    "consumer_concurrency_adjustments_total",
+    "Adaptive concurrency limit changes",
+    ["direction", "reason"],
+)
+
+STAGE_LATENCY = Histogram(
+    "consumer_stage_duration_seconds",
+    "Order processing pipeline stage latency",
+    ["stage", "executor"],
+)
+
+STAGE_FAILURES = Counter(
+    "consumer_stage_failures_total",
+    "Order processing pipeline stage failures",
+    ["stage", "reason"],
+)
+
+SWEEPER_RUNS = Counter(
+    "consumer_sweeper_runs_total",
+    "Stuck-order sweeps by outcome",
+    ["result"],
+)
+
+SWEEPER_ORDERS_SWEPT = Counter(
+    "consumer_sweeper_orders_swept_total",
+    "Orders found stuck in NEW longer than the threshold and republished",
+)
+
+SWEEPER_ORDERS_REPUBLISHED = Counter(
+    "consumer_sweeper_orders_republished_total",
+    "order.created events republished for stuck orders",
+)
+
+SWEEPER_PUBLISH_FAILURES = Counter(
+    "consumer_sweeper_publish_failures_total",
+    "Stuck orders whose order.created republish failed",
+)
+
+SWEEPER_ORDERS_ABANDONED = Counter(
+    "consumer_sweeper_orders_abandoned_total",
+    "Stuck orders republished the maximum number of times and left in NEW",
+)
@@ -0,0 +1,42 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from shared.db.models import CustomerOrderStats
+
+INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+def increment_statement(
+    dialect: str,
+    customer_id: UUID,
+    currency: str,
+    total_price_minor: int,
+    ordered_at: datetime | None,
+):
+    # Выполняется в транзакции перевода заказа в PROCESSED: агрегат и статус фиксируются вместе
+    table = CustomerOrderStats.__table__
+    statement = INSERTS[dialect](table).values(
+        customer_id=customer_id,
+        currency=currency,
+        order_count=1,
+        total_spent_minor=total_price_minor,
+        last_order_at=ordered_at,
+    )
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.customer_id, table.c.currency],
+        set_={
+            "order_count": table.c.order_count + excluded.order_count,
+            "total_spent_minor": table.c.total_spent_minor + excluded.total_spent_minor,
+            "last_order_at": case(
+                (table.c.last_order_at.is_(None), excluded.last_order_at),
+                (excluded.last_order_at > table.c.last_order_at, excluded.last_order_at),
+                else_=table.c.last_order_at,
+            ),
+            "updated_at": func.now(),
+        },
+    )
@@ -1,21 +1,67 @@
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, select, update
 
-from shared.db.models import Order
+from consumer.services.customer_stats import increment_statement
+from consumer.services.pipeline import Pipeline
+from shared.db.models import IS_UNPROCESSED, Order, OrderStatus
+from shared.tracing import tracer
+
+
+ORDER_BY_ID = select(Order).where(Order.id == bindparam("order_id"))
+
+# Переход NEW -> PROCESSED условным UPDATE: из двух одновременных доставок строку получит
+# только одна, а повторная доставка обработанного заказа ничего не меняет.
+# processed_at, как и created_at, берём по часам БД, а не хоста consumer'а
+MARK_PROCESSED = (
+    update(Order)
+    .where(Order.id == bindparam("order_id"), IS_UNPROCESSED)
+    .values(status=OrderStatus.PROCESSED, processed_at=func.now())
+    .returning(Order.customer_id, Order.currency, Order.total_price_minor, Order.created_at)
+    .execution_options(synchronize_session="fetch")
+)
+
+
+def order_context(order: Order) -> dict:
+    return {
+        "order_id": str(order.id),
+        "customer_id": str(order.customer_id),
+        "status": str(order.status),
+        "total_price_minor": order.total_price_minor,
+        "currency": order.currency,
+    }
 
 
 class OrderProcessor:
+    def __init__(self, pipeline: Pipeline | None = None, customer_stats: bool = False):
+        self._pipeline = pipeline
+        self._customer_stats = customer_stats
+
     async def process(self, session: AsyncSession, order_id: UUID) -> None:
-        result = await session.execute(
-            select(Order).where(Order.id == order_id)
-        )
+        result = await session.execute(ORDER_BY_ID, {"order_id": order_id})
         order = result.scalar_one_or_none()
 
         if not order:
             raise ValueError(f"Order {order_id} not found")
+        # Повторная доставка или переотправка sweeper'ом: стадии с побочными эффектами не перезапускаем
+        if order.status == OrderStatus.PROCESSED:
+            return
+
+        if self._pipeline is not None:
+            context = order_context(order)
+            # Стадии могут идти долго (пул процессов): на это время отдаём соединение в пул,
+            # а статус потом меняем отдельной короткой транзакцией
+            await session.commit()
+            await self._pipeline.run(context)
 
-        # Имитируем обработку заказа
-        order.status = "PROCESSED"
+        with tracer.start_span("commit"):
+            claimed = (await session.execute(
+                MARK_PROCESSED, {"order_id": order_id}
+            )).one_or_none()
+            if claimed is not None and self._customer_stats:
+                await session.execute(increment_statement(session.bind.dialect.name, *claimed))
+            await session.commit()
 
-        await session.commit()
+    def close(self):
+        if self._pipeline is not None:
+            self._pipeline.close()
@@ -0,0 +1,163 @@
+import asyncio
+import importlib
+import inspect
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable
+
+from consumer.metrics.prometheus import STAGE_FAILURES, STAGE_LATENCY
+
+EXECUTORS = ("async", "thread", "process")
+
+
+class PipelineError(Exception):
+    pass
+
+
+class StageError(PipelineError):
+    def __init__(self, stage: str, cause: BaseException):
+        super().__init__(f"Stage {stage} failed: {cause!r}")
+        self.stage = stage
+        self.cause = cause
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: Callable[[dict, dict], Any]
+    depends_on: tuple[str, ...] = ()
+    executor: str = "async"
+    timeout: float | None = None
+
+    def __post_init__(self):
+        if self.executor not in EXECUTORS:
+            raise PipelineError(f"Stage {self.name}: unknown executor {self.executor!r}")
+        if self.executor == "async" and not inspect.iscoroutinefunction(self.func):
+            raise PipelineError(f"Stage {self.name}: async stages must be coroutine functions")
+
+
+def _topological_order(stages: list[Stage]) -> list[Stage]:
+    by_name = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise PipelineError(f"Duplicate stage {stage.name}")
+        by_name[stage.name] = stage
+
+    for stage in stages:
+        for dependency in stage.depends_on:
+            if dependency not in by_name:
+                raise PipelineError(f"Stage {stage.name} depends on unknown stage {dependency}")
+
+    ordered = []
+    state = {}
+
+    def visit(stage: Stage):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise PipelineError(f"Dependency cycle through stage {stage.name}")
+        state[stage.name] = "visiting"
+        for dependency in stage.depends_on:
+            visit(by_name[dependency])
+        state[stage.name] = "done"
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+class Pipeline:
+    def __init__(
+        self,
+        stages: list[Stage],
+        thread_workers: int | None = None,
+        process_workers: int | None = None,
+    ):
+        self._stages = _topological_order(list(stages))
+        self._thread_workers = thread_workers
+        self._process_workers = process_workers
+        self._thread_pool: Executor | None = None
+        self._process_pool: Executor | None = None
+
+    @property
+    def stages(self) -> list[Stage]:
+        return list(self._stages)
+
+    def _executor(self, kind: str) -> Executor:
+        if kind == "thread":
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self._thread_workers, thread_name_prefix="pipeline"
+                )
+            return self._thread_pool
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self._process_workers)
+        return self._process_pool
+
+    async def _call(self, stage: Stage, context: dict, inputs: dict) -> Any:
+        if stage.executor == "async":
+            return await stage.func(context, inputs)
+        # Задачи в пулах нельзя прервать: по таймауту мы только перестаём их ждать
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor(stage.executor), partial(stage.func, context, inputs)
+        )
+
+    async def _run_stage(self, stage: Stage, context: dict, tasks: dict) -> Any:
+        inputs = {}
+        for dependency in stage.depends_on:
+            inputs[dependency] = await tasks[dependency]
+
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                self._call(stage, context, inputs), timeout=stage.timeout
+            )
+        except asyncio.TimeoutError as exc:
+            STAGE_FAILURES.labels(stage.name, "timeout").inc()
+            raise StageError(stage.name, exc) from exc
+        except StageError:
+            raise
+        except Exception as exc:
+            STAGE_FAILURES.labels(stage.name, "error").inc()
+            raise StageError(stage.name, exc) from exc
+        finally:
+            STAGE_LATENCY.labels(stage.name, stage.executor).observe(
+                time.perf_counter() - start
+            )
+
+    async def run(self, context: dict) -> dict[str, Any]:
+        tasks: dict[str, asyncio.Task] = {}
+        for stage in self._stages:
+            tasks[stage.name] = asyncio.create_task(
+                self._run_stage(stage, context, tasks)
+            )
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
+
+    def close(self):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+
+def load_pipeline(path: str) -> Pipeline | None:
+    if not path:
+        return None
+    module_name, _, attr = path.partition(":")
+    factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy import bindparam, or_, select, tuple_, update
+
+from consumer.metrics.prometheus import (
+    SWEEPER_ORDERS_ABANDONED,
+    SWEEPER_ORDERS_REPUBLISHED,
+    SWEEPER_ORDERS_SWEPT,
+    SWEEPER_PUBLISH_FAILURES,
+    SWEEPER_RUNS,
+)
+from shared.clock import as_utc
+from shared.db.leases import acquire_lease, release_lease
+from shared.db.models import IS_UNPROCESSED, Order
+
+logger = logging.getLogger(__name__)
+
+# Аренда в таблице leases: во всём кластере consumer'ов одновременно работает один sweeper
+LEASE_NAME = "stuck-order-sweeper"
+LEASE_TTL = timedelta(minutes=2)
+
+Publish = Callable[[UUID, int, str], Awaitable[None]]
+
+
+def stuck_orders_query(batch_size: int, after: bool):
+    # Постранично по (created_at, id) через частичный индекс ix_orders_unprocessed_created_at
+    query = (
+        select(
+            Order.id, Order.created_at, Order.total_price_minor, Order.currency,
+            Order.republish_attempts, Order.last_republished_at,
+        )
+        .where(
+            IS_UNPROCESSED,
+            Order.created_at < bindparam("cutoff"),
+            Order.republish_attempts < bindparam("max_attempts"),
+            or_(Order.last_republished_at.is_(None), Order.last_republished_at <= bindparam("cutoff")),
+        )
+        .order_by(Order.created_at, Order.id)
+        .limit(batch_size)
+    )
+    if after:
+        query = query.where(tuple_(Order.created_at, Order.id) > tuple_(
+            bindparam("after_created_at", type_=Order.created_at.type),
+            bindparam("after_id", type_=Order.id.type),
+        ))
+    return query
+
+
+MARK_REPUBLISHED = (
+    update(Order)
+    .where(Order.id.in_(bindparam("ids", expanding=True)), IS_UNPROCESSED)
+    .values(republish_attempts=Order.republish_attempts + 1, last_republished_at=bindparam("now"))
+    .execution_options(synchronize_session=False)
+)
+
+
+class StuckOrderSweeper:
+    def __init__(
+        self,
+        session_factory,
+        publish: Publish,
+        stuck_after: timedelta,
+        batch_size: int = 100,
+        max_rate: float = 200.0,
+        queue_depth: Callable[[], int | None] | None = None,
+        max_queue_depth: int = 1000,
+        max_attempts: int = 5,
+    ):
+        self._session_factory = session_factory
+        self._publish = publish
+        self._stuck_after = stuck_after
+        self._batch_size = batch_size
+        self._max_rate = max_rate
+        self._queue_depth = queue_depth
+        self._max_queue_depth = max_queue_depth
+        self._max_attempts = max_attempts
+        self._first_page = stuck_orders_query(batch_size, after=False)
+        self._next_page = stuck_orders_query(batch_size, after=True)
+
+    def _due(self, row, now: datetime) -> bool:
+        if row.last_republished_at is None:
+            return True
+        # Пауза между повторами растёт вдвое: медленный, но живой заказ не получит пачку дублей
+        backoff = self._stuck_after * 2 ** (row.republish_attempts - 1)
+        return as_utc(row.last_republished_at) + backoff <= now
+
+    async def _republish(self, rows) -> list:
+        results = await asyncio.gather(
+            *(self._publish(row.id, row.total_price_minor, row.currency) for row in rows),
+            return_exceptions=True,
+        )
+        published = []
+        for row, result in zip(rows, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to republish order.created for %s: %r", row.id, result)
+            else:
+                published.append(row)
+        SWEEPER_PUBLISH_FAILURES.inc(len(rows) - len(published))
+        SWEEPER_ORDERS_REPUBLISHED.inc(len(published))
+        return published
+
+    def _report_abandoned(self, published: list):
+        abandoned = [row.id for row in published if row.republish_attempts + 1 >= self._max_attempts]
+        if abandoned:
+            # Больше sweeper их не тронет: заказы остаются в NEW до ручного разбора
+            SWEEPER_ORDERS_ABANDONED.inc(len(abandoned))
+            logger.error(
+                "Giving up on %d orders stuck in NEW after %d republishes: %s",
+                len(abandoned), self._max_attempts, [str(order_id) for order_id in abandoned],
+            )
+
+    async def _renew(self, session) -> bool:
+        return await acquire_lease(session, LEASE_NAME, LEASE_TTL, datetime.now(timezone.utc))
+
+    async def sweep_once(self, now: datetime | None = None) -> int:
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - self._stuck_after
+
+        async with self._session_factory() as session:
+            locked = await self._renew(session)
+            await session.commit()
+        if not locked:
+            SWEEPER_RUNS.labels("locked").inc()
+            return 0
+
+        republished = 0
+        try:
+            params = {"cutoff": cutoff, "max_attempts": self._max_attempts}
+            query = self._first_page
+            while True:
+                # Короткие транзакции на страницу: между страницами и во время пауз
+                # соединение не висит idle in transaction
+                async with self._session_factory() as session:
+                    rows = (await session.execute(query, params)).all()
+                if not rows:
+                    break
+
+                started = time.perf_counter()
+                due = [row for row in rows if self._due(row, now)]
+                published = await self._republish(due)
+                # Строки, которым по backoff ещё рано, и неудачные публикации не считаем
+                SWEEPER_ORDERS_SWEPT.inc(len(published))
+                async with self._session_factory() as session:
+                    if published:
+                        await session.execute(MARK_REPUBLISHED, {"ids": [row.id for row in published], "now": now})
+                    locked = await self._renew(session)
+                    await session.commit()
+                republished += len(published)
+                self._report_abandoned(published)
+
+                if not locked:
+                    logger.warning("Stuck order sweeper lost its lease, stopping this sweep")
+                    break
+                if len(rows) < self._batch_size:
+                    break
+
+                params = {**params, "after_created_at": rows[-1].created_at, "after_id": rows[-1].id}
+                query = self._next_page
+                # Не больше max_rate сообщений в секунду, чтобы не завалить брокер и consumer'ов
+                await asyncio.sleep(max(0.0, len(due) / self._max_rate - (time.perf_counter() - started)))
+        finally:
+            async with self._session_factory() as session:
+                await release_lease(session, LEASE_NAME, datetime.now(timezone.utc))
+                await session.commit()
+
+        if republished:
+            logger.warning("Republished order.created for %d orders stuck in NEW since before %s", republished, cutoff)
+        SWEEPER_RUNS.labels("completed").inc()
+        return republished
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            depth = self._queue_depth() if self._queue_depth is not None else None
+            if depth is not None and depth > self._max_queue_depth:
+                # Пока очередь не разобрана, "зависшие" заказы скорее всего просто ждут в ней
+                SWEEPER_RUNS.labels("skipped").inc()
+                continue
+            try:
+                await self.sweep_once()
+            except Exception:
+                SWEEPER_RUNS.labels("failed").inc()
+                logger.exception("Stuck order sweep failed, will retry")
@@ -0,0 +1,8 @@
+from datetime import datetime, timezone
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite возвращает naive datetime; всё время в БД и в событиях — UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
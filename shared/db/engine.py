@@ -0,0 +1,103 @@
+import time
+import uuid
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from shared.db.metrics import (
+    POOL_CHECKED_OUT,
+    POOL_CHECKOUT_WAIT,
+    POOL_OVERFLOW,
+    POOL_SIZE,
+)
+from shared.db.statements import instrument_statements
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    metrics_label = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.metrics_label).observe(
+                time.perf_counter() - start
+            )
+
+
+@lru_cache(maxsize=None)
+def instrumented_pool_class(label: str) -> type[InstrumentedQueuePool]:
+    # Pool.recreate() создаёт пул через self.__class__, поэтому метка живёт в классе
+    return type(f"InstrumentedQueuePool_{label}", (InstrumentedQueuePool,), {"metrics_label": label})
+
+
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def engine_options(settings, label: str) -> dict:
+    url = make_url(settings.database_url)
+    if url.get_backend_name() != "postgresql":
+        return {}
+
+    options = {
+        "poolclass": instrumented_pool_class(label),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+    if settings.db_pgbouncer_mode:
+        # PgBouncer в transaction mode не сохраняет prepared statements между транзакциями
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name,
+        }
+    else:
+        options["connect_args"] = {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+
+    return options
+
+
+def instrument_pool(engine: AsyncEngine, label: str) -> None:
+    pool = engine.sync_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return
+
+    POOL_SIZE.labels(label).set(pool.size())
+
+    checked_out = POOL_CHECKED_OUT.labels(label)
+    overflow = POOL_OVERFLOW.labels(label)
+
+    # checkin вызывается до возврата соединения в очередь, поэтому считаем сами
+    def on_checkout(*args):
+        checked_out.inc()
+        overflow.set(max(engine.sync_engine.pool.overflow(), 0))
+
+    def on_checkin(*args):
+        checked_out.dec()
+        overflow.set(max(engine.sync_engine.pool.overflow(), 0))
+
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    event.listen(engine.sync_engine, "checkin", on_checkin)
+
+
+def build_engine(settings, label: str) -> AsyncEngine:
+    engine = create_async_engine(
+        settings.database_url,
+        echo=False,
+        **engine_options(settings, label),
+    )
+    instrument_pool(engine, label)
+    instrument_statements(engine, label, settings.db_slow_query_seconds, settings.db_slow_query_sample_rate)
+    return engine
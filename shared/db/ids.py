@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+
+
+def _random_counter() -> int:
+    # Старший бит оставляем нулевым, чтобы счётчику было куда расти внутри миллисекунды
+    return int.from_bytes(os.urandom(2), "big") & 0x7FF
+
+
+def uuid7() -> uuid.UUID:
+    global _last_ms, _counter
+
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = _random_counter()
+        else:
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                _last_ms += 1
+                _counter = _random_counter()
+        timestamp_ms = _last_ms
+        counter = _counter
+
+    return _pack(timestamp_ms, counter)
+
+
+def uuid7_at(moment: datetime) -> uuid.UUID:
+    # Для исторических данных: id попадает в партицию своего месяца, но без монотонности
+    timestamp_ms = int(moment.timestamp() * 1000)
+    return _pack(timestamp_ms, int.from_bytes(os.urandom(2), "big") & _COUNTER_MAX)
+
+
+def _pack(timestamp_ms: int, counter: int) -> uuid.UUID:
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (
+        (timestamp_ms & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | rand_b
+    )
+    return uuid.UUID(int=value)
+
+
+def uuid7_timestamp(value: uuid.UUID) -> datetime:
+    if value.version != 7:
+        raise ValueError(f"{value} is not a UUIDv7")
+    return datetime.fromtimestamp((value.int >> 80) / 1000, tz=timezone.utc)
+
+
+def uuid7_lower_bound(moment: datetime) -> uuid.UUID:
+    # Меньше любого UUIDv7 с этой или более поздней меткой: границы партиций по id
+    timestamp_ms = int(moment.timestamp() * 1000)
+    return uuid.UUID(int=(timestamp_ms & ((1 << 48) - 1)) << 80)
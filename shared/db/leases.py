@@ -0,0 +1,43 @@
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from shared.db.models import Lease
+
+# Несколько воркеров на одном хосте — разные держатели
+HOLDER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def acquire_lease(session, name: str, ttl: timedelta, now: datetime, holder: str = HOLDER) -> bool:
+    # Захват и продление — одно условное UPDATE; в отличие от session-level advisory lock,
+    # аренда не привязана к соединению и работает через pgbouncer в transaction mode.
+    # Фиксирует транзакцию вызывающий
+    result = await session.execute(
+        update(Lease)
+        .where(Lease.name == name, or_(Lease.holder == holder, Lease.expires_at < now))
+        .values(holder=holder, expires_at=now + ttl)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        return True
+    if await session.scalar(select(Lease.name).where(Lease.name == name)) is not None:
+        return False
+    try:
+        await session.execute(insert(Lease).values(name=name, holder=holder, expires_at=now + ttl))
+    except IntegrityError:
+        # Строку одновременно с нами создал другой процесс
+        await session.rollback()
+        return False
+    return True
+
+
+async def release_lease(session, name: str, now: datetime, holder: str = HOLDER) -> None:
+    await session.execute(
+        update(Lease)
+        .where(Lease.name == name, Lease.holder == holder)
+        .values(expires_at=now)
+        .execution_options(synchronize_session=False)
+    )
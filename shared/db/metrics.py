@@ -0,0 +1,42 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured connection pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time by normalized fingerprint",
+    ["pool", "operation", "fingerprint"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+SLOW_STATEMENTS = Counter(
+    "db_slow_statements_total",
+    "SQL statements slower than the slow-query threshold",
+    ["pool", "fingerprint"],
+)
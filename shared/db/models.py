@@ -1,26 +1,67 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, String, Integer, Numeric
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index, SmallInteger, String, Integer, bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from sqlalchemy.sql import func
 from sqlalchemy.types import DateTime
 
 from shared.db.base import Base
+from shared.db.ids import uuid7
+from shared.db.status import STATUS_CODES, OrderStatus, StatusCode, check_transition
+from shared.money import DEFAULT_CURRENCY, from_minor, to_minor
+
+
+def money_property(minor_attribute: str) -> property:
+    # Decimal-представление поверх целых минорных единиц; в БД хранится только BIGINT
+    def getter(self):
+        amount_minor = getattr(self, minor_attribute)
+        if amount_minor is None:
+            return None
+        return from_minor(amount_minor, self.currency or DEFAULT_CURRENCY)
+
+    def setter(self, amount):
+        setattr(self, minor_attribute, to_minor(amount, self.currency or DEFAULT_CURRENCY))
+
+    return property(getter, setter)
+
+
+UNPROCESSED = text(f"status = {STATUS_CODES[OrderStatus.NEW]}")
+
+
+def currency_column():
+    return mapped_column(
+        String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY
+    )
 
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_customer_id_created_at", "customer_id", "created_at"),
+        Index("ix_orders_processed_at", "processed_at"),
+        # Частичный индекс только по необработанным заказам: бэклог не сканирует всю таблицу
+        Index(
+            "ix_orders_unprocessed_created_at",
+            "created_at",
+            "id",
+            postgresql_where=UNPROCESSED,
+            sqlite_where=UNPROCESSED,
+        ),
+        # Помесячные партиции по времени из UUIDv7: поиск по id попадает в одну партицию
+        {"postgresql_partition_by": "RANGE (id)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
     )
     customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
-    status: Mapped[str] = mapped_column(String(32), nullable=False)
-    total_price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    status: Mapped[OrderStatus] = mapped_column(StatusCode, nullable=False)
+    total_price_minor: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    currency: Mapped[str] = currency_column()
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -30,27 +71,133 @@ class Order(Base):
         server_default=func.now(),
         onupdate=func.now(),
     )
+    processed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Учёт sweeper'а: сколько раз order.created переотправлялся для зависшего заказа и когда
+    republish_attempts: Mapped[int] = mapped_column(
+        SmallInteger, nullable=False, default=0, server_default="0"
+    )
+    last_republished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Копия позиций заказа для чтения одним запросом; источник истины — order_items
+    items_snapshot: Mapped[list | None] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), nullable=True
+    )
 
     items: Mapped[list["OrderItem"]] = relationship(
         back_populates="order",
         cascade="all, delete-orphan",
     )
 
+    total_price = money_property("total_price_minor")
+
+    @validates("status")
+    def validate_status(self, key, status):
+        return check_transition(self.status, status)
+
+
+# Статус подставляется в SQL литералом: даже в подготовленном запросе с generic-планом
+# условие совпадает с предикатом частичного индекса
+IS_UNPROCESSED = Order.status == bindparam(
+    "unprocessed_status", OrderStatus.NEW, type_=StatusCode(), literal_execute=True
+)
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        {"postgresql_partition_by": "RANGE (order_id)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
     )
     order_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("orders.id")
+        UUID(as_uuid=True), ForeignKey("orders.id"), primary_key=True, index=True
     )
     product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True))
     quantity: Mapped[int] = mapped_column(Integer)
-    price: Mapped[float] = mapped_column(Numeric(10, 2))
+    price_minor: Mapped[int] = mapped_column(BigInteger)
+    currency: Mapped[str] = currency_column()
 
     order: Mapped["Order"] = relationship(back_populates="items")
 
+    price = money_property("price_minor")
+
+
+class ArchivedOrder(Base):
+    __tablename__ = "orders_archive"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    status: Mapped[OrderStatus] = mapped_column(StatusCode, nullable=False)
+    total_price_minor: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    currency: Mapped[str] = currency_column()
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    processed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    items_snapshot: Mapped[list | None] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), nullable=True
+    )
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    items: Mapped[list["ArchivedOrderItem"]] = relationship(
+        back_populates="order",
+        cascade="all, delete-orphan",
+    )
+
+    total_price = money_property("total_price_minor")
+
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "order_items_archive"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    order_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("orders_archive.id"), primary_key=True, index=True
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True))
+    quantity: Mapped[int] = mapped_column(Integer)
+    price_minor: Mapped[int] = mapped_column(BigInteger)
+    currency: Mapped[str] = currency_column()
+
+    order: Mapped["ArchivedOrder"] = relationship(back_populates="items")
+
+    price = money_property("price_minor")
+
+
+class CustomerOrderStats(Base):
+    __tablename__ = "customer_order_stats"
+
+    customer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    currency: Mapped[str] = mapped_column(String(3), primary_key=True, default=DEFAULT_CURRENCY)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_spent_minor: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_order_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    total_spent = money_property("total_spent_minor")
+
+
+class Lease(Base):
+    # Аренда фоновой задачи: ровно один процесс в кластере держит её, пока продлевает expires_at
+    __tablename__ = "leases"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(128), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
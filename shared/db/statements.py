@@ -0,0 +1,99 @@
+import hashlib
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from shared.db.metrics import SLOW_STATEMENTS, STATEMENT_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Кто выполняет запрос: "GET /orders/{order_id}", "order.created" или фоновая задача
+statement_source: ContextVar[str] = ContextVar("statement_source", default="background")
+
+OTHER = "other"
+MAX_FINGERPRINTS = 500
+MAX_LOGGED_PARAMETERS = 500
+
+OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY", "BEGIN", "COMMIT", "ROLLBACK"})
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE = re.compile(r"\s+")
+
+_known: set[str] = set()
+
+
+@lru_cache(maxsize=2048)
+def normalize(statement: str) -> str:
+    # Литералы и плейсхолдеры в "?", списки IN и многострочные VALUES — в один элемент
+    normalized = _STRING.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _LIST.sub("(?)", normalized)
+    normalized = _ROWS.sub("(?)", normalized)
+    return _SPACE.sub(" ", normalized).strip()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> tuple[str, str]:
+    normalized = normalize(statement)
+    operation = normalized.split(" ", 1)[0].upper()
+    digest = hashlib.blake2b(normalized.encode(), digest_size=6).hexdigest()
+    return (operation if operation in OPERATIONS else OTHER), digest
+
+
+def _label(digest: str, statement: str) -> str:
+    if digest in _known:
+        return digest
+    # Запросы с динамическим SQL не должны раздувать число рядов гистограммы
+    if len(_known) >= MAX_FINGERPRINTS:
+        return OTHER
+    _known.add(digest)
+    # Текст запроса не идёт в метку: соответствие fingerprint -> SQL пишем в лог один раз на процесс
+    logger.info("Statement fingerprint %s: %s", digest, normalize(statement))
+    return digest
+
+
+def _parameters(parameters) -> str:
+    text = repr(parameters)
+    if len(text) > MAX_LOGGED_PARAMETERS:
+        return text[:MAX_LOGGED_PARAMETERS] + "..."
+    return text
+
+
+def instrument_statements(engine: AsyncEngine, label: str, slow_seconds: float, sample_rate: float) -> None:
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._statement_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_statement_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+
+        operation, digest = fingerprint(statement)
+        digest = _label(digest, statement)
+        STATEMENT_DURATION.labels(label, operation, digest).observe(elapsed)
+
+        if elapsed < slow_seconds:
+            return
+        SLOW_STATEMENTS.labels(label, digest).inc()
+        # Сам счётчик точный, а в лог попадает только доля медленных запросов
+        if random.random() < sample_rate:
+            logger.warning(
+                "Slow statement %.3fs pool=%s source=%s fingerprint=%s: %s parameters=%s",
+                elapsed, label, statement_source.get(), digest, statement, _parameters(parameters),
+            )
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
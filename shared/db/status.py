@@ -0,0 +1,58 @@
+from enum import Enum
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class OrderStatus(str, Enum):
+    NEW = "NEW"
+    PROCESSED = "PROCESSED"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+# Коды в БД менять нельзя: только дописывать новые
+STATUS_CODES = {
+    OrderStatus.NEW: 1,
+    OrderStatus.PROCESSED: 2,
+}
+STATUS_BY_CODE = {code: status for status, code in STATUS_CODES.items()}
+
+TRANSITIONS = {
+    OrderStatus.NEW: {OrderStatus.PROCESSED},
+    OrderStatus.PROCESSED: set(),
+}
+
+
+class InvalidStatusTransition(ValueError):
+    pass
+
+
+def check_transition(current: OrderStatus | str | None, new: OrderStatus | str) -> OrderStatus:
+    new = OrderStatus(new)
+    if current is None:
+        return new
+    current = OrderStatus(current)
+    # Повторная установка того же статуса — не переход: консьюмер может получить событие дважды
+    if new is not current and new not in TRANSITIONS[current]:
+        raise InvalidStatusTransition(f"Order status cannot change from {current.value} to {new.value}")
+    return new
+
+
+class StatusCode(TypeDecorator):
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return STATUS_CODES[OrderStatus(value)]
+
+    def process_literal_param(self, value, dialect):
+        return str(self.process_bind_param(value, dialect))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return STATUS_BY_CODE[value]
@@ -0,0 +1,56 @@
+import asyncio
+import hmac
+import threading
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from shared.profiling import HEAP_GROUPS, ProfilerBusy, heap, sampler
+
+
+def create_debug_router(token: str, max_seconds: float, service: str) -> APIRouter:
+    # Без токена ручки не монтируются вовсе: профилировщик виден всем, кто достучался до порта
+    if not token:
+        raise ValueError("DEBUG_TOKEN must be set when debug endpoints are enabled")
+
+    def check_token(x_debug_token: str = Header("")):
+        if not hmac.compare_digest(x_debug_token.encode(), token.encode()):
+            raise HTTPException(status.HTTP_403_FORBIDDEN, "Invalid debug token")
+
+    router = APIRouter(dependencies=[Depends(check_token)])
+
+    @router.get("/profile")
+    async def profile(
+        seconds: float = Query(10, gt=0),
+        interval: float = Query(0.01, ge=0.001, le=1),
+        format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+        all_threads: bool = False,
+    ):
+        if seconds > max_seconds:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, f"seconds must not exceed {max_seconds}")
+        # По умолчанию снимается только поток event loop, который обрабатывает этот запрос
+        thread_id = None if all_threads else threading.get_ident()
+        try:
+            result = await asyncio.to_thread(sampler.run, seconds, interval, thread_id)
+        except ProfilerBusy as exc:
+            raise HTTPException(status.HTTP_409_CONFLICT, str(exc))
+
+        if format == "speedscope":
+            return JSONResponse(
+                result.speedscope(service),
+                headers={"Content-Disposition": f'attachment; filename="{service}.speedscope.json"'},
+            )
+        return PlainTextResponse(result.collapsed())
+
+    @router.get("/heap")
+    async def heap_snapshot(
+        limit: int = Query(20, ge=1, le=500),
+        group_by: str = Query("lineno", pattern=f"^({'|'.join(HEAP_GROUPS)})$"),
+    ):
+        return await asyncio.to_thread(heap.snapshot, limit, group_by)
+
+    @router.delete("/heap", status_code=status.HTTP_204_NO_CONTENT)
+    async def heap_stop():
+        await asyncio.to_thread(heap.stop)
+
+    return router
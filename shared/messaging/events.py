@@ -0,0 +1,31 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+import aio_pika
+
+from shared.money import DEFAULT_CURRENCY
+from shared.tracing import inject
+
+EXCHANGE = "orders"
+ORDER_CREATED = "order.created"
+
+
+def order_created_message(order_id, total_price_minor: int, currency: str = DEFAULT_CURRENCY) -> aio_pika.Message:
+    now = datetime.now(timezone.utc)
+    event = {
+        "event_id": str(uuid.uuid4()),
+        "event_type": ORDER_CREATED,
+        "occurred_at": now.isoformat(),
+        "payload": {
+            "order_id": str(order_id),
+            "total_price_minor": total_price_minor,
+            "currency": currency,
+        },
+    }
+    return aio_pika.Message(
+        body=json.dumps(event).encode(),
+        content_type="application/json",
+        timestamp=now,
+        headers=inject({}),
+    )
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+import aio_pika
+
+from shared.messaging.events import EXCHANGE
+
+logger = logging.getLogger(__name__)
+
+MEMORY_SCHEME = "memory://"
+
+Handler = Callable[[object], Awaitable[None]]
+
+
+class AmqpTransport:
+    def __init__(self, url: str):
+        self._url = url
+        self._connection = None
+        self._channel = None
+        self._exchange = None
+        self._consumers: list[tuple[aio_pika.abc.AbstractQueue, str]] = []
+
+    @property
+    def is_open(self) -> bool:
+        return self._channel is not None and not self._channel.is_closed
+
+    async def connect(self, prefetch: int | None = None):
+        self._connection = await aio_pika.connect_robust(self._url)
+        self._channel = await self._connection.channel()
+        if prefetch is not None:
+            await self._channel.set_qos(prefetch_count=prefetch)
+        self._exchange = await self._channel.declare_exchange(
+            EXCHANGE, aio_pika.ExchangeType.TOPIC
+        )
+
+    async def publish(self, message: aio_pika.Message, routing_key: str):
+        await self._exchange.publish(message, routing_key=routing_key)
+
+    async def consume(self, queue_name: str, routing_key: str, handler: Handler):
+        queue = await self._channel.declare_queue(queue_name, durable=True)
+        await queue.bind(self._exchange, routing_key=routing_key)
+        self._consumers.append((queue, await queue.consume(handler)))
+
+    async def cancel(self):
+        # basic.cancel: новые сообщения не приходят, а уже полученные можно подтвердить до закрытия канала
+        consumers, self._consumers = self._consumers, []
+        for queue, tag in consumers:
+            try:
+                await queue.cancel(tag)
+            except Exception:
+                logger.warning("Failed to cancel consumer %s on %s", tag, queue.name, exc_info=True)
+
+    async def set_prefetch(self, limit: int):
+        if self._channel is not None:
+            await self._channel.set_qos(prefetch_count=limit)
+
+    async def queue_depth(self, queue_name: str) -> int:
+        queue = await self._channel.declare_queue(queue_name, passive=True)
+        return queue.declaration_result.message_count
+
+    async def close(self):
+        if self._connection:
+            await self._connection.close()
+
+
+class InMemoryMessage:
+    def __init__(self, message: aio_pika.Message, routing_key: str):
+        self.body = message.body
+        self.headers = message.headers
+        self.content_type = message.content_type
+        self.timestamp = message.timestamp
+        self.routing_key = routing_key
+        self.redelivered = False
+
+    @asynccontextmanager
+    async def process(self):
+        # Как aio_pika с requeue=False: сообщение, на котором упал обработчик, отбрасывается
+        yield self
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._bindings: dict[str, set[str]] = {}
+
+    def queue(self, name: str) -> asyncio.Queue:
+        return self._queues.setdefault(name, asyncio.Queue())
+
+    def bind(self, queue_name: str, routing_key: str):
+        self.queue(queue_name)
+        self._bindings.setdefault(routing_key, set()).add(queue_name)
+
+    def publish(self, message: aio_pika.Message, routing_key: str):
+        # Только точное совпадение ключа: шаблоны topic-обменника здесь не нужны
+        for queue_name in self._bindings.get(routing_key, ()):
+            self._queues[queue_name].put_nowait(InMemoryMessage(message, routing_key))
+
+
+# Один брокер на процесс: API и consumer в standalone-режиме видят одни и те же очереди
+broker = InMemoryBroker()
+
+
+class InMemoryTransport:
+    def __init__(self, broker: InMemoryBroker):
+        self._broker = broker
+        self._open = False
+        self._prefetch = 0
+        self._unacked = 0
+        self._capacity = asyncio.Condition()
+        self._tasks: set[asyncio.Task] = set()
+        self._deliveries: set[asyncio.Task] = set()
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    async def connect(self, prefetch: int | None = None):
+        self._prefetch = prefetch or 0
+        self._open = True
+
+    async def publish(self, message: aio_pika.Message, routing_key: str):
+        self._broker.publish(message, routing_key)
+
+    async def consume(self, queue_name: str, routing_key: str, handler: Handler):
+        self._broker.bind(queue_name, routing_key)
+        self._deliveries.add(self._spawn(self._deliver(self._broker.queue(queue_name), handler)))
+
+    async def cancel(self):
+        # Останавливаем только выдачу: начатые обработчики доработают сами
+        deliveries, self._deliveries = self._deliveries, set()
+        for task in deliveries:
+            task.cancel()
+        await asyncio.gather(*deliveries, return_exceptions=True)
+
+    async def set_prefetch(self, limit: int):
+        async with self._capacity:
+            self._prefetch = limit
+            self._capacity.notify_all()
+
+    async def queue_depth(self, queue_name: str) -> int:
+        return self._broker.queue(queue_name).qsize()
+
+    async def close(self):
+        self._open = False
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _deliver(self, queue: asyncio.Queue, handler: Handler):
+        while True:
+            # prefetch ограничивает число неподтверждённых сообщений, как basic.qos
+            async with self._capacity:
+                await self._capacity.wait_for(lambda: not self._prefetch or self._unacked < self._prefetch)
+                self._unacked += 1
+            message = await queue.get()
+            self._spawn(self._handle(message, handler))
+
+    async def _handle(self, message: InMemoryMessage, handler: Handler):
+        try:
+            await handler(message)
+        except Exception:
+            logger.exception("Handler failed for in-memory message on %s", message.routing_key)
+        finally:
+            async with self._capacity:
+                self._unacked -= 1
+                self._capacity.notify_all()
+
+
+def create_transport(url: str):
+    if url.startswith(MEMORY_SCHEME):
+        return InMemoryTransport(broker)
+    return AmqpTransport(url)
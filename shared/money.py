@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+DEFAULT_CURRENCY = "USD"
+
+# Число знаков после запятой по ISO 4217; всё, чего нет в таблице, считаем центами
+MINOR_UNIT_EXPONENTS = {
+    "BHD": 3,
+    "CLP": 0,
+    "ISK": 0,
+    "JPY": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "OMR": 3,
+    "TND": 3,
+    "VND": 0,
+}
+
+
+def exponent(currency: str) -> int:
+    return MINOR_UNIT_EXPONENTS.get(currency, 2)
+
+
+def to_minor(amount: Decimal, currency: str = DEFAULT_CURRENCY) -> int:
+    scaled = Decimal(amount).scaleb(exponent(currency))
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{amount} has more precision than {currency} allows")
+    return int(scaled)
+
+
+def from_minor(amount_minor: int, currency: str = DEFAULT_CURRENCY) -> Decimal:
+    places = exponent(currency)
+    return Decimal(amount_minor).scaleb(-places).quantize(Decimal(1).scaleb(-places))
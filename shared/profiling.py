@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+HEAP_GROUPS = ("lineno", "filename", "traceback")
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_name(code) -> str:
+    # Первая строка функции, а не текущая: иначе один и тот же вызов дробится на десятки стеков
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> tuple[str, ...]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+@dataclass
+class Profile:
+    duration: float
+    interval: float
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self, name: str) -> dict:
+        frames: dict[str, int] = {}
+        by_thread: dict[str, tuple[list, list]] = {}
+        # Вес сэмпла — реальное время между тиками, а не запрошенный интервал
+        weight = self.duration / self.samples if self.samples else self.interval
+        for (thread, *stack), count in self.stacks.most_common():
+            samples, weights = by_thread.setdefault(thread, ([], []))
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(count * weight)
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "order-processing",
+            "shared": {"frames": [{"name": frame} for frame in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+                for thread, (samples, weights) in by_thread.items()
+            ],
+        }
+
+
+class StackSampler:
+    # Раз в interval снимает стеки через sys._current_frames(): код не инструментируется,
+    # а цена одного тика — обход фреймов под GIL, поэтому по умолчанию 100 Гц
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def run(self, seconds: float, interval: float = 0.01, thread_id: int | None = None) -> Profile:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("Another profile is already running")
+        try:
+            return self._sample(seconds, interval, thread_id)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, thread_id: int | None) -> Profile:
+        own = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + seconds
+        profile = Profile(duration=0.0, interval=interval)
+        tick = started
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (thread_id is not None and ident != thread_id):
+                    continue
+                profile.stacks[(names.get(ident, str(ident)),) + _stack(frame)] += 1
+            profile.samples += 1
+
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            tick += interval
+            time.sleep(max(0.0, min(tick, deadline) - now))
+        profile.duration = time.perf_counter() - started
+        return profile
+
+
+class HeapProfiler:
+    # tracemalloc включается только по первому запросу: пока он работает, аллокации заметно дороже
+    def __init__(self, frames: int = 10):
+        self._frames = frames
+        self._previous: tracemalloc.Snapshot | None = None
+        self._lock = threading.Lock()
+
+    def snapshot(self, limit: int = 20, group_by: str = "lineno") -> dict:
+        with self._lock:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(self._frames)
+                self._previous = None
+
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ))
+            previous, self._previous = self._previous, snapshot
+            traced, peak = tracemalloc.get_traced_memory()
+
+            return {
+                "started": started,
+                "traced_bytes": traced,
+                "peak_bytes": peak,
+                "top": [_statistic(stat) for stat in snapshot.statistics(group_by)[:limit]],
+                "diff": [
+                    _statistic(stat, diff=True)
+                    for stat in (snapshot.compare_to(previous, group_by)[:limit] if previous else [])
+                ],
+            }
+
+    def stop(self):
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+
+def _statistic(stat, diff: bool = False) -> dict:
+    item = {
+        "location": str(stat.traceback[0]),
+        "traceback": [str(frame) for frame in stat.traceback],
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if diff:
+        item["size_diff_bytes"] = stat.size_diff
+        item["count_diff"] = stat.count_diff
+    return item
+
+
+sampler = StackSampler()
+heap = HeapProfiler()
@@ -0,0 +1,66 @@
+import asyncio
+import gc
+import importlib.util
+import logging
+from dataclasses import dataclass, replace
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RuntimeProfile:
+    name: str
+    loop: str
+    http: str
+    gc_freeze: bool
+    gc_gen0_threshold: int | None
+
+
+PROFILES = {
+    "default": RuntimeProfile("default", "asyncio", "h11", False, None),
+    "performance": RuntimeProfile("performance", "uvloop", "httptools", True, 50_000),
+}
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def resolve_profile(name: str) -> RuntimeProfile:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown runtime profile {name!r}, expected one of {sorted(PROFILES)}")
+
+    profile = PROFILES[name]
+    if profile.loop == "uvloop" and not _available("uvloop"):
+        logger.warning("uvloop is not installed, falling back to the asyncio event loop")
+        profile = replace(profile, loop="asyncio")
+    if profile.http == "httptools" and not _available("httptools"):
+        logger.warning("httptools is not installed, falling back to the h11 HTTP parser")
+        profile = replace(profile, http="h11")
+    return profile
+
+
+def install_event_loop_policy(profile: RuntimeProfile) -> None:
+    if profile.loop == "uvloop":
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def apply_gc_threshold(profile: RuntimeProfile) -> None:
+    if profile.gc_gen0_threshold is not None:
+        _, gen1, gen2 = gc.get_threshold()
+        gc.set_threshold(profile.gc_gen0_threshold, gen1, gen2)
+
+
+def freeze_after_startup(profile: RuntimeProfile) -> None:
+    # Объекты, созданные при старте, живут весь процесс: убираем их из обхода GC
+    if profile.gc_freeze:
+        gc.collect()
+        gc.freeze()
+
+
+def run(main, profile: RuntimeProfile):
+    install_event_loop_policy(profile)
+    apply_gc_threshold(profile)
+    return asyncio.run(main)
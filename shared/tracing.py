@@ -0,0 +1,282 @@
+import importlib
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+TRACEPARENT_FORMAT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Коды SpanKind из OTLP
+KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: str | None = None
+    kind: str = "internal"
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value):
+        if self.context.sampled:
+            self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def resource_spans(service: str, spans: list[Span]) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", service)]},
+        "scopeSpans": [{"scope": {"name": "order-processing"}, "spans": [span.to_otlp() for span in spans]}],
+    }]}
+
+
+_STOP = object()
+
+
+class BatchExporter:
+    # Спаны копятся в очереди и уходят пачками из отдельного потока: event loop не ждёт ни коллектор, ни диск
+    def __init__(self, target: str, batch_size: int, interval: float, max_queue: int):
+        self._target = target
+        self._batch_size = batch_size
+        self._interval = interval
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, service: str, span: Span):
+        try:
+            self._queue.put_nowait((service, span))
+        except queue.Full:
+            logger.debug("Span queue is full, dropping %s", span.name)
+
+    def _drain(self) -> list:
+        batch = []
+        try:
+            item = self._queue.get(timeout=self._interval)
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    break
+                item = self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        return batch
+
+    def send(self, batch: list):
+        raise NotImplementedError
+
+    def _send(self, batch: list):
+        try:
+            self.send(batch)
+        except Exception:
+            logger.warning("Failed to export %d spans to %s", len(batch), self._target, exc_info=True)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._drain()
+            if batch:
+                self._send(batch)
+
+    def shutdown(self):
+        # Будим поток, ждём текущую пачку и дописываем остаток очереди сами
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=self._interval)
+        batch = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                batch.append(item)
+        if batch:
+            self._send(batch)
+
+
+class FileExporter(BatchExporter):
+    # По строке OTLP/JSON на спан: удобно для тестов и локального разбора через jq
+    def __init__(self, path: str, batch_size: int = 512, interval: float = 1.0, max_queue: int = 10000):
+        self._path = path
+        super().__init__(path, batch_size, interval, max_queue)
+
+    def send(self, batch: list):
+        lines = "".join(json.dumps(resource_spans(service, [span])) + "\n" for service, span in batch)
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+class OtlpHttpExporter(BatchExporter):
+    def __init__(self, endpoint: str, batch_size: int = 512, interval: float = 5.0, max_queue: int = 10000):
+        self._url = endpoint.rstrip("/") + "/v1/traces"
+        super().__init__(self._url, batch_size, interval, max_queue)
+
+    def send(self, batch: list):
+        by_service: dict[str, list[Span]] = {}
+        for service, span in batch:
+            by_service.setdefault(service, []).append(span)
+        for service, spans in by_service.items():
+            request = urllib.request.Request(
+                self._url,
+                data=json.dumps(resource_spans(service, spans)).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            urllib.request.urlopen(request, timeout=10).close()
+
+
+def build_exporter(kind: str, file_path: str, otlp_endpoint: str):
+    if not kind:
+        return None
+    if kind == "file":
+        return FileExporter(file_path)
+    if kind == "otlp":
+        return OtlpHttpExporter(otlp_endpoint)
+    module_name, _, attr = kind.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+NOOP_SPAN = Span("noop", SpanContext("0" * 32, "0" * 16, False))
+
+
+class Tracer:
+    def __init__(self):
+        self.service = "unknown"
+        self._exporter = None
+        self._sample_rate = 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    def configure(self, service: str, exporter, sample_rate: float):
+        self.service = service
+        self._exporter = exporter
+        self._sample_rate = sample_rate
+
+    @contextmanager
+    def start_span(self, name: str, kind: str = "internal", parent: SpanContext | None = None, attributes: dict | None = None):
+        if self._exporter is None:
+            yield NOOP_SPAN
+            return
+
+        if parent is None and (current := _current.get()) is not None:
+            parent = current.context
+        if parent is None:
+            # Решение о сэмплировании принимается один раз в корне и едет дальше во флагах traceparent
+            context = SpanContext(_random_id(16), _random_id(8), random.random() < self._sample_rate)
+        else:
+            context = SpanContext(parent.trace_id, _random_id(8), parent.sampled)
+
+        span = Span(name, context, parent.span_id if parent else None, kind, time.time_ns())
+        if attributes and context.sampled:
+            span.attributes.update(attributes)
+
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = repr(exc)
+            raise
+        finally:
+            _current.reset(token)
+            if context.sampled:
+                span.end_ns = time.time_ns()
+                try:
+                    self._exporter.export(self.service, span)
+                except Exception:
+                    logger.warning("Failed to export span %s", name, exc_info=True)
+
+    def shutdown(self):
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+
+def _random_id(size: int) -> str:
+    return random.getrandbits(size * 8).to_bytes(size, "big").hex()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def inject(headers: dict) -> dict:
+    span = _current.get()
+    if span is not None:
+        headers[TRACEPARENT] = span.context.traceparent
+    return headers
+
+
+def extract(headers) -> SpanContext | None:
+    if not isinstance(headers, dict):
+        return None
+    value = headers.get(TRACEPARENT)
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "replace")
+    match = TRACEPARENT_FORMAT.match(value) if isinstance(value, str) else None
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+tracer = Tracer()
+
+
+def configure_tracing(service: str, settings):
+    tracer.configure(
+        service,
+        build_exporter(settings.tracing_exporter, settings.tracing_file, settings.tracing_otlp_endpoint),
+        settings.tracing_sample_rate,
+    )
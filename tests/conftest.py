@@ -48,6 +48,11 @@ async def async_session(test_db_engine) -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@pytest.fixture
+def session_factory(test_db_engine):
+    return async_sessionmaker(test_db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
 @pytest.fixture
 def mock_session():
     session = AsyncMock(spec=AsyncSession)
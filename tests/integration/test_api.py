@@ -224,10 +224,49 @@ async def test_create_order_publishes_to_rabbitmq(async_client, mock_order_produ
     
     call_args = mock_order_producer.publish_order_created.call_args[0]
     order_id = call_args[0]
-    total_price = call_args[1]
+    total_price_minor = call_args[1]
+    currency = call_args[2]
     
     assert isinstance(order_id, uuid.UUID)
-    assert total_price == Decimal("50.00")
+    assert total_price_minor == 5000
+    assert currency == "USD"
+
+
+@pytest.mark.asyncio
+async def test_create_order_in_minor_units_with_currency(async_client, mock_order_producer):
+    order_data = {
+        "customer_id": str(uuid.uuid4()),
+        "currency": "JPY",
+        "items": [
+            {"product_id": str(uuid.uuid4()), "quantity": 3, "price_minor": 1200},
+            {"product_id": str(uuid.uuid4()), "quantity": 1, "price": "500"},
+        ]
+    }
+
+    response = await async_client.post("/orders/", json=order_data)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["currency"] == "JPY"
+    assert data["total_price_minor"] == 4100
+    assert Decimal(data["total_price"]) == Decimal("4100")
+    assert [item["price_minor"] for item in data["items"]] == [1200, 500]
+
+    fetched = (await async_client.get(f"/orders/{data['order_id']}")).json()
+    assert fetched["total_price_minor"] == 4100
+    assert fetched["currency"] == "JPY"
+
+
+@pytest.mark.asyncio
+async def test_create_order_rejects_sub_minor_prices(async_client, mock_order_producer):
+    order_data = {
+        "customer_id": str(uuid.uuid4()),
+        "items": [{"product_id": str(uuid.uuid4()), "quantity": 1, "price": "0.001"}]
+    }
+
+    response = await async_client.post("/orders/", json=order_data)
+
+    assert response.status_code == 422
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,122 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+from sqlalchemy import func, select
+
+from app.api.schemas import OrderItemCreate
+from app.core.config import settings
+from app.db import archive
+from app.db.archive import archive_orders
+from app.services.orders import create_order, get_order
+from shared.db.ids import uuid7_at
+from shared.db.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+async def make_order(session_factory, status="PROCESSED", processed_days_ago=200, created_at=None):
+    # id, как в проде, несёт момент создания заказа — чуть раньше обработки
+    created_at = created_at or NOW - timedelta(days=processed_days_ago, minutes=1)
+    async with session_factory() as session:
+        with patch("app.services.orders.uuid7", lambda: uuid7_at(created_at)):
+            order = await create_order(
+                session,
+                uuid.uuid4(),
+                [OrderItemCreate(product_id=uuid.uuid4(), quantity=2, price=Decimal("5.00"))],
+            )
+        order.status = status
+        order.processed_at = NOW - timedelta(days=processed_days_ago) if status == "PROCESSED" else None
+        await session.commit()
+        return order.id
+
+
+async def count(session_factory, model):
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_only_old_processed_orders(session_factory):
+    old = [await make_order(session_factory) for _ in range(5)]
+    recent = await make_order(session_factory, processed_days_ago=10)
+    pending = await make_order(session_factory, status="NEW")
+
+    archived = await archive_orders(session_factory, timedelta(days=90), batch_size=2, throttle=0, now=NOW)
+
+    assert archived == 5
+    async with session_factory() as session:
+        hot = set((await session.execute(select(Order.id))).scalars())
+        cold = set((await session.execute(select(ArchivedOrder.id))).scalars())
+    assert hot == {recent, pending}
+    assert cold == set(old)
+    assert await count(session_factory, OrderItem) == 2
+    assert await count(session_factory, ArchivedOrderItem) == 5
+
+
+@pytest.mark.asyncio
+async def test_archive_bounds_ids_by_cutoff(session_factory):
+    # processed_at старый, но id новее границы: такую строку запрос по id не трогает
+    newer_id = await make_order(session_factory, created_at=NOW - timedelta(days=1))
+
+    assert await archive_orders(session_factory, timedelta(days=90), batch_size=10, throttle=0, now=NOW) == 0
+    async with session_factory() as session:
+        assert await session.get(Order, newer_id) is not None
+
+
+@pytest.mark.asyncio
+async def test_archive_respects_max_batches_and_throttle(mocker, session_factory):
+    for _ in range(5):
+        await make_order(session_factory)
+    sleep = mocker.patch.object(archive.asyncio, "sleep", mocker.AsyncMock())
+
+    archived = await archive_orders(
+        session_factory, timedelta(days=90), batch_size=2, throttle=0.25, max_batches=2, now=NOW
+    )
+
+    assert archived == 4
+    assert sleep.await_count == 2
+    sleep.assert_awaited_with(0.25)
+
+
+@pytest.mark.asyncio
+async def test_get_order_falls_back_to_archive(session_factory):
+    order_id = await make_order(session_factory)
+    await archive_orders(session_factory, timedelta(days=90), batch_size=10, throttle=0, now=NOW)
+
+    async with session_factory() as session:
+        assert await get_order(session, order_id) is None
+        archived = await get_order(session, order_id, include_archive=True)
+
+    assert archived.id == order_id
+    assert archived.status == "PROCESSED"
+    assert [item["price"] for item in archived.items] == [Decimal("5.00")]
+
+
+@pytest.mark.asyncio
+async def test_get_order_endpoint_serves_archived_orders(mocker, async_client, session_factory):
+    order_id = await make_order(session_factory)
+    await archive_orders(session_factory, timedelta(days=90), batch_size=10, throttle=0, now=NOW)
+
+    assert (await async_client.get(f"/orders/{order_id}")).status_code == 404
+
+    mocker.patch.object(settings, "archive_fallback_enabled", True)
+    response = await async_client.get(f"/orders/{order_id}")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "PROCESSED"
+
+
+def test_main_passes_settings(mocker):
+    run = mocker.patch.object(archive.asyncio, "run", return_value=3)
+    archive_mock = mocker.patch.object(archive, "archive_orders", mocker.Mock(return_value="coro"))
+
+    assert archive.main(["--older-than-days", "30", "--max-batches", "4"]) == 3
+
+    _, older_than, batch_size, throttle, max_batches = archive_mock.call_args.args
+    assert older_than == timedelta(days=30)
+    assert batch_size == settings.archive_batch_size
+    assert throttle == settings.archive_throttle_seconds
+    assert max_batches == 4
+    run.assert_called_once_with("coro")
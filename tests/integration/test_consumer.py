@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import json
 import uuid
@@ -302,3 +303,293 @@ async def test_consumer_queue_configuration(mock_rabbitmq):
     
     assert routing_key == "order.created"
 
+
+
+@pytest.mark.asyncio
+async def test_consumer_start_sets_prefetch(mock_rabbitmq):
+    mock_queue = AsyncMock()
+    mock_rabbitmq['channel'].declare_queue = AsyncMock(return_value=mock_queue)
+    mock_rabbitmq['channel'].is_closed = False
+
+    consumer = OrderConsumer()
+    assert consumer.is_ready is False
+
+    await consumer.start()
+
+    mock_rabbitmq['channel'].set_qos.assert_called_once()
+    assert consumer.is_ready is True
+
+
+@pytest.mark.asyncio
+async def test_consumer_counts_acked_messages(async_session, mocker):
+    from consumer.metrics.prometheus import MESSAGES_ACKED, MESSAGES_RECEIVED
+
+    order = Order(
+        customer_id=uuid.uuid4(),
+        status="NEW",
+        total_price=Decimal("10.00"),
+    )
+    async_session.add(order)
+    await async_session.commit()
+
+    message = AsyncMock()
+    message.redelivered = False
+    message.body = json.dumps({
+        "event_id": str(uuid.uuid4()),
+        "payload": {"order_id": str(order.id), "total_price": "10.00"},
+    }).encode()
+    mock_context = MagicMock()
+    mock_context.__aenter__ = AsyncMock(return_value=None)
+    mock_context.__aexit__ = AsyncMock(return_value=None)
+    message.process = MagicMock(return_value=mock_context)
+
+    mock_session_context = MagicMock()
+    mock_session_context.__aenter__ = AsyncMock(return_value=async_session)
+    mock_session_context.__aexit__ = AsyncMock(return_value=None)
+    mocker.patch('consumer.messaging.consumer.AsyncSessionLocal', MagicMock(return_value=mock_session_context))
+
+    received_before = MESSAGES_RECEIVED._value.get()
+    acked_before = MESSAGES_ACKED._value.get()
+
+    await OrderConsumer().handle_message(message)
+
+    assert MESSAGES_RECEIVED._value.get() == received_before + 1
+    assert MESSAGES_ACKED._value.get() == acked_before + 1
+
+
+@pytest.mark.asyncio
+async def test_consumer_counts_rejected_and_retried_messages():
+    from consumer.metrics.prometheus import MESSAGES_REJECTED, MESSAGES_RETRIED, IN_FLIGHT
+
+    message = AsyncMock()
+    message.redelivered = True
+    message.body = b"invalid json"
+    mock_context = MagicMock()
+    mock_context.__aenter__ = AsyncMock(return_value=None)
+    mock_context.__aexit__ = AsyncMock(return_value=None)
+    message.process = MagicMock(return_value=mock_context)
+
+    rejected_before = MESSAGES_REJECTED._value.get()
+    retried_before = MESSAGES_RETRIED._value.get()
+    in_flight_before = IN_FLIGHT._value.get()
+
+    with pytest.raises(json.JSONDecodeError):
+        await OrderConsumer().handle_message(message)
+
+    assert MESSAGES_REJECTED._value.get() == rejected_before + 1
+    assert MESSAGES_RETRIED._value.get() == retried_before + 1
+    assert IN_FLIGHT._value.get() == in_flight_before
+
+
+@pytest.mark.asyncio
+async def test_consumer_updates_queue_depth(mock_rabbitmq):
+    from consumer.metrics.prometheus import QUEUE_DEPTH
+
+    mock_queue = AsyncMock()
+    mock_queue.declaration_result.message_count = 42
+    mock_rabbitmq['channel'].declare_queue = AsyncMock(return_value=mock_queue)
+    mock_rabbitmq['channel'].is_closed = False
+
+    consumer = OrderConsumer()
+    await consumer.start()
+    await consumer.update_queue_depth()
+
+    passive_call = mock_rabbitmq['channel'].declare_queue.call_args
+    assert passive_call[1]['passive'] is True
+    assert QUEUE_DEPTH.labels("order-processing")._value.get() == 42
+
+
+@pytest.mark.asyncio
+async def test_consumer_queue_depth_skipped_when_not_ready(mock_rabbitmq):
+    consumer = OrderConsumer()
+
+    await consumer.update_queue_depth()
+
+    mock_rabbitmq['channel'].declare_queue.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_consumer_queue_depth_survives_broker_errors(mock_rabbitmq):
+    mock_queue = AsyncMock()
+    mock_rabbitmq['channel'].declare_queue = AsyncMock(return_value=mock_queue)
+    mock_rabbitmq['channel'].is_closed = False
+
+    consumer = OrderConsumer()
+    await consumer.start()
+
+    mock_rabbitmq['channel'].declare_queue = AsyncMock(side_effect=RuntimeError("channel closed"))
+
+    await consumer.update_queue_depth()
+
+
+def test_observe_event_lag_records_age_and_dwell():
+    from datetime import datetime, timedelta, timezone
+    from consumer.messaging.consumer import observe_event_lag
+    from consumer.metrics.prometheus import BROKER_DWELL, EVENT_AGE
+
+    now = datetime.now(timezone.utc)
+    message = MagicMock()
+    message.timestamp = now - timedelta(seconds=2)
+
+    age_before = EVENT_AGE._sum.get()
+    dwell_before = BROKER_DWELL._sum.get()
+
+    observe_event_lag({"occurred_at": (now - timedelta(seconds=5)).isoformat()}, message)
+
+    assert EVENT_AGE._sum.get() - age_before == pytest.approx(5, abs=0.5)
+    assert BROKER_DWELL._sum.get() - dwell_before == pytest.approx(2, abs=0.5)
+
+
+def test_observe_event_lag_treats_naive_timestamps_as_utc():
+    from datetime import datetime, timedelta
+    from consumer.messaging.consumer import observe_event_lag
+    from consumer.metrics.prometheus import EVENT_AGE
+
+    message = MagicMock()
+    message.timestamp = None
+    occurred_at = (datetime.utcnow() - timedelta(seconds=10)).isoformat()
+
+    age_before = EVENT_AGE._sum.get()
+    observe_event_lag({"occurred_at": occurred_at}, message)
+
+    assert EVENT_AGE._sum.get() - age_before == pytest.approx(10, abs=0.5)
+
+
+def test_observe_event_lag_ignores_missing_or_invalid_timestamps():
+    from consumer.messaging.consumer import observe_event_lag
+    from consumer.metrics.prometheus import EVENT_AGE
+
+    message = MagicMock()
+    message.timestamp = None
+    count_before = EVENT_AGE._sum.get()
+
+    observe_event_lag({}, message)
+    observe_event_lag({"occurred_at": "yesterday"}, message)
+
+    assert EVENT_AGE._sum.get() == count_before
+
+
+@pytest.mark.asyncio
+async def test_order_processor_sets_processed_at(async_session):
+    order = Order(
+        customer_id=uuid.uuid4(),
+        status="NEW",
+        total_price=Decimal("150.00"),
+    )
+    async_session.add(order)
+    await async_session.commit()
+    assert order.processed_at is None
+
+    await OrderProcessor().process(async_session, order.id)
+    await async_session.refresh(order)
+
+    assert order.processed_at is not None
+
+
+@pytest.mark.asyncio
+async def test_consumer_republishes_on_its_exchange(mock_rabbitmq):
+    mock_rabbitmq['channel'].declare_queue = AsyncMock(return_value=AsyncMock())
+    consumer = OrderConsumer()
+    await consumer.start()
+    order_id = uuid.uuid4()
+
+    await consumer.publish_order_created(order_id, 1500, "EUR")
+
+    call_args = mock_rabbitmq['exchange'].publish.call_args
+    body = json.loads(call_args[0][0].body.decode())
+    assert call_args[1]['routing_key'] == "order.created"
+    assert body['payload'] == {"order_id": str(order_id), "total_price_minor": 1500, "currency": "EUR"}
+
+
+@pytest.mark.asyncio
+async def test_order_flows_through_in_memory_broker(async_session, mocker):
+    from app.messaging.producer import OrderProducer
+    from shared.messaging.transport import InMemoryBroker
+
+    mocker.patch('shared.messaging.transport.broker', InMemoryBroker())
+    mocker.patch('app.messaging.producer.settings.rabbitmq_url', 'memory://')
+    mocker.patch('consumer.messaging.consumer.settings.rabbitmq_url', 'memory://')
+
+    mock_session_context = MagicMock()
+    mock_session_context.__aenter__ = AsyncMock(return_value=async_session)
+    mock_session_context.__aexit__ = AsyncMock(return_value=None)
+    mocker.patch('consumer.messaging.consumer.AsyncSessionLocal', MagicMock(return_value=mock_session_context))
+
+    order = Order(customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("10.00"))
+    async_session.add(order)
+    await async_session.commit()
+
+    consumer = OrderConsumer()
+    await consumer.start()
+    assert consumer.is_ready
+
+    producer = OrderProducer()
+    await producer.connect()
+    await producer.publish_order_created(order.id, order.total_price_minor, order.currency)
+    await producer.close()
+
+    for _ in range(100):
+        await consumer.update_queue_depth()
+        await async_session.refresh(order)
+        if order.status == "PROCESSED":
+            break
+        await asyncio.sleep(0.01)
+
+    assert order.status == "PROCESSED"
+    assert consumer.queue_depth == 0
+
+    await consumer.close()
+    assert not consumer.is_ready
+
+
+@pytest.fixture
+def memory_consumer(mocker):
+    from shared.messaging.transport import InMemoryBroker
+
+    mocker.patch('shared.messaging.transport.broker', InMemoryBroker())
+    mocker.patch('consumer.messaging.consumer.settings.rabbitmq_url', 'memory://')
+    mocker.patch('consumer.messaging.consumer.AsyncSessionLocal', MagicMock(return_value=AsyncMock()))
+    return OrderConsumer()
+
+
+@pytest.mark.asyncio
+async def test_consumer_close_waits_for_in_flight_handlers(memory_consumer, mocker):
+    events = []
+    started = asyncio.Event()
+
+    async def process(session, order_id):
+        started.set()
+        await asyncio.sleep(0.05)
+        events.append("handled")
+
+    mocker.patch.object(memory_consumer._processor, "process", side_effect=process)
+    mocker.patch.object(memory_consumer._processor, "close", side_effect=lambda: events.append("pools closed"))
+    await memory_consumer.start()
+    await memory_consumer.publish_order_created(uuid.uuid4(), 1500, "EUR")
+    await started.wait()
+
+    await memory_consumer.close(timeout=5)
+
+    assert events == ["handled", "pools closed"]
+    assert not memory_consumer._handlers
+
+
+@pytest.mark.asyncio
+async def test_consumer_close_gives_up_on_handlers_after_timeout(memory_consumer, mocker, caplog):
+    started = asyncio.Event()
+
+    async def process(session, order_id):
+        started.set()
+        await asyncio.Event().wait()
+
+    mocker.patch.object(memory_consumer._processor, "process", side_effect=process)
+    close_pools = mocker.patch.object(memory_consumer._processor, "close")
+    await memory_consumer.start()
+    await memory_consumer.publish_order_created(uuid.uuid4(), 1500, "EUR")
+    await started.wait()
+
+    await memory_consumer.close(timeout=0.01)
+
+    assert "1 message handlers still running" in caplog.text
+    close_pools.assert_called_once()
+    assert not memory_consumer.is_ready
@@ -0,0 +1,83 @@
+import pytest
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.api.customers import stats_cache
+from shared.db.models import CustomerOrderStats
+
+
+@pytest.fixture(autouse=True)
+def clear_stats_cache():
+    stats_cache.clear()
+    yield
+    stats_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_customer_without_orders_has_zero_stats(async_client):
+    customer_id = uuid.uuid4()
+
+    response = await async_client.get(f"/customers/{customer_id}/stats")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "customer_id": str(customer_id),
+        "currency": "USD",
+        "order_count": 0,
+        "total_spent": "0.00",
+        "total_spent_minor": 0,
+        "last_order_at": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_customer_stats_served_from_table_and_cached(async_client, async_session):
+    customer_id = uuid.uuid4()
+    stats = CustomerOrderStats(
+        customer_id=customer_id,
+        currency="USD",
+        order_count=3,
+        total_spent_minor=4250,
+        last_order_at=datetime(2026, 3, 1, tzinfo=timezone.utc),
+    )
+    async_session.add(stats)
+    await async_session.commit()
+
+    first = await async_client.get(f"/customers/{customer_id}/stats")
+
+    stats.order_count = 4
+    await async_session.commit()
+    cached = await async_client.get(f"/customers/{customer_id}/stats")
+
+    assert first.json()["order_count"] == 3
+    assert Decimal(first.json()["total_spent"]) == Decimal("42.50")
+    assert first.json()["total_spent_minor"] == 4250
+    assert cached.json() == first.json()
+
+    stats_cache.clear()
+    assert (await async_client.get(f"/customers/{customer_id}/stats")).json()["order_count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_customer_stats_per_currency(async_client, async_session):
+    customer_id = uuid.uuid4()
+    async_session.add_all([
+        CustomerOrderStats(customer_id=customer_id, currency="USD", order_count=1, total_spent_minor=999),
+        CustomerOrderStats(customer_id=customer_id, currency="JPY", order_count=2, total_spent_minor=3000),
+    ])
+    await async_session.commit()
+
+    usd = (await async_client.get(f"/customers/{customer_id}/stats")).json()
+    jpy = (await async_client.get(f"/customers/{customer_id}/stats", params={"currency": "JPY"})).json()
+
+    assert (usd["order_count"], usd["total_spent"]) == (1, "9.99")
+    assert (jpy["order_count"], jpy["total_spent"], jpy["currency"]) == (2, "3000", "JPY")
+    assert (await async_client.get(f"/customers/{customer_id}/stats", params={"currency": "usd"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_customer_stats_invalid_uuid(async_client):
+    response = await async_client.get("/customers/not-a-uuid/stats")
+
+    assert response.status_code == 422
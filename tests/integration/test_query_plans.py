@@ -0,0 +1,251 @@
+import json
+import os
+import re
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.schemas import OrderItemCreate
+from app.db.archive import archive_batch
+from app.db.partitions import PARTITIONED_TABLES, list_partitions
+from app.metrics.lag import ProcessingLagCollector
+from app.services.orders import create_order, get_order
+from consumer.services.order_processor import OrderProcessor
+from consumer.services.sweeper import StuckOrderSweeper
+from shared.db.models import Order
+
+# Проверки ниже идут на SQLite (EXPLAIN QUERY PLAN) и ловят только отсутствие подходящего индекса.
+# Выбор индекса планировщиком Postgres и отсечение партиций проверяют тесты с меткой postgres:
+# они запускаются при TEST_POSTGRES_URL, указывающем на базу после alembic upgrade head
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL", "")
+
+# Скан частичного индекса по необработанным заказам читает только бэклог, а не всю таблицу
+FULL_SCAN = re.compile(r"\bSCAN (orders|order_items)\b(?! USING (COVERING )?INDEX ix_orders_unprocessed_)")
+
+
+@asynccontextmanager
+async def capture_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def full_scans(engine, statements):
+    scans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            for row in result:
+                if FULL_SCAN.search(row[-1]):
+                    scans.append((statement, row[-1]))
+    return scans
+
+
+async def seed_orders(session, count=20):
+    for _ in range(count):
+        await create_order(
+            session,
+            customer_id=uuid.uuid4(),
+            items=[
+                OrderItemCreate(product_id=uuid.uuid4(), quantity=1, price=Decimal("10.00")),
+                OrderItemCreate(product_id=uuid.uuid4(), quantity=2, price=Decimal("5.00")),
+            ],
+        )
+
+
+@pytest.mark.asyncio
+async def test_create_order_plan_uses_indexes(test_db_engine, async_session):
+    await seed_orders(async_session)
+
+    async with capture_statements(test_db_engine) as statements:
+        await create_order(
+            async_session,
+            customer_id=uuid.uuid4(),
+            items=[OrderItemCreate(product_id=uuid.uuid4(), quantity=1, price=Decimal("1.00"))],
+        )
+
+    assert statements
+    assert await full_scans(test_db_engine, statements) == []
+
+
+@pytest.mark.asyncio
+async def test_get_order_plan_uses_indexes(test_db_engine, async_session):
+    await seed_orders(async_session)
+    order = await create_order(
+        async_session,
+        customer_id=uuid.uuid4(),
+        items=[OrderItemCreate(product_id=uuid.uuid4(), quantity=1, price=Decimal("1.00"))],
+    )
+    async_session.expunge_all()
+
+    async with capture_statements(test_db_engine) as statements:
+        assert await get_order(async_session, order.id) is not None
+
+    assert statements
+    assert await full_scans(test_db_engine, statements) == []
+
+
+@pytest.mark.asyncio
+async def test_order_processor_plan_uses_indexes(test_db_engine, async_session):
+    await seed_orders(async_session)
+    order = await create_order(async_session, customer_id=uuid.uuid4(), items=[])
+
+    async with capture_statements(test_db_engine) as statements:
+        await OrderProcessor().process(async_session, order.id)
+
+    assert any(statement.startswith("UPDATE") for statement, _ in statements)
+    assert await full_scans(test_db_engine, statements) == []
+
+
+@pytest.mark.asyncio
+async def test_processing_lag_plan_uses_indexes(test_db_engine, async_session):
+    await seed_orders(async_session)
+    session_factory = async_sessionmaker(test_db_engine, class_=AsyncSession, expire_on_commit=False)
+    collector = ProcessingLagCollector(session_factory)
+    collector._watermark = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    async with capture_statements(test_db_engine) as statements:
+        await collector.collect_once()
+
+    assert statements
+    assert await full_scans(test_db_engine, statements) == []
+
+
+@pytest.mark.asyncio
+async def test_backlog_query_reads_only_the_partial_index(test_db_engine, async_session):
+    await seed_orders(async_session)
+    session_factory = async_sessionmaker(test_db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with capture_statements(test_db_engine) as statements:
+        await ProcessingLagCollector(session_factory).collect_once()
+
+    backlog = [(statement, parameters) for statement, parameters in statements if "count(" in statement]
+    assert backlog
+    async with test_db_engine.connect() as conn:
+        plan = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {backlog[0][0]}", backlog[0][1])
+        assert "ix_orders_unprocessed_created_at" in " ".join(row[-1] for row in plan)
+
+
+@pytest.mark.asyncio
+async def test_sweeper_pages_through_the_partial_index(test_db_engine, async_session):
+    now = datetime.now(timezone.utc)
+    async_session.add_all([
+        Order(customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("1.00"), created_at=now - timedelta(minutes=index))
+        for index in range(20)
+    ])
+    await async_session.commit()
+    session_factory = async_sessionmaker(test_db_engine, class_=AsyncSession, expire_on_commit=False)
+    sweeper = StuckOrderSweeper(session_factory, AsyncMock(), timedelta(0), batch_size=5, max_rate=1e9)
+
+    async with capture_statements(test_db_engine) as statements:
+        assert await sweeper.sweep_once(now=now + timedelta(seconds=1)) == 20
+
+    pages = [statement for statement in statements if statement[0].lstrip().startswith("SELECT orders.id")]
+    assert len(pages) == 5
+    assert await full_scans(test_db_engine, statements) == []
+
+
+@pytest.mark.asyncio
+async def test_plan_check_detects_full_scans(test_db_engine, async_session):
+    await seed_orders(async_session)
+
+    scans = await full_scans(test_db_engine, [("SELECT * FROM order_items WHERE quantity = ?", (1,))])
+
+    assert scans
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def postgres_plan_problems(conn, statements, pruned=False):
+    partitions = {table: set(await list_partitions(conn, table)) for table, _ in PARTITIONED_TABLES}
+    problems = []
+    for statement, parameters in statements:
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nodes = list(plan_nodes(plan[0]["Plan"]))
+        problems += [
+            (statement, f"Seq Scan on {node['Relation Name']}") for node in nodes if node["Node Type"] == "Seq Scan"
+        ]
+        if pruned:
+            scanned = {node.get("Relation Name") for node in nodes}
+            problems += [
+                (statement, f"no partition pruning on {table}")
+                for table, children in partitions.items()
+                if len(children) > 1 and children <= scanned
+            ]
+    return problems
+
+
+@pytest.fixture
+async def postgres_session():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        # На нескольких строках Seq Scan дешевле любого индекса: запрещаем его, и он останется
+        # в плане только там, где подходящего индекса нет
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        async with AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint") as session:
+            yield session
+        await transaction.rollback()
+    await engine.dispose()
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_postgres_order_lookups_use_indexes_and_prune_partitions(postgres_session):
+    conn = await postgres_session.connection()
+    await seed_orders(postgres_session)
+    order = await create_order(
+        postgres_session,
+        customer_id=uuid.uuid4(),
+        items=[OrderItemCreate(product_id=uuid.uuid4(), quantity=1, price=Decimal("1.00"))],
+    )
+    postgres_session.expunge_all()
+
+    async with capture_statements(conn.engine) as statements:
+        assert await get_order(postgres_session, order.id) is not None
+        await OrderProcessor().process(postgres_session, order.id)
+        await archive_batch(postgres_session, datetime.now(timezone.utc) - timedelta(days=90), None, 100)
+
+    assert statements
+    assert await postgres_plan_problems(conn, statements, pruned=True) == []
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_postgres_backlog_queries_use_indexes(postgres_session):
+    conn = await postgres_session.connection()
+    await seed_orders(postgres_session)
+    def session_factory():
+        return AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+
+    sweeper = StuckOrderSweeper(session_factory, AsyncMock(), timedelta(0), batch_size=5, max_rate=1e9)
+    collector = ProcessingLagCollector(session_factory)
+
+    async with capture_statements(conn.engine) as statements:
+        await collector.collect_once()
+        await sweeper.sweep_once(now=datetime.now(timezone.utc) + timedelta(seconds=1))
+
+    assert statements
+    assert await postgres_plan_problems(conn, statements) == []
@@ -0,0 +1,91 @@
+import pytest
+import uuid
+from decimal import Decimal
+from sqlalchemy import select
+
+from app.api.schemas import OrderItemCreate
+from app.db.snapshots import check_snapshots
+from app.services.orders import create_order, get_order
+from shared.db.models import Order, OrderItem
+
+
+async def make_order(session, *prices):
+    return await create_order(
+        session,
+        uuid.uuid4(),
+        [OrderItemCreate(product_id=uuid.uuid4(), quantity=1, price=Decimal(price)) for price in prices],
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_order_reads_snapshot_written_on_create(session_factory):
+    async with session_factory() as session:
+        created = await make_order(session, "10.00", "5.50")
+
+    async with session_factory() as session:
+        order = await get_order(session, created.id)
+        items = await session.execute(select(OrderItem).where(OrderItem.order_id == created.id))
+        expected = sorted((item.product_id, item.price) for item in items.scalars())
+
+    assert sorted((item["product_id"], item["price"]) for item in order.items) == expected
+
+
+@pytest.mark.asyncio
+async def test_get_order_falls_back_to_items_without_snapshot(session_factory):
+    async with session_factory() as session:
+        created = await make_order(session, "7.00")
+        order = await session.get(Order, created.id)
+        order.items_snapshot = None
+        await session.commit()
+
+    async with session_factory() as session:
+        order = await get_order(session, created.id)
+
+    assert [item["price"] for item in order.items] == [Decimal("7.00")]
+
+
+@pytest.mark.asyncio
+async def test_check_snapshots_reports_consistent_orders(session_factory):
+    async with session_factory() as session:
+        for _ in range(3):
+            await make_order(session, "1.00", "2.00")
+
+    result = await check_snapshots(session_factory, batch_size=2)
+
+    assert result.checked == 3
+    assert result.ok
+
+
+@pytest.mark.asyncio
+async def test_check_snapshots_finds_and_repairs_drift(session_factory):
+    async with session_factory() as session:
+        stale = await make_order(session, "3.00")
+        missing = await make_order(session, "4.00")
+        item = (await session.execute(select(OrderItem).where(OrderItem.order_id == stale.id))).scalar_one()
+        item.quantity = 5
+        (await session.get(Order, missing.id)).items_snapshot = None
+        await session.commit()
+
+    result = await check_snapshots(session_factory)
+
+    assert result.mismatched == [stale.id]
+    assert result.missing == [missing.id]
+    assert not result.ok
+
+    repaired = await check_snapshots(session_factory, repair=True)
+    assert repaired.repaired == 2
+
+    assert (await check_snapshots(session_factory)).ok
+
+
+def test_main_exit_code_reflects_mismatches(mocker):
+    from app.db import snapshots
+
+    mocker.patch.object(snapshots, "check_snapshots", mocker.Mock(return_value="coro"))
+    run = mocker.patch.object(snapshots.asyncio, "run")
+
+    run.return_value = snapshots.CheckResult(checked=2, mismatched=[uuid.uuid4()])
+    assert snapshots.main([]) == 1
+
+    run.return_value = snapshots.CheckResult(checked=2)
+    assert snapshots.main(["--batch-size", "10"]) == 0
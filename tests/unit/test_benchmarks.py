@@ -0,0 +1,27 @@
+import pathlib
+import pytest
+
+from benchmarks import bench_metrics_middleware, bench_runtime
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("variant", bench_metrics_middleware.VARIANTS)
+async def test_metrics_middleware_benchmark_runs(variant):
+    app = bench_metrics_middleware._build(variant)
+
+    assert await bench_metrics_middleware._run(app, requests=5) > 0
+
+
+def test_app_variant_uses_the_real_middleware_stack():
+    from app.main import app as real_app
+
+    app = bench_metrics_middleware._build("app")
+
+    assert [m.cls for m in app.user_middleware] == [m.cls for m in real_app.user_middleware]
+
+
+def test_consumer_runtime_benchmark_runs(monkeypatch):
+    # Тот же путь, что у python -m benchmarks.bench_runtime consumer: отдельный процесс с заглушками
+    monkeypatch.chdir(pathlib.Path(__file__).resolve().parents[2])
+
+    assert bench_runtime.bench_consumer("default", messages=50, concurrency=4) > 0
@@ -0,0 +1,255 @@
+import json
+import pytest
+import uuid
+from unittest.mock import AsyncMock
+
+from app.services import bulk_loader
+from app.services.bulk_loader import (
+    build_order,
+    copy_chunk,
+    csv_header,
+    csv_key,
+    csv_records,
+    load_records,
+    ndjson_records,
+    read_segment,
+    segments,
+)
+from shared.db.status import STATUS_CODES, OrderStatus
+
+
+class FakeConnection:
+    def __init__(self):
+        self.copies = []
+        self.executed = []
+        self.transactions = 0
+
+    def transaction(self):
+        conn = self
+
+        class _Transaction:
+            async def __aenter__(self):
+                conn.transactions += 1
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Transaction()
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copies.append((table, list(records), columns))
+
+    async def executemany(self, query, args):
+        self.executed.append((query, list(args)))
+
+
+def order_record(items=2, status="NEW"):
+    return {
+        "id": str(uuid.uuid4()),
+        "customer_id": str(uuid.uuid4()),
+        "status": status,
+        "created_at": "2025-06-01T10:00:00+00:00",
+        "items": [
+            {"product_id": str(uuid.uuid4()), "quantity": index + 1, "price": "9.99"}
+            for index in range(items)
+        ],
+    }
+
+
+@pytest.fixture
+def ndjson_file(tmp_path):
+    records = [order_record(items=index % 3 + 1) for index in range(50)]
+    path = tmp_path / "orders.ndjson"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return path, records
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    records = [order_record(items=index % 4 + 1) for index in range(40)]
+    lines = [",".join(bulk_loader.CSV_FIELDS + ("price",))]
+    for record in records:
+        for item in record["items"]:
+            lines.append(",".join([
+                record["id"], record["customer_id"], record["status"], record["created_at"],
+                item["product_id"], str(item["quantity"]), item["price"],
+            ]))
+    path = tmp_path / "orders.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return path, records
+
+
+def test_build_order_computes_total_and_time_ordered_ids():
+    record = order_record()
+    record.pop("id")
+
+    order = build_order(record)
+
+    assert order.id.version == 7
+    assert order.currency == "USD"
+    assert order.total_price_minor == 2997
+    assert [item.price_minor for item in order.items] == [999, 999]
+    assert all(item.id.version == 7 for item in order.items)
+
+
+def test_build_order_accepts_minor_units_and_currency():
+    record = order_record(items=1)
+    record["currency"] = "JPY"
+    record["items"][0].pop("price")
+    record["items"][0]["price_minor"] = 1200
+
+    order = build_order(record)
+
+    assert (order.currency, order.total_price_minor) == ("JPY", 1200)
+    record["items"][0] = {"product_id": str(uuid.uuid4()), "quantity": 1, "price": "12.5"}
+    with pytest.raises(ValueError, match="precision"):
+        build_order(record)
+
+
+def test_build_order_rejects_invalid_records():
+    record = order_record()
+    record["items"][0]["quantity"] = 0
+
+    with pytest.raises(ValueError, match="positive"):
+        build_order(record)
+    with pytest.raises(ValueError, match="Invalid order record"):
+        build_order({"items": []})
+    with pytest.raises(ValueError, match="SHIPPED"):
+        build_order(dict(order_record(), status="SHIPPED"))
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 7, 64])
+def test_ndjson_segments_cover_every_order_once(ndjson_file, workers):
+    path, records = ndjson_file
+
+    loaded = []
+    for start, end in segments(path.stat().st_size, workers):
+        loaded += [record["id"] for record in ndjson_records(read_segment(str(path), start, end))]
+
+    assert loaded == [record["id"] for record in records]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 5, 16, 200])
+def test_csv_segments_never_split_an_order(csv_file, workers):
+    path, records = csv_file
+    header, data_start = csv_header(str(path))
+
+    loaded = []
+    for start, end in segments(path.stat().st_size, workers, data_start):
+        lines = read_segment(str(path), start, end, data_start, csv_key(header))
+        loaded += list(csv_records(lines, header))
+
+    assert [record["id"] for record in loaded] == [record["id"] for record in records]
+    assert [len(record["items"]) for record in loaded] == [len(record["items"]) for record in records]
+
+
+def test_csv_header_requires_columns(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("order_id,price\n")
+
+    with pytest.raises(ValueError, match="missing columns"):
+        csv_header(str(path))
+
+    path.write_text("order_id,customer_id,product_id,quantity\n")
+    with pytest.raises(ValueError, match="price or price_minor"):
+        csv_header(str(path))
+
+
+@pytest.mark.asyncio
+async def test_copy_chunk_writes_orders_then_items_in_one_transaction():
+    conn = FakeConnection()
+    order = build_order(order_record(items=2))
+
+    await copy_chunk(conn, [order])
+
+    assert conn.transactions == 1
+    (orders_table, orders, order_columns), (items_table, items, item_columns) = conn.copies
+    assert orders_table == "orders" and items_table == "order_items"
+    assert dict(zip(order_columns, orders[0]))["total_price_minor"] == order.total_price_minor
+    assert dict(zip(order_columns, orders[0]))["status"] == STATUS_CODES[OrderStatus.NEW]
+    assert json.loads(dict(zip(order_columns, orders[0]))["items_snapshot"])[0]["id"] == str(order.items[0].id)
+    assert [row[1] for row in items] == [order.id, order.id]
+    assert item_columns == bulk_loader.ITEM_COLUMNS
+
+
+@pytest.mark.asyncio
+async def test_copy_chunk_adds_processed_orders_to_customer_stats():
+    conn = FakeConnection()
+    customer = str(uuid.uuid4())
+    records = [order_record(items=1, status="PROCESSED") for _ in range(3)] + [order_record(items=1)]
+    for record in records:
+        record["customer_id"] = customer
+    records[1]["created_at"] = "2025-07-01T10:00:00+00:00"
+    records[2]["currency"] = "EUR"
+    orders = [build_order(record) for record in records]
+
+    await copy_chunk(conn, orders)
+
+    assert conn.transactions == 1
+    (query, rows), = conn.executed
+    assert query is bulk_loader.UPSERT_CUSTOMER_STATS
+    assert sorted(rows) == sorted([
+        (uuid.UUID(customer), "EUR", 1, 999, orders[2].created_at),
+        (uuid.UUID(customer), "USD", 2, 1998, orders[1].created_at),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_copy_chunk_skips_stats_without_processed_orders():
+    conn = FakeConnection()
+
+    await copy_chunk(conn, [build_order(order_record(items=1))])
+
+    assert conn.executed == []
+
+
+@pytest.mark.asyncio
+async def test_load_records_chunks_and_publishes_new_orders():
+    conn = FakeConnection()
+    producer = AsyncMock()
+    records = [order_record(items=1) for _ in range(4)] + [order_record(items=1, status="PROCESSED")]
+
+    stats = await load_records(conn, records, chunk_size=2, producer=producer)
+
+    assert stats == {"orders": 5, "items": 5, "events": 4}
+    assert conn.transactions == 3
+    published = [order_id for call in producer.publish_orders_created.await_args_list for order_id, _, _ in call.args[0]]
+    assert [str(order_id) for order_id in published] == [record["id"] for record in records[:4]]
+
+
+@pytest.mark.asyncio
+async def test_load_segment_uses_asyncpg_connection(mocker, csv_file):
+    path, records = csv_file
+    conn = FakeConnection()
+    conn.close = AsyncMock()
+    mocker.patch.object(bulk_loader.asyncpg, "connect", AsyncMock(return_value=conn))
+
+    stats = await bulk_loader.load_segment("postgresql://db", str(path), "csv", 0, path.stat().st_size, 100, False)
+
+    assert stats["orders"] == len(records)
+    conn.close.assert_awaited_once()
+
+
+def test_main_splits_file_between_workers(mocker, ndjson_file):
+    path, records = ndjson_file
+
+    class InlinePool:
+        def __init__(self, max_workers):
+            self.max_workers = max_workers
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def map(self, func, jobs):
+            return [{"orders": 1, "items": 2, "events": 0} for _ in jobs]
+
+    mocker.patch.object(bulk_loader, "ProcessPoolExecutor", InlinePool)
+
+    totals = bulk_loader.main([str(path), "--workers", "3"])
+
+    assert totals == {"orders": 3, "items": 6, "events": 0}
+    assert bulk_loader.detect_format("orders.csv") == "csv"
+    assert bulk_loader.asyncpg_dsn("postgresql+asyncpg://u@h/db") == "postgresql://u@h/db"
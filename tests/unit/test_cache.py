@@ -0,0 +1,30 @@
+from app.services import cache
+from app.services.cache import TTLCache
+
+
+def test_ttl_cache_expires_entries(mocker):
+    now = mocker.patch.object(cache.time, "monotonic", return_value=100.0)
+    ttl_cache = TTLCache(ttl=5, max_entries=10)
+
+    ttl_cache.set("a", 1)
+    assert ttl_cache.get("a") == 1
+
+    now.return_value = 105.0
+    assert ttl_cache.get("a") is None
+    assert len(ttl_cache) == 0
+
+
+def test_ttl_cache_evicts_oldest_entries():
+    ttl_cache = TTLCache(ttl=60, max_entries=2)
+
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.set("a", 3)
+    ttl_cache.set("c", 4)
+
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 3
+    assert ttl_cache.get("c") == 4
+
+    ttl_cache.clear()
+    assert ttl_cache.get("a") is None
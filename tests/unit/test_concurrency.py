@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from consumer.messaging.concurrency import (
+    AdaptiveConcurrencyController,
+    AdjustableLimiter,
+    HandlerStats,
+)
+from consumer.metrics.prometheus import CONCURRENCY_ADJUSTMENTS, CONCURRENCY_LIMIT
+
+
+def make_consumer(limit=10, queue_depth=None):
+    consumer = MagicMock()
+    consumer.concurrency = limit
+    consumer.queue_depth = queue_depth
+    consumer.stats = HandlerStats()
+    consumer.set_concurrency = AsyncMock()
+    return consumer
+
+
+def make_controller(consumer, **kwargs):
+    params = dict(
+        min_limit=2,
+        max_limit=20,
+        target_db_latency=0.1,
+        max_error_rate=0.1,
+        increase_step=1,
+        decrease_factor=0.5,
+    )
+    params.update(kwargs)
+    return AdaptiveConcurrencyController(consumer, **params)
+
+
+@pytest.mark.asyncio
+async def test_limiter_blocks_above_limit():
+    limiter = AdjustableLimiter(1)
+    entered = []
+
+    async def worker(name):
+        async with limiter:
+            entered.append(name)
+            await asyncio.sleep(0.01)
+
+    first = asyncio.create_task(worker("a"))
+    second = asyncio.create_task(worker("b"))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert entered == ["a"]
+    assert limiter.active == 1
+
+    await asyncio.gather(first, second)
+    assert entered == ["a", "b"]
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_raising_limit_releases_waiters():
+    limiter = AdjustableLimiter(1)
+    await limiter.__aenter__()
+
+    waiter = asyncio.create_task(limiter.__aenter__())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await limiter.set_limit(2)
+    await asyncio.wait_for(waiter, timeout=1)
+
+    assert limiter.active == 2
+    assert limiter.limit == 2
+
+
+def test_handler_stats_drain_resets_window():
+    stats = HandlerStats()
+    stats.record(0.01, ok=True)
+    stats.record(None, ok=False)
+
+    latencies, total, errors = stats.drain()
+
+    assert latencies == [0.01]
+    assert total == 2
+    assert errors == 1
+    assert stats.drain() == ([], 0, 0)
+
+
+def test_decide_increases_on_backlog():
+    controller = make_controller(make_consumer())
+
+    assert controller.decide(10, [0.01], 100, 0, queue_depth=50) == (11, "backlog")
+
+
+def test_decide_holds_without_backlog():
+    controller = make_controller(make_consumer())
+
+    assert controller.decide(10, [0.01], 100, 0, queue_depth=0) == (10, None)
+    assert controller.decide(10, [], 0, 0, queue_depth=None) == (10, None)
+
+
+def test_decide_decreases_on_db_latency():
+    controller = make_controller(make_consumer())
+
+    assert controller.decide(10, [0.5] * 10, 10, 0, queue_depth=50) == (5, "db_latency")
+
+
+def test_decide_decreases_on_errors():
+    controller = make_controller(make_consumer())
+
+    assert controller.decide(10, [0.01], 10, 5, queue_depth=50) == (5, "errors")
+
+
+def test_decide_respects_bounds():
+    controller = make_controller(make_consumer())
+
+    assert controller.decide(20, [0.01], 10, 0, queue_depth=50) == (20, "backlog")
+    assert controller.decide(3, [1.0], 10, 0, queue_depth=0) == (2, "db_latency")
+
+
+@pytest.mark.asyncio
+async def test_tick_applies_and_records_adjustment():
+    consumer = make_consumer(limit=10, queue_depth=100)
+    consumer.stats.record(0.01, ok=True)
+    controller = make_controller(consumer)
+
+    before = CONCURRENCY_ADJUSTMENTS.labels("up", "backlog")._value.get()
+
+    assert await controller.tick() == 11
+
+    consumer.set_concurrency.assert_called_once_with(11)
+    assert CONCURRENCY_ADJUSTMENTS.labels("up", "backlog")._value.get() == before + 1
+    assert CONCURRENCY_LIMIT._value.get() == 11
+
+
+@pytest.mark.asyncio
+async def test_tick_without_change_does_not_touch_consumer():
+    consumer = make_consumer(limit=10, queue_depth=0)
+    controller = make_controller(consumer)
+
+    assert await controller.tick() == 10
+
+    consumer.set_concurrency.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_consumer_set_concurrency_updates_prefetch(mock_rabbitmq):
+    from consumer.messaging.consumer import OrderConsumer
+    from consumer.metrics.prometheus import BATCH_SIZE
+
+    mock_rabbitmq['channel'].declare_queue = AsyncMock(return_value=AsyncMock())
+    consumer = OrderConsumer()
+    await consumer.start()
+
+    await consumer.set_concurrency(4)
+
+    assert consumer.concurrency == 4
+    mock_rabbitmq['channel'].set_qos.assert_called_with(prefetch_count=4)
+    assert BATCH_SIZE._value.get() == 4
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import MagicMock
+from httpx import AsyncClient, ASGITransport
+
+from consumer.health.server import create_health_app
+
+
+@pytest.mark.asyncio
+async def test_ready_returns_503_when_consumer_not_ready():
+    consumer = MagicMock(is_ready=False)
+    app = create_health_app(consumer)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "not ready"}
+
+
+@pytest.mark.asyncio
+async def test_ready_returns_200_when_consumer_ready():
+    consumer = MagicMock(is_ready=True)
+    app = create_health_app(consumer)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+
+@pytest.mark.asyncio
+async def test_health_endpoint():
+    app = create_health_app(MagicMock(is_ready=False))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/health")
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_consumer_metrics():
+    app = create_health_app(MagicMock(is_ready=True))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics/")
+
+    assert response.status_code == 200
+    assert "consumer_messages_received_total" in response.text
+    assert "consumer_queue_depth" in response.text
+
+
+def test_health_server_leaves_signals_to_consumer():
+    import signal
+
+    from consumer.health.server import health_server
+
+    before = signal.getsignal(signal.SIGTERM)
+    server = health_server(MagicMock(is_ready=True))
+    server.install_signal_handlers()
+
+    assert signal.getsignal(signal.SIGTERM) is before
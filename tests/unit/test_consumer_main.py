@@ -0,0 +1,61 @@
+import asyncio
+import os
+import signal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import consumer.main
+
+
+class FakeHealthServer:
+    def __init__(self):
+        self.should_exit = False
+
+    async def serve(self):
+        while not self.should_exit:
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def fake_consumer(mocker):
+    instance = MagicMock(start=AsyncMock(), close=AsyncMock())
+    mocker.patch("consumer.main.OrderConsumer", return_value=instance)
+    mocker.patch("consumer.main.health_server", return_value=FakeHealthServer())
+    return instance
+
+
+@pytest.mark.asyncio
+async def test_sigterm_closes_consumer_and_stops_background_tasks(fake_consumer, mocker):
+    cancelled = []
+
+    async def poller():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            # Задачи гасятся уже после закрытия consumer'а
+            cancelled.append(fake_consumer.close.await_count)
+            raise
+
+    mocker.patch("consumer.main.background_tasks", return_value=[poller()])
+
+    main = asyncio.create_task(consumer.main.main())
+    await asyncio.sleep(0.05)
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.wait_for(main, timeout=2)
+
+    assert cancelled == [1]
+    fake_consumer.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_background_task_shuts_down_and_reraises(fake_consumer, mocker):
+    async def broken():
+        raise RuntimeError("poller crashed")
+
+    mocker.patch("consumer.main.background_tasks", return_value=[broken()])
+
+    with pytest.raises(RuntimeError, match="poller crashed"):
+        await asyncio.wait_for(consumer.main.main(), timeout=2)
+
+    fake_consumer.close.assert_awaited_once()
@@ -0,0 +1,100 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from consumer.services.order_processor import OrderProcessor
+from consumer.services.pipeline import Pipeline, Stage
+from shared.clock import as_utc
+from shared.db.models import CustomerOrderStats, Order
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+async def add_order(session_factory, customer_id, amount_minor, currency="USD", created_at=NOW):
+    async with session_factory() as session:
+        order = Order(
+            customer_id=customer_id,
+            status="NEW",
+            total_price_minor=amount_minor,
+            currency=currency,
+            created_at=created_at,
+        )
+        session.add(order)
+        await session.commit()
+        return order.id
+
+
+async def process(session_factory, order_id, processor=None):
+    async with session_factory() as session:
+        await (processor or OrderProcessor(customer_stats=True)).process(session, order_id)
+
+
+async def load_stats(session_factory, customer_id, currency="USD"):
+    async with session_factory() as session:
+        return await session.get(CustomerOrderStats, (customer_id, currency))
+
+
+@pytest.mark.asyncio
+async def test_processing_increments_stats_in_the_same_transaction(session_factory):
+    customer_id = uuid.uuid4()
+    for amount, created_at in ((1000, NOW - timedelta(hours=1)), (250, NOW), (750, NOW - timedelta(days=3))):
+        await process(session_factory, await add_order(session_factory, customer_id, amount, created_at=created_at))
+
+    stats = await load_stats(session_factory, customer_id)
+    assert stats.order_count == 3
+    assert stats.total_spent_minor == 2000
+    assert stats.total_spent == Decimal("20.00")
+    assert as_utc(stats.last_order_at) == NOW
+
+
+@pytest.mark.asyncio
+async def test_currencies_are_aggregated_separately(session_factory):
+    customer_id = uuid.uuid4()
+    for amount, currency in ((1000, "USD"), (1500, "JPY"), (250, "USD")):
+        await process(session_factory, await add_order(session_factory, customer_id, amount, currency))
+
+    usd = await load_stats(session_factory, customer_id, "USD")
+    jpy = await load_stats(session_factory, customer_id, "JPY")
+    assert (usd.order_count, usd.total_spent_minor) == (2, 1250)
+    assert (jpy.order_count, jpy.total_spent) == (1, Decimal("1500"))
+
+
+@pytest.mark.asyncio
+async def test_redelivery_is_not_counted_twice(session_factory):
+    customer_id = uuid.uuid4()
+    order_id = await add_order(session_factory, customer_id, 1200)
+
+    await process(session_factory, order_id)
+    async with session_factory() as session:
+        processed_at = (await session.get(Order, order_id)).processed_at
+    await process(session_factory, order_id)
+
+    async with session_factory() as session:
+        assert (await session.get(Order, order_id)).processed_at == processed_at
+    assert (await load_stats(session_factory, customer_id)).order_count == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_delivery_loses_the_conditional_update(session_factory):
+    customer_id = uuid.uuid4()
+    order_id = await add_order(session_factory, customer_id, 500)
+
+    async def concurrent_delivery(context, inputs):
+        # Вторая доставка того же заказа успевает закоммитить, пока первая ещё в пайплайне
+        await process(session_factory, order_id)
+
+    slow = OrderProcessor(Pipeline([Stage("concurrent", concurrent_delivery)]), customer_stats=True)
+    await process(session_factory, order_id, slow)
+
+    stats = await load_stats(session_factory, customer_id)
+    assert (stats.order_count, stats.total_spent_minor) == (1, 500)
+
+
+@pytest.mark.asyncio
+async def test_stats_can_be_disabled(session_factory):
+    customer_id = uuid.uuid4()
+
+    await process(session_factory, await add_order(session_factory, customer_id, 100), OrderProcessor())
+
+    assert await load_stats(session_factory, customer_id) is None
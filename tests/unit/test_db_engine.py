@@ -0,0 +1,115 @@
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from shared.db.engine import (
+    InstrumentedQueuePool,
+    build_engine,
+    engine_options,
+    instrument_pool,
+    instrumented_pool_class,
+)
+from shared.db.metrics import (
+    POOL_CHECKED_OUT,
+    POOL_CHECKOUT_WAIT,
+    POOL_SIZE,
+)
+
+
+def make_settings(**overrides):
+    values = dict(
+        database_url="postgresql+asyncpg://orders:orders@db:5432/orders",
+        db_pool_size=7,
+        db_max_overflow=3,
+        db_pool_timeout=5.0,
+        db_pool_recycle=600,
+        db_pool_pre_ping=True,
+        db_statement_cache_size=50,
+        db_pgbouncer_mode=False,
+        db_slow_query_seconds=0.5,
+        db_slow_query_sample_rate=1.0,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_engine_options_for_postgres():
+    options = engine_options(make_settings(), "api")
+
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_timeout"] == 5.0
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {
+        "statement_cache_size": 50,
+        "prepared_statement_cache_size": 50,
+    }
+    assert issubclass(options["poolclass"], InstrumentedQueuePool)
+
+
+def test_engine_options_for_pgbouncer():
+    options = engine_options(make_settings(db_pgbouncer_mode=True), "api")
+    connect_args = options["connect_args"]
+
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func()
+
+
+def test_engine_options_skip_pool_tuning_for_sqlite():
+    assert engine_options(make_settings(database_url="sqlite+aiosqlite:///:memory:"), "api") == {}
+
+
+def test_instrumented_pool_class_keeps_label():
+    pool_class = instrumented_pool_class("consumer")
+
+    assert pool_class.metrics_label == "consumer"
+    assert instrumented_pool_class("consumer") is pool_class
+
+
+def test_build_engine_uses_settings():
+    engine = build_engine(make_settings(), "unit")
+
+    assert engine.sync_engine.pool.size() == 7
+    assert type(engine.sync_engine.pool).metrics_label == "unit"
+    assert POOL_SIZE.labels("unit")._value.get() == 7
+
+
+def test_app_and_consumer_engines_are_instrumented():
+    from app.db.session import engine as app_engine
+    from consumer.db.session import engine as consumer_engine
+
+    assert type(app_engine.sync_engine.pool).metrics_label == "api"
+    assert type(consumer_engine.sync_engine.pool).metrics_label == "consumer"
+
+
+@pytest.mark.asyncio
+async def test_pool_events_update_metrics(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class("sqlite-test"),
+        pool_size=2,
+    )
+    instrument_pool(engine, "sqlite-test")
+    waits_before = POOL_CHECKOUT_WAIT.labels("sqlite-test")._sum.get()
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert POOL_CHECKED_OUT.labels("sqlite-test")._value.get() == 1
+
+    assert POOL_CHECKED_OUT.labels("sqlite-test")._value.get() == 0
+    assert POOL_CHECKOUT_WAIT.labels("sqlite-test")._sum.get() > waits_before
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_instrument_pool_ignores_pools_without_counters():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+
+    instrument_pool(engine, "static")
+
+    await engine.dispose()
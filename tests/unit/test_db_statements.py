@@ -0,0 +1,99 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from shared.db import statements
+from shared.db.metrics import SLOW_STATEMENTS, STATEMENT_DURATION
+from shared.db.statements import fingerprint, instrument_statements, normalize, statement_source
+
+
+def test_normalize_replaces_literals_and_placeholders():
+    assert normalize(
+        "SELECT orders.id FROM orders\n  WHERE orders.id = $1::UUID AND status = 1 AND note = 'it''s'"
+    ) == "SELECT orders.id FROM orders WHERE orders.id = ?::UUID AND status = ? AND note = ?"
+    assert normalize("SELECT * FROM orders_2026_01 WHERE price > -1.5 AND x = %(x)s") == (
+        "SELECT * FROM orders_2026_01 WHERE price > ? AND x = ?"
+    )
+
+
+def test_normalize_collapses_lists_and_rows():
+    assert normalize("SELECT * FROM orders WHERE id IN ($1, $2, $3)") == "SELECT * FROM orders WHERE id IN (?)"
+    assert normalize("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+
+
+def test_fingerprint_ignores_list_length():
+    short = fingerprint("SELECT * FROM orders WHERE id IN (?, ?)")
+    long = fingerprint("SELECT * FROM orders WHERE id IN (?, ?, ?, ?, ?)")
+
+    assert short == long
+    assert short[0] == "SELECT"
+    assert fingerprint("VACUUM orders")[0] == "other"
+    assert fingerprint("SELECT 1") != fingerprint("SELECT * FROM orders")
+
+
+@pytest.mark.asyncio
+async def test_instrument_statements_times_and_logs_slow_statements(caplog):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_statements(engine, "statements-test", slow_seconds=0, sample_rate=1.0)
+    _, digest = fingerprint("SELECT 42")
+    before = STATEMENT_DURATION.labels("statements-test", "SELECT", digest)._sum.get()
+    slow_before = SLOW_STATEMENTS.labels("statements-test", digest)._value.get()
+
+    token = statement_source.set("GET /orders/{order_id}")
+    try:
+        with caplog.at_level(logging.WARNING, logger="shared.db.statements"):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 42"))
+    finally:
+        statement_source.reset(token)
+
+    assert STATEMENT_DURATION.labels("statements-test", "SELECT", digest)._sum.get() > before
+    assert SLOW_STATEMENTS.labels("statements-test", digest)._value.get() == slow_before + 1
+    assert "source=GET /orders/{order_id}" in caplog.text
+    assert f"fingerprint={digest}" in caplog.text
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_instrument_statements_samples_slow_log(caplog):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_statements(engine, "sampled-test", slow_seconds=0, sample_rate=0.0)
+    _, digest = fingerprint("SELECT 7")
+    slow_before = SLOW_STATEMENTS.labels("sampled-test", digest)._value.get()
+
+    with caplog.at_level(logging.WARNING, logger="shared.db.statements"):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 7"))
+
+    assert SLOW_STATEMENTS.labels("sampled-test", digest)._value.get() == slow_before + 1
+    assert "Slow statement" not in caplog.text
+
+    await engine.dispose()
+
+
+def test_fingerprint_labels_are_capped(monkeypatch):
+    monkeypatch.setattr(statements, "_known", set())
+    monkeypatch.setattr(statements, "MAX_FINGERPRINTS", 1)
+
+    first = statements._label(fingerprint("SELECT a FROM t")[1], "SELECT a FROM t")
+
+    assert first != "other"
+    assert statements._label(fingerprint("SELECT b FROM t")[1], "SELECT b FROM t") == "other"
+    assert statements._label(first, "SELECT a FROM t") == first
+
+
+def test_new_fingerprint_is_logged_once(monkeypatch, caplog):
+    monkeypatch.setattr(statements, "_known", set())
+    statement = "SELECT orders.id FROM orders WHERE orders.id = $1"
+    _, digest = fingerprint(statement)
+
+    with caplog.at_level(logging.INFO, logger="shared.db.statements"):
+        for _ in range(3):
+            assert statements._label(digest, statement) == digest
+
+    assert [record.getMessage() for record in caplog.records] == [
+        f"Statement fingerprint {digest}: SELECT orders.id FROM orders WHERE orders.id = ?"
+    ]
@@ -0,0 +1,90 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from shared.db import ids
+from shared.db.ids import uuid7, uuid7_timestamp
+
+
+def test_uuid7_version_and_variant():
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_is_monotonic_within_process():
+    values = [uuid7() for _ in range(10_000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_uuid7_timestamp_matches_generation_time():
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=5)
+    value = uuid7()
+    after = datetime.now(timezone.utc) + timedelta(milliseconds=5)
+
+    assert before <= uuid7_timestamp(value) <= after
+
+
+def test_uuid7_timestamp_rejects_other_versions():
+    with pytest.raises(ValueError):
+        uuid7_timestamp(uuid.uuid4())
+
+
+def test_uuid7_counter_overflow_advances_timestamp(mocker):
+    mocker.patch.object(ids.time, "time_ns", return_value=1_700_000_000_000 * 1_000_000)
+    mocker.patch.object(ids, "_random_counter", return_value=ids._COUNTER_MAX - 1)
+    mocker.patch.object(ids, "_last_ms", 0)
+
+    first = uuid7()
+    second = uuid7()
+    third = uuid7()
+
+    assert first < second < third
+    assert uuid7_timestamp(third) > uuid7_timestamp(first)
+
+
+@pytest.mark.asyncio
+async def test_models_default_to_uuid7(async_session):
+    from decimal import Decimal
+    from shared.db.models import Order
+
+    order = Order(customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("1.00"))
+    async_session.add(order)
+    await async_session.flush()
+
+    assert order.id.version == 7
+
+
+@pytest.mark.asyncio
+async def test_existing_uuid4_rows_still_load(async_session):
+    from decimal import Decimal
+    from sqlalchemy import select
+    from shared.db.models import Order
+
+    legacy_id = uuid.uuid4()
+    async_session.add(Order(id=legacy_id, customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("1.00")))
+    await async_session.commit()
+
+    result = await async_session.execute(select(Order).where(Order.id == legacy_id))
+
+    assert result.scalar_one().id == legacy_id
+
+
+def test_uuid7_lower_bound_sorts_before_ids_from_that_moment():
+    moment = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    bound = ids.uuid7_lower_bound(moment)
+
+    assert bound.int >> 80 == int(moment.timestamp() * 1000)
+    assert bound < uuid7()
+    assert ids.uuid7_lower_bound(moment - timedelta(milliseconds=1)) < bound
+
+
+def test_uuid7_at_encodes_given_moment():
+    moment = datetime(2024, 5, 17, 12, 30, tzinfo=timezone.utc)
+    value = ids.uuid7_at(moment)
+
+    assert value.version == 7
+    assert uuid7_timestamp(value) == moment
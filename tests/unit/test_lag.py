@@ -0,0 +1,215 @@
+import asyncio
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from app.metrics.lag import (
+    ORDER_PROCESSING_LAG,
+    ORDER_SLO_BURN_RATE,
+    ORDERS_UNPROCESSED,
+    ORDERS_UNPROCESSED_OLDEST_AGE,
+    LEASE_NAME,
+    ProcessingLagCollector,
+)
+from shared.clock import as_utc
+from shared.db.leases import HOLDER
+from shared.db.models import Lease, Order
+
+
+async def _add_processed_order(session, created_at, processed_at):
+    order = Order(
+        customer_id=uuid.uuid4(),
+        status="PROCESSED",
+        total_price=Decimal("10.00"),
+        created_at=created_at,
+        processed_at=processed_at,
+    )
+    session.add(order)
+    await session.commit()
+    return order
+
+
+@pytest.mark.asyncio
+async def test_collect_once_observes_lag(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, now - timedelta(seconds=5), now - timedelta(seconds=3))
+
+    count_before = ORDER_PROCESSING_LAG._sum.get()
+    collector = ProcessingLagCollector(session_factory, slo_seconds=30, slo_target=0.99)
+
+    collected = await collector.collect_once()
+
+    assert collected == 1
+    assert ORDER_PROCESSING_LAG._sum.get() == pytest.approx(count_before + 2, abs=0.01)
+    assert collector.burn_rate == 0.0
+
+
+@pytest.mark.asyncio
+async def test_collect_once_advances_watermark(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, now - timedelta(seconds=5), now - timedelta(seconds=3))
+
+    collector = ProcessingLagCollector(session_factory)
+
+    assert await collector.collect_once() == 1
+    assert await collector.collect_once() == 0
+
+    await _add_processed_order(async_session, now - timedelta(seconds=2), now - timedelta(seconds=1))
+
+    assert await collector.collect_once() == 1
+
+
+@pytest.mark.asyncio
+async def test_collect_once_keeps_orders_sharing_the_watermark_timestamp(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    processed_at = now - timedelta(seconds=3)
+    await _add_processed_order(async_session, now - timedelta(seconds=5), processed_at)
+
+    collector = ProcessingLagCollector(session_factory, batch_size=1)
+    assert await collector.collect_once() == 1
+
+    # Заказ с той же отметкой processed_at, закоммиченный после прошлого опроса
+    await _add_processed_order(async_session, now - timedelta(seconds=4), processed_at)
+
+    assert await collector.collect_once() == 1
+    assert await collector.collect_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_collect_once_pages_through_batches(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        await _add_processed_order(
+            async_session,
+            now - timedelta(seconds=60),
+            now - timedelta(seconds=10 - i),
+        )
+
+    collector = ProcessingLagCollector(session_factory, batch_size=2)
+
+    assert await collector.collect_once() == 5
+
+
+@pytest.mark.asyncio
+async def test_burn_rate_reflects_slo_breaches(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, now - timedelta(seconds=100), now - timedelta(seconds=2))
+    await _add_processed_order(async_session, now - timedelta(seconds=3), now - timedelta(seconds=1))
+
+    collector = ProcessingLagCollector(session_factory, slo_seconds=30, slo_target=0.9)
+    await collector.collect_once()
+
+    assert collector.burn_rate == pytest.approx(5.0)
+    assert ORDER_SLO_BURN_RATE._value.get() == pytest.approx(5.0)
+
+
+@pytest.mark.asyncio
+async def test_buckets_outside_window_are_dropped(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, now - timedelta(seconds=100), now - timedelta(seconds=2))
+
+    collector = ProcessingLagCollector(session_factory, slo_seconds=30, window_seconds=60)
+    await collector.collect_once()
+    assert collector.burn_rate > 0
+
+    _, total, breached = collector._buckets[0]
+    collector._buckets[0] = (now - timedelta(seconds=120), total, breached)
+    await collector.collect_once()
+
+    assert collector.burn_rate == 0.0
+    assert not collector._buckets
+
+
+@pytest.mark.asyncio
+async def test_collect_once_counts_orders_committed_behind_the_watermark(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, now - timedelta(seconds=5), now - timedelta(seconds=1))
+
+    collector = ProcessingLagCollector(session_factory, grace_seconds=30)
+    assert await collector.collect_once() == 1
+
+    # Другой consumer закоммитил заказ позже, но processed_at у него на 50 мс раньше
+    await _add_processed_order(async_session, now - timedelta(seconds=5), now - timedelta(seconds=1.05))
+
+    assert await collector.collect_once() == 1
+    assert await collector.collect_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_collector_ignores_unprocessed_orders(async_session, session_factory):
+    order = Order(
+        customer_id=uuid.uuid4(),
+        status="NEW",
+        total_price=Decimal("10.00"),
+    )
+    async_session.add(order)
+    await async_session.commit()
+
+    collector = ProcessingLagCollector(session_factory)
+
+    assert await collector.collect_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_collect_once_reports_unprocessed_backlog(async_session, session_factory):
+    now = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, now - timedelta(minutes=5), now - timedelta(minutes=4))
+    for minutes in (10, 1):
+        async_session.add(Order(
+            customer_id=uuid.uuid4(),
+            status="NEW",
+            total_price=Decimal("10.00"),
+            created_at=now - timedelta(minutes=minutes),
+        ))
+    await async_session.commit()
+
+    await ProcessingLagCollector(session_factory).collect_once()
+
+    assert ORDERS_UNPROCESSED._value.get() == 2
+    assert ORDERS_UNPROCESSED_OLDEST_AGE._value.get() == pytest.approx(600, abs=5)
+
+
+@pytest.mark.asyncio
+async def test_run_collects_only_while_holding_the_lease(async_session, session_factory, mocker):
+    async_session.add(Lease(
+        name=LEASE_NAME, holder="other-worker:1", expires_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+    ))
+    await async_session.commit()
+    mocker.patch("app.metrics.lag.asyncio.sleep", AsyncMock(side_effect=[None, asyncio.CancelledError()]))
+    collector = ProcessingLagCollector(session_factory)
+    collect_once = mocker.patch.object(collector, "collect_once", AsyncMock())
+
+    with pytest.raises(asyncio.CancelledError):
+        await collector.run(interval=1)
+
+    collect_once.assert_not_called()
+    async with session_factory() as session:
+        lease = await session.get(Lease, LEASE_NAME)
+    assert lease.holder == "other-worker:1"
+
+
+@pytest.mark.asyncio
+async def test_new_leader_does_not_observe_orders_counted_before_takeover(async_session, session_factory, mocker):
+    now = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, now - timedelta(seconds=100), now - timedelta(seconds=2))
+    mocker.patch("app.metrics.lag.asyncio.sleep", AsyncMock(side_effect=asyncio.CancelledError()))
+    sum_before = ORDER_PROCESSING_LAG._sum.get()
+    collector = ProcessingLagCollector(session_factory, slo_seconds=30, slo_target=0.9)
+
+    with pytest.raises(asyncio.CancelledError):
+        await collector.run(interval=1)
+
+    # В окно burn rate заказ попал, а в гистограмму — нет: его уже записал прошлый держатель
+    assert collector.burn_rate == pytest.approx(10.0)
+    assert ORDER_PROCESSING_LAG._sum.get() == sum_before
+
+    processed_at = datetime.now(timezone.utc)
+    await _add_processed_order(async_session, processed_at - timedelta(seconds=4), processed_at)
+    assert await collector.collect_once() == 1
+    assert ORDER_PROCESSING_LAG._sum.get() == pytest.approx(sum_before + 4, abs=0.01)
+    async with session_factory() as session:
+        lease = await session.get(Lease, LEASE_NAME)
+    assert lease.holder == HOLDER
+    assert as_utc(lease.expires_at) <= datetime.now(timezone.utc)
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from shared.db.leases import acquire_lease, release_lease
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+TTL = timedelta(minutes=1)
+
+
+async def _acquire(session_factory, holder, now):
+    async with session_factory() as session:
+        acquired = await acquire_lease(session, "job", TTL, now, holder=holder)
+        await session.commit()
+    return acquired
+
+
+@pytest.mark.asyncio
+async def test_lease_has_one_holder_until_it_expires_or_is_released(session_factory):
+    assert await _acquire(session_factory, "a", NOW)
+    assert not await _acquire(session_factory, "b", NOW + timedelta(seconds=30))
+    # Продление держателем сдвигает срок
+    assert await _acquire(session_factory, "a", NOW + timedelta(seconds=50))
+    assert not await _acquire(session_factory, "b", NOW + timedelta(seconds=90))
+    assert await _acquire(session_factory, "b", NOW + timedelta(seconds=111))
+
+    async with session_factory() as session:
+        await release_lease(session, "job", NOW + timedelta(seconds=112), holder="b")
+        await session.commit()
+    assert await _acquire(session_factory, "a", NOW + timedelta(seconds=113))
+
+
+@pytest.mark.asyncio
+async def test_lease_created_concurrently_by_another_process(session_factory, mocker):
+    assert await _acquire(session_factory, "a", NOW)
+
+    async with session_factory() as session:
+        # Другой процесс вставил строку между нашими UPDATE и SELECT
+        mocker.patch.object(session, "scalar", return_value=None)
+        assert not await acquire_lease(session, "job", TTL, NOW, holder="b")
@@ -1,7 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+from app.main import app, settings
 
 
 def test_app_instance():
@@ -29,3 +29,30 @@ def test_health_endpoint_sync():
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
+
+
+def test_lifespan_starts_and_stops_lag_collector(mocker):
+    started = []
+
+    async def fake_run(self):
+        started.append(self)
+
+    mocker.patch('app.main.ProcessingLagCollector.run', fake_run)
+
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+
+    assert len(started) == 1
+
+
+def test_lifespan_applies_gc_profile_in_the_worker(mocker):
+    mocker.patch('app.main.ProcessingLagCollector.run', mocker.AsyncMock())
+    mocker.patch.object(settings, "runtime_profile", "performance")
+    apply_gc_threshold = mocker.patch('app.main.apply_gc_threshold')
+    freeze_after_startup = mocker.patch('app.main.freeze_after_startup')
+
+    with TestClient(app):
+        pass
+
+    assert apply_gc_threshold.call_args[0][0].gc_gen0_threshold == 50_000
+    freeze_after_startup.assert_called_once_with(apply_gc_threshold.call_args[0][0])
@@ -0,0 +1,116 @@
+import gzip
+import os
+import subprocess
+import sys
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import CollectorRegistry, Counter, generate_latest
+
+from app.metrics.multiprocess import (
+    mark_worker_dead,
+    metrics_registry,
+    reap_dead_workers,
+    reset_multiprocess_dir,
+)
+from app.metrics.prometheus import CachedMetricsApp
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _touch(path, name):
+    open(os.path.join(path, name), "wb").close()
+
+
+def test_metrics_registry_aggregates_workers(tmp_path, monkeypatch):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c",
+             "from app.metrics.prometheus import REQUEST_COUNT; REQUEST_COUNT.labels('GET', '/orders/', '201').inc()"],
+            env=env,
+            check=True,
+        )
+
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    output = generate_latest(metrics_registry()).decode()
+
+    assert 'http_requests_total{method="GET",path="/orders/",status="201"} 2.0' in output
+
+
+def test_metrics_registry_is_global_without_multiprocess_dir(monkeypatch):
+    from prometheus_client import REGISTRY
+
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+
+    assert metrics_registry() is REGISTRY
+
+
+def test_reset_multiprocess_dir_removes_only_metric_files(tmp_path):
+    directory = tmp_path / "prometheus"
+    reset_multiprocess_dir(str(directory))
+    _touch(directory, "counter_123.db")
+    _touch(directory, "README")
+
+    reset_multiprocess_dir(str(directory))
+
+    assert sorted(os.listdir(directory)) == ["README"]
+
+
+def test_reap_dead_workers_clears_live_gauges_of_dead_pids(tmp_path):
+    dead = _dead_pid()
+    for name in (f"gauge_livesum_{dead}.db", f"gauge_livesum_{os.getpid()}.db", f"counter_{dead}.db"):
+        _touch(tmp_path, name)
+
+    assert reap_dead_workers(str(tmp_path)) == [dead]
+    assert sorted(os.listdir(tmp_path)) == sorted([f"counter_{dead}.db", f"gauge_livesum_{os.getpid()}.db"])
+
+
+def test_mark_worker_dead(tmp_path, monkeypatch):
+    _touch(tmp_path, f"gauge_livesum_{os.getpid()}.db")
+
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    mark_worker_dead()
+    assert os.listdir(tmp_path)
+
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    mark_worker_dead()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_cached_metrics_app_serves_cached_output():
+    registry = CollectorRegistry()
+    counter = Counter("cached_total", "Cached", registry=registry)
+    app = CachedMetricsApp(registry, ttl=60)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/", headers={"Accept-Encoding": "identity"})
+        counter.inc()
+        second = await client.get("/", headers={"Accept-Encoding": "identity"})
+        compressed = await client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("text/plain")
+    assert "cached_total 0.0" in first.text
+    assert second.text == first.text
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.text == first.text
+
+
+@pytest.mark.asyncio
+async def test_cached_metrics_app_refreshes_after_ttl():
+    registry = CollectorRegistry()
+    counter = Counter("fresh_total", "Fresh", registry=registry)
+    app = CachedMetricsApp(registry, ttl=0)
+
+    before = gzip.decompress(await app.body(accept_gzip=True))
+    counter.inc()
+    after = await app.body(accept_gzip=False)
+
+    assert b"fresh_total 0.0" in before
+    assert b"fresh_total 1.0" in after
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+import pytest
+
+from shared.money import from_minor, to_minor
+
+
+@pytest.mark.parametrize(
+    "amount, currency, expected",
+    [
+        (Decimal("19.99"), "USD", 1999),
+        (Decimal("19.9"), "EUR", 1990),
+        (Decimal("1500"), "JPY", 1500),
+        (Decimal("1.234"), "KWD", 1234),
+    ],
+)
+def test_to_minor_uses_currency_exponent(amount, currency, expected):
+    assert to_minor(amount, currency) == expected
+
+
+def test_to_minor_rejects_excess_precision():
+    with pytest.raises(ValueError):
+        to_minor(Decimal("0.001"), "USD")
+    with pytest.raises(ValueError):
+        to_minor(Decimal("1.5"), "JPY")
+
+
+def test_from_minor_round_trips():
+    assert from_minor(1999, "USD") == Decimal("19.99")
+    assert str(from_minor(1990, "USD")) == "19.90"
+    assert str(from_minor(1500, "JPY")) == "1500"
+    assert from_minor(to_minor(Decimal("7.125"), "BHD"), "BHD") == Decimal("7.125")
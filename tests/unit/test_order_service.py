@@ -1,33 +1,42 @@
 import pytest
 import uuid
+from types import SimpleNamespace
 from decimal import Decimal
 from unittest.mock import MagicMock
 
-from app.services.orders import calculate_total_price, create_order, get_order
+from app.services.orders import (
+    ARCHIVED_ITEMS_BY_ORDER,
+    ARCHIVED_ORDER_BY_ID,
+    ORDER_BY_ID,
+    OrderRow,
+    calculate_total_price,
+    create_order,
+    get_order,
+)
 from app.api.schemas import OrderItemCreate
 from shared.db.models import Order, OrderItem
 
 
 def test_calculate_total_price_single_item():
     items = [
-        MagicMock(quantity=2, price=Decimal("50.00"))
+        MagicMock(quantity=2, price_minor=5000)
     ]
     
     total = calculate_total_price(items)
     
-    assert total == Decimal("100.00")
+    assert total == 10000
 
 
 def test_calculate_total_price_multiple_items():
     items = [
-        MagicMock(quantity=2, price=Decimal("50.00")),
-        MagicMock(quantity=1, price=Decimal("30.00")),
-        MagicMock(quantity=3, price=Decimal("10.00")),
+        MagicMock(quantity=2, price_minor=5000),
+        MagicMock(quantity=1, price_minor=3000),
+        MagicMock(quantity=3, price_minor=1000),
     ]
     
     total = calculate_total_price(items)
     
-    assert total == Decimal("160.00")  # 100 + 30 + 30
+    assert total == 16000  # 100 + 30 + 30
 
 
 def test_calculate_total_price_empty_list():
@@ -35,17 +44,25 @@ def test_calculate_total_price_empty_list():
     
     total = calculate_total_price(items)
     
-    assert total == Decimal("0")
+    assert total == 0
 
 
 def test_calculate_total_price_decimal_precision():
     items = [
-        MagicMock(quantity=3, price=Decimal("19.99")),
+        MagicMock(quantity=3, price_minor=None, price=Decimal("19.99")),
     ]
     
     total = calculate_total_price(items)
     
-    assert total == Decimal("59.97")
+    assert total == 5997
+
+
+def test_calculate_total_price_uses_currency_exponent():
+    items = [
+        MagicMock(quantity=2, price_minor=None, price=Decimal("1500")),
+    ]
+
+    assert calculate_total_price(items, "JPY") == 3000
 
 
 @pytest.mark.asyncio
@@ -157,26 +174,34 @@ async def test_create_order_correct_status(mock_session):
     assert order.status == "NEW"
 
 
-@pytest.mark.asyncio
-async def test_get_order_existing(mock_session):
-    order_id = uuid.uuid4()
-    
-    mock_order = Order(
-        id=order_id,
+def order_row(**overrides):
+    values = dict(
+        id=uuid.uuid4(),
         customer_id=uuid.uuid4(),
         status="NEW",
-        total_price=Decimal("100.00"),
+        total_price_minor=10000,
+        currency="USD",
+        created_at=None,
+        updated_at=None,
+        items_snapshot=[],
     )
-    mock_order.items = []
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.asyncio
+async def test_get_order_existing(mock_session):
+    row = order_row()
     
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = mock_order
+    mock_result.first.return_value = row
     mock_session.execute.return_value = mock_result
     
-    order = await get_order(mock_session, order_id)
+    order = await get_order(mock_session, row.id)
     
-    assert order is not None
-    assert order.id == order_id
+    assert isinstance(order, OrderRow)
+    assert order.id == row.id
+    assert order.items == []
     mock_session.execute.assert_called_once()
 
 
@@ -185,7 +210,7 @@ async def test_get_order_not_found(mock_session):
     order_id = uuid.uuid4()
     
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = None
+    mock_result.first.return_value = None
     mock_session.execute.return_value = mock_result
     
     order = await get_order(mock_session, order_id)
@@ -196,32 +221,80 @@ async def test_get_order_not_found(mock_session):
 
 @pytest.mark.asyncio
 async def test_get_order_loads_items(mock_session):
-    order_id = uuid.uuid4()
-    
-    mock_order = Order(
-        id=order_id,
-        customer_id=uuid.uuid4(),
-        status="NEW",
-        total_price=Decimal("150.00"),
-    )
-    
-    mock_order.items = [
-        OrderItem(
-            id=uuid.uuid4(),
-            order_id=order_id,
-            product_id=uuid.uuid4(),
-            quantity=2,
-            price=Decimal("75.00"),
-        )
-    ]
+    product_id = uuid.uuid4()
+    row = order_row(total_price_minor=15000, items_snapshot=None)
     
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = mock_order
-    mock_session.execute.return_value = mock_result
+    mock_result.first.return_value = row
+    mock_session.execute.side_effect = [mock_result, [(product_id, 2, 7500)]]
     
-    order = await get_order(mock_session, order_id)
+    order = await get_order(mock_session, row.id)
     
     assert order is not None
-    assert len(order.items) == 1
-    assert isinstance(order.items[0], OrderItem)
+    assert order.total_price == Decimal("150.00")
+    assert order.items == [
+        {"product_id": product_id, "quantity": 2, "price_minor": 7500, "price": Decimal("75.00")}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create_order_writes_items_snapshot(mock_session):
+    customer_id = uuid.uuid4()
+    items = [
+        OrderItemCreate(product_id=uuid.uuid4(), quantity=2, price=Decimal("50.00")),
+        OrderItemCreate(product_id=uuid.uuid4(), quantity=1, price=Decimal("30.00")),
+    ]
+    mock_result = MagicMock()
+    mock_result.scalar_one.side_effect = lambda: mock_session.add.call_args[0][0]
+    mock_session.execute.return_value = mock_result
+
+    order = await create_order(mock_session, customer_id, items)
+
+    created_items = mock_session.add_all.call_args[0][0]
+    assert order.items_snapshot == [
+        {
+            "id": str(item.id),
+            "product_id": str(item.product_id),
+            "quantity": item.quantity,
+            "price_minor": item.price_minor,
+        }
+        for item in created_items
+    ]
+    assert order.total_price_minor == 13000
+    assert [item.price_minor for item in created_items] == [5000, 3000]
+    assert all(item.order_id == order.id for item in created_items)
 
+
+@pytest.mark.asyncio
+async def test_get_order_serves_snapshot_without_loading_items(mock_session):
+    product_id = uuid.uuid4()
+    row = order_row(items_snapshot=[
+        {"id": str(uuid.uuid4()), "product_id": str(product_id), "quantity": 2, "price_minor": 1000}
+    ])
+    mock_result = MagicMock()
+    mock_result.first.return_value = row
+    mock_session.execute.return_value = mock_result
+
+    order = await get_order(mock_session, row.id)
+
+    mock_session.execute.assert_called_once()
+    assert order.items == [
+        {"product_id": product_id, "quantity": 2, "price_minor": 1000, "price": Decimal("10.00")}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_order_uses_prebuilt_statements(mock_session):
+    mock_result = MagicMock()
+    mock_result.first.side_effect = [None, order_row(items_snapshot=None)]
+    mock_session.execute.side_effect = [mock_result, mock_result, []]
+    order_id = uuid.uuid4()
+
+    await get_order(mock_session, order_id, include_archive=True)
+
+    statements = [call.args for call in mock_session.execute.call_args_list]
+    assert statements == [
+        (ORDER_BY_ID, {"order_id": order_id}),
+        (ARCHIVED_ORDER_BY_ID, {"order_id": order_id}),
+        (ARCHIVED_ITEMS_BY_ORDER, {"order_id": order_id}),
+    ]
@@ -0,0 +1,191 @@
+import pytest
+from datetime import date
+
+from app.db import partitions
+from app.db.partitions import (
+    add_months,
+    create_month,
+    maintain,
+    parse_partition_month,
+    partition_bounds,
+    partition_name,
+    retire_month,
+)
+from shared.db.ids import uuid7
+
+
+class FakeResult(list):
+    def all(self):
+        return list(self)
+
+
+class FakeConnection:
+    def __init__(self, partitions=(), stray=0, constraints=()):
+        self.partitions = list(partitions)
+        self.stray = stray
+        self.constraints = list(constraints)
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_inherits" in sql:
+            return FakeResult((name,) for name in self.partitions)
+        if "pg_constraint" in sql:
+            return FakeResult((name,) for name in self.constraints)
+        return FakeResult()
+
+    async def scalar(self, statement, params=None):
+        self.statements.append(str(statement))
+        return self.stray
+
+
+class FakeEngine:
+    def __init__(self, conn):
+        self.conn = conn
+        self.transactions = 0
+
+    def begin(self):
+        engine = self
+
+        class _Begin:
+            async def __aenter__(self):
+                engine.transactions += 1
+                return engine.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Begin()
+
+
+def test_add_months_crosses_year_boundary():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_roundtrip():
+    name = partition_name("orders", date(2026, 3, 1))
+
+    assert name == "orders_p2026_03"
+    assert parse_partition_month("orders", name) == date(2026, 3, 1)
+    assert parse_partition_month("order_items", name) is None
+    assert parse_partition_month("orders", "orders_default") is None
+
+
+def test_partition_bounds_are_contiguous():
+    _, march_upper = partition_bounds(date(2026, 3, 1))
+    april_lower, _ = partition_bounds(date(2026, 4, 1))
+
+    assert march_upper == april_lower
+
+
+def test_new_ids_fall_into_current_month_partition():
+    today = date.today()
+    lower, upper = partition_bounds(today)
+
+    assert lower <= uuid7() < upper
+
+
+@pytest.mark.asyncio
+async def test_create_month_creates_partitions_for_both_tables():
+    conn = FakeConnection(partitions=["orders_default"])
+
+    assert await create_month(conn, date(2026, 3, 15)) is True
+
+    creates = [sql for sql in conn.statements if sql.startswith("CREATE TABLE")]
+    assert creates[0].startswith("CREATE TABLE orders_p2026_03 PARTITION OF orders FOR VALUES FROM")
+    assert creates[1].startswith("CREATE TABLE order_items_p2026_03 PARTITION OF order_items")
+
+
+@pytest.mark.asyncio
+async def test_create_month_skips_existing_partition():
+    conn = FakeConnection(partitions=["orders_default", "orders_p2026_03"])
+
+    assert await create_month(conn, date(2026, 3, 1)) is False
+    assert not any(sql.startswith("CREATE") for sql in conn.statements)
+
+
+@pytest.mark.asyncio
+async def test_create_month_moves_rows_out_of_default_partition():
+    conn = FakeConnection(partitions=["orders_default"], stray=2)
+
+    assert await create_month(conn, date(2026, 3, 1)) is True
+
+    ddl = [sql.split(" WHERE")[0] for sql in conn.statements if not sql.startswith("SELECT")]
+    assert ddl == [
+        "CREATE TABLE orders_p2026_03 (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        "INSERT INTO orders_p2026_03 SELECT * FROM orders_default",
+        "CREATE TABLE order_items_p2026_03 (LIKE order_items INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        "INSERT INTO order_items_p2026_03 SELECT * FROM order_items_default",
+        "DELETE FROM order_items_default",
+        "DELETE FROM orders_default",
+        ddl[6],
+        ddl[7],
+    ]
+    assert ddl[6].startswith("ALTER TABLE orders ATTACH PARTITION orders_p2026_03")
+    assert ddl[7].startswith("ALTER TABLE order_items ATTACH PARTITION order_items_p2026_03")
+
+
+@pytest.mark.asyncio
+async def test_retire_month_detaches_items_first_and_drops_foreign_keys():
+    conn = FakeConnection(constraints=["order_items_order_id_fkey"])
+
+    await retire_month(conn, date(2025, 1, 1), drop=True)
+
+    ddl = [sql for sql in conn.statements if not sql.startswith("SELECT")]
+    assert ddl == [
+        "ALTER TABLE order_items DETACH PARTITION order_items_p2025_01",
+        'ALTER TABLE order_items_p2025_01 DROP CONSTRAINT "order_items_order_id_fkey"',
+        "ALTER TABLE orders DETACH PARTITION orders_p2025_01",
+        "DROP TABLE order_items_p2025_01",
+        "DROP TABLE orders_p2025_01",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_retire_month_keeps_detached_tables_by_default():
+    conn = FakeConnection()
+
+    await retire_month(conn, date(2025, 1, 1), drop=False)
+
+    assert not any(sql.startswith("DROP") for sql in conn.statements)
+
+
+@pytest.mark.asyncio
+async def test_maintain_creates_ahead_and_retires_old_months():
+    conn = FakeConnection(partitions=[
+        "orders_default",
+        "orders_p2025_12",
+        "orders_p2026_01",
+        "orders_p2026_02",
+        "orders_p2026_03",
+    ])
+
+    result = await maintain(FakeEngine(conn), months_ahead=2, retain_months=2, drop=False, today=date(2026, 3, 10))
+
+    assert result["created"] == [date(2026, 4, 1), date(2026, 5, 1)]
+    assert result["retired"] == [date(2025, 12, 1)]
+    assert "ALTER TABLE orders DETACH PARTITION orders_p2025_12" in conn.statements
+
+
+@pytest.mark.asyncio
+async def test_maintain_keeps_everything_without_retention():
+    conn = FakeConnection(partitions=["orders_p2020_01"])
+
+    result = await maintain(FakeEngine(conn), months_ahead=0, retain_months=0, drop=True, today=date(2026, 3, 1))
+
+    assert result == {"created": [date(2026, 3, 1)], "retired": []}
+
+
+def test_main_uses_settings_defaults(mocker):
+    maintain_mock = mocker.patch.object(partitions, "maintain", mocker.Mock(return_value="coro"))
+    run = mocker.patch.object(partitions.asyncio, "run", return_value={"created": [], "retired": []})
+
+    partitions.main(["--retain-months", "12", "--drop"])
+
+    _, months_ahead, retain_months, drop = maintain_mock.call_args.args
+    assert months_ahead == partitions.settings.partition_months_ahead
+    assert retain_months == 12
+    assert drop is True
+    run.assert_called_once_with("coro")
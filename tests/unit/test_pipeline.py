@@ -0,0 +1,288 @@
+import asyncio
+import time
+import pytest
+import uuid
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from consumer.metrics.prometheus import STAGE_FAILURES, STAGE_LATENCY
+from consumer.services.order_processor import MARK_PROCESSED, OrderProcessor
+from consumer.services.pipeline import (
+    Pipeline,
+    PipelineError,
+    Stage,
+    StageError,
+    load_pipeline,
+)
+from shared.db.models import Order
+
+
+def cpu_square(context, inputs):
+    return context["value"] ** 2
+
+
+def blocking_double(context, inputs):
+    time.sleep(0.01)
+    return inputs["square"] * 2
+
+
+def build_test_pipeline():
+    async def validate(context, inputs):
+        return True
+
+    return Pipeline([Stage("validate", validate)])
+
+
+@pytest.mark.asyncio
+async def test_pipeline_passes_dependency_results():
+    async def price(context, inputs):
+        return 10
+
+    async def total(context, inputs):
+        return inputs["price"] * context["quantity"]
+
+    pipeline = Pipeline([
+        Stage("total", total, depends_on=("price",)),
+        Stage("price", price),
+    ])
+
+    results = await pipeline.run({"quantity": 3})
+
+    assert results == {"price": 10, "total": 30}
+    assert [stage.name for stage in pipeline.stages] == ["price", "total"]
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently():
+    async def slow(context, inputs):
+        await asyncio.sleep(0.05)
+        return True
+
+    pipeline = Pipeline([
+        Stage("inventory", slow),
+        Stage("fraud", slow),
+        Stage("pricing", slow),
+    ])
+
+    start = time.perf_counter()
+    await pipeline.run({})
+
+    assert time.perf_counter() - start < 0.12
+
+
+@pytest.mark.asyncio
+async def test_thread_and_process_stages():
+    pipeline = Pipeline([
+        Stage("square", cpu_square, executor="process"),
+        Stage("double", blocking_double, depends_on=("square",), executor="thread"),
+    ], process_workers=1)
+
+    try:
+        results = await pipeline.run({"value": 4})
+    finally:
+        pipeline.close()
+
+    assert results == {"square": 16, "double": 32}
+
+
+@pytest.mark.asyncio
+async def test_stage_timeout_raises_stage_error():
+    async def hang(context, inputs):
+        await asyncio.sleep(1)
+
+    pipeline = Pipeline([Stage("hang", hang, timeout=0.01)])
+    before = STAGE_FAILURES.labels("hang", "timeout")._value.get()
+
+    with pytest.raises(StageError) as exc_info:
+        await pipeline.run({})
+
+    assert exc_info.value.stage == "hang"
+    assert STAGE_FAILURES.labels("hang", "timeout")._value.get() == before + 1
+
+
+@pytest.mark.asyncio
+async def test_failing_stage_cancels_siblings():
+    cancelled = asyncio.Event()
+
+    async def boom(context, inputs):
+        raise RuntimeError("boom")
+
+    async def sibling(context, inputs):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def dependent(context, inputs):
+        return inputs
+
+    pipeline = Pipeline([
+        Stage("boom", boom),
+        Stage("sibling", sibling),
+        Stage("dependent", dependent, depends_on=("boom",)),
+    ])
+
+    with pytest.raises(StageError) as exc_info:
+        await pipeline.run({})
+
+    assert exc_info.value.stage == "boom"
+    assert isinstance(exc_info.value.cause, RuntimeError)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_stage_latency_is_recorded():
+    async def quick(context, inputs):
+        return 1
+
+    before = STAGE_LATENCY.labels("quick", "async")._sum.get()
+    await Pipeline([Stage("quick", quick)]).run({})
+
+    assert STAGE_LATENCY.labels("quick", "async")._sum.get() > before
+
+
+def test_pipeline_rejects_unknown_dependency():
+    async def stage(context, inputs):
+        pass
+
+    with pytest.raises(PipelineError):
+        Pipeline([Stage("a", stage, depends_on=("missing",))])
+
+
+def test_pipeline_rejects_cycles():
+    async def stage(context, inputs):
+        pass
+
+    with pytest.raises(PipelineError):
+        Pipeline([
+            Stage("a", stage, depends_on=("b",)),
+            Stage("b", stage, depends_on=("a",)),
+        ])
+
+
+def test_pipeline_rejects_duplicate_names():
+    async def stage(context, inputs):
+        pass
+
+    with pytest.raises(PipelineError):
+        Pipeline([Stage("a", stage), Stage("a", stage)])
+
+
+def test_stage_validates_executor():
+    async def stage(context, inputs):
+        pass
+
+    with pytest.raises(PipelineError):
+        Stage("a", stage, executor="gpu")
+
+    with pytest.raises(PipelineError):
+        Stage("sync", cpu_square)
+
+
+def test_load_pipeline():
+    assert load_pipeline("") is None
+
+    pipeline = load_pipeline("tests.unit.test_pipeline:build_test_pipeline")
+
+    assert [stage.name for stage in pipeline.stages] == ["validate"]
+
+
+@pytest.mark.asyncio
+async def test_order_processor_runs_pipeline(mock_session):
+    seen = []
+
+    async def record(context, inputs):
+        seen.append(context)
+
+    order_id = uuid.uuid4()
+    order = Order(
+        id=order_id,
+        customer_id=uuid.uuid4(),
+        status="NEW",
+        total_price=Decimal("100.00"),
+    )
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = order
+    mock_session.execute.return_value = mock_result
+
+    processor = OrderProcessor(Pipeline([Stage("record", record)]))
+    await processor.process(mock_session, order_id)
+
+    assert seen[0]["order_id"] == str(order_id)
+    assert mock_session.execute.call_args_list[-1].args[0] is MARK_PROCESSED
+
+
+@pytest.mark.asyncio
+async def test_order_processor_does_not_commit_when_pipeline_fails(mock_session):
+    async def reject(context, inputs):
+        raise ValueError("fraud")
+
+    order = Order(
+        id=uuid.uuid4(),
+        customer_id=uuid.uuid4(),
+        status="NEW",
+        total_price=Decimal("100.00"),
+    )
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = order
+    mock_session.execute.return_value = mock_result
+
+    processor = OrderProcessor(Pipeline([Stage("fraud", reject)]))
+
+    with pytest.raises(StageError):
+        await processor.process(mock_session, order.id)
+
+    assert all(call.args[0] is not MARK_PROCESSED for call in mock_session.execute.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_order_processor_runs_stages_outside_the_transaction(async_session):
+    in_transaction = []
+
+    async def check(context, inputs):
+        in_transaction.append(async_session.in_transaction())
+
+    order = Order(customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("100.00"))
+    async_session.add(order)
+    await async_session.commit()
+
+    await OrderProcessor(Pipeline([Stage("check", check)])).process(async_session, order.id)
+
+    assert in_transaction == [False]
+    await async_session.refresh(order)
+    assert order.status == "PROCESSED"
+
+
+@pytest.mark.asyncio
+async def test_consumer_close_shuts_down_pipeline_pools(mock_rabbitmq, mocker):
+    from consumer.messaging.consumer import OrderConsumer
+
+    pipeline = Pipeline([Stage("square", cpu_square, executor="thread")])
+    await pipeline.run({"value": 2})
+    pool = pipeline._thread_pool
+    mocker.patch("consumer.messaging.consumer.load_pipeline", return_value=pipeline)
+
+    consumer = OrderConsumer()
+    await consumer.close()
+
+    assert pipeline._thread_pool is None
+    assert pool._shutdown
+
+
+@pytest.mark.asyncio
+async def test_redelivered_processed_order_does_not_rerun_stages(async_session):
+    runs = []
+
+    async def reserve_inventory(context, inputs):
+        runs.append(context["order_id"])
+
+    order = Order(customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("100.00"))
+    async_session.add(order)
+    await async_session.commit()
+    processor = OrderProcessor(Pipeline([Stage("inventory", reserve_inventory)]))
+
+    await processor.process(async_session, order.id)
+    await processor.process(async_session, order.id)
+
+    assert runs == [str(order.id)]
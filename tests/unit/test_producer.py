@@ -1,7 +1,6 @@
 import pytest
 import json
 import uuid
-from decimal import Decimal
 from datetime import datetime
 
 from app.messaging.producer import OrderProducer
@@ -13,9 +12,9 @@ async def test_producer_connect(mock_rabbitmq):
     
     await producer.connect()
     
-    assert producer._connection is not None
-    assert producer._channel is not None
-    assert producer._exchange is not None
+    assert producer._transport._connection is not None
+    assert producer._transport._channel is not None
+    assert producer._transport._exchange is not None
     
     mock_rabbitmq['connection'].channel.assert_called_once()
     mock_rabbitmq['channel'].declare_exchange.assert_called_once()
@@ -27,9 +26,9 @@ async def test_producer_publish_order_created(mock_rabbitmq):
     await producer.connect()
     
     order_id = uuid.uuid4()
-    total_price = Decimal("150.00")
+    total_price_minor = 15000
     
-    await producer.publish_order_created(order_id, total_price)
+    await producer.publish_order_created(order_id, total_price_minor, "USD")
     
     mock_rabbitmq['exchange'].publish.assert_called_once()
     
@@ -42,7 +41,8 @@ async def test_producer_publish_order_created(mock_rabbitmq):
     body = json.loads(message.body.decode())
     assert body['event_type'] == 'order.created'
     assert body['payload']['order_id'] == str(order_id)
-    assert body['payload']['total_price'] == str(total_price)
+    assert body['payload']['total_price_minor'] == total_price_minor
+    assert body['payload']['currency'] == "USD"
     assert 'event_id' in body
     assert 'occurred_at' in body
 
@@ -53,9 +53,8 @@ async def test_producer_message_structure(mock_rabbitmq):
     await producer.connect()
     
     order_id = uuid.uuid4()
-    total_price = Decimal("99.99")
     
-    await producer.publish_order_created(order_id, total_price)
+    await producer.publish_order_created(order_id, 9999)
     
     call_args = mock_rabbitmq['exchange'].publish.call_args
     message = call_args[0][0]
@@ -68,7 +67,8 @@ async def test_producer_message_structure(mock_rabbitmq):
     
     payload = body['payload']
     assert 'order_id' in payload
-    assert 'total_price' in payload
+    assert 'total_price_minor' in payload
+    assert payload['currency'] == "USD"
     
     uuid.UUID(body['event_id'])
     
@@ -76,14 +76,13 @@ async def test_producer_message_structure(mock_rabbitmq):
 
 
 @pytest.mark.asyncio
-async def test_producer_serializes_uuid_and_decimal(mock_rabbitmq):
+async def test_producer_serializes_uuid_and_minor_units(mock_rabbitmq):
     producer = OrderProducer()
     await producer.connect()
     
     order_id = uuid.uuid4()
-    total_price = Decimal("123.45")
     
-    await producer.publish_order_created(order_id, total_price)
+    await producer.publish_order_created(order_id, 12345, "JPY")
     
     call_args = mock_rabbitmq['exchange'].publish.call_args
     message = call_args[0][0]
@@ -91,10 +90,10 @@ async def test_producer_serializes_uuid_and_decimal(mock_rabbitmq):
     body = json.loads(message.body.decode())
     
     assert isinstance(body['payload']['order_id'], str)
-    assert isinstance(body['payload']['total_price'], str)
+    assert body['payload']['total_price_minor'] == 12345
+    assert body['payload']['currency'] == "JPY"
     
     uuid.UUID(body['payload']['order_id'])
-    Decimal(body['payload']['total_price'])
 
 
 @pytest.mark.asyncio
@@ -121,7 +120,7 @@ async def test_producer_message_content_type(mock_rabbitmq):
     producer = OrderProducer()
     await producer.connect()
     
-    await producer.publish_order_created(uuid.uuid4(), Decimal("50.00"))
+    await producer.publish_order_created(uuid.uuid4(), 5000)
     
     call_args = mock_rabbitmq['exchange'].publish.call_args
     message = call_args[0][0]
@@ -138,3 +137,35 @@ async def test_producer_exchange_declaration(mock_rabbitmq):
     
     assert call_args[0][0] == "orders"
 
+
+
+@pytest.mark.asyncio
+async def test_producer_sets_message_timestamp(mock_rabbitmq):
+    producer = OrderProducer()
+    await producer.connect()
+
+    await producer.publish_order_created(uuid.uuid4(), 5000)
+
+    message = mock_rabbitmq['exchange'].publish.call_args[0][0]
+    body = json.loads(message.body.decode())
+
+    assert message.timestamp is not None
+    assert datetime.fromisoformat(body['occurred_at']).tzinfo is not None
+
+
+@pytest.mark.asyncio
+async def test_producer_publishes_batch(mock_rabbitmq):
+    producer = OrderProducer()
+    await producer.connect()
+    orders = [(uuid.uuid4(), 1000, "USD"), (uuid.uuid4(), 2000, "EUR")]
+
+    await producer.publish_orders_created(orders)
+
+    published = [
+        json.loads(call.args[0].body.decode())["payload"]
+        for call in mock_rabbitmq['exchange'].publish.call_args_list
+    ]
+    assert published == [
+        {"order_id": str(order_id), "total_price_minor": total, "currency": currency}
+        for order_id, total, currency in orders
+    ]
@@ -0,0 +1,164 @@
+import threading
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from shared.debug import create_debug_router
+from shared.profiling import HeapProfiler, Profile, ProfilerBusy, StackSampler
+
+TOKEN = {"X-Debug-Token": "secret"}
+
+
+def _busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(create_debug_router("secret", 1, "api"), prefix="/debug")
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_sampler_collects_stacks_of_target_thread(busy_thread):
+    profile = StackSampler().run(0.1, interval=0.005, thread_id=busy_thread.ident)
+
+    assert profile.samples >= 2
+    assert profile.duration >= 0.1
+    assert all(stack[0] == "busy" for stack in profile.stacks)
+    assert any("_busy_loop (test_profiling.py:" in ";".join(stack) for stack in profile.stacks)
+    assert sum(profile.stacks.values()) == profile.samples
+
+
+def test_sampler_allows_one_profile_at_a_time():
+    sampler = StackSampler()
+    sampler._lock.acquire()
+
+    with pytest.raises(ProfilerBusy):
+        sampler.run(0.01)
+
+
+def test_profile_formats():
+    profile = Profile(duration=0.3, interval=0.1, samples=3)
+    profile.stacks[("MainThread", "main (app.py:1)", "handler (app.py:10)")] = 2
+    profile.stacks[("worker", "run (worker.py:5)")] = 1
+
+    assert profile.collapsed() == "MainThread;main (app.py:1);handler (app.py:10) 2\nworker;run (worker.py:5) 1\n"
+    assert Profile(duration=0.1, interval=0.1).collapsed() == ""
+
+    document = profile.speedscope("api")
+    frames = [frame["name"] for frame in document["shared"]["frames"]]
+    main, worker = document["profiles"]
+    assert document["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+    assert frames == ["main (app.py:1)", "handler (app.py:10)", "run (worker.py:5)"]
+    assert (main["name"], main["samples"], main["weights"]) == ("MainThread", [[0, 1]], [pytest.approx(0.2)])
+    assert (worker["name"], worker["samples"]) == ("worker", [[2]])
+    assert worker["endValue"] == pytest.approx(0.1)
+
+
+def test_heap_profiler_reports_top_allocations_and_diff():
+    profiler = HeapProfiler(frames=1)
+    try:
+        first = profiler.snapshot(limit=5)
+        retained = [bytearray(10000) for _ in range(100)]
+        second = profiler.snapshot(limit=5)
+    finally:
+        profiler.stop()
+
+    assert first["started"] and first["diff"] == []
+    assert not second["started"]
+    assert second["traced_bytes"] > 0
+    growth = second["diff"][0]
+    assert "test_profiling.py" in growth["location"]
+    assert growth["size_diff_bytes"] >= 1000000
+    assert set(second["top"][0]) == {"location", "traceback", "size_bytes", "count"}
+    assert not tracemalloc.is_tracing()
+    del retained
+
+
+def test_debug_router_requires_token():
+    with pytest.raises(ValueError):
+        create_debug_router("", 60, "api")
+
+
+@pytest.mark.asyncio
+async def test_debug_endpoints_reject_wrong_token(client):
+    async with client:
+        missing = await client.get("/debug/heap")
+        wrong = await client.get("/debug/profile", headers={"X-Debug-Token": "guess"})
+
+    assert missing.status_code == 403
+    assert wrong.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_returns_collapsed_and_speedscope(client, busy_thread):
+    async with client:
+        collapsed = await client.get("/debug/profile", params={"seconds": 0.05, "interval": 0.005}, headers=TOKEN)
+        speedscope = await client.get(
+            "/debug/profile",
+            params={"seconds": 0.05, "interval": 0.005, "format": "speedscope", "all_threads": True},
+            headers=TOKEN,
+        )
+        too_long = await client.get("/debug/profile", params={"seconds": 5}, headers=TOKEN)
+
+    assert collapsed.status_code == 200
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert collapsed.text.startswith("MainThread;")
+    assert speedscope.headers["content-disposition"] == 'attachment; filename="api.speedscope.json"'
+    assert "busy" in {profile["name"] for profile in speedscope.json()["profiles"]}
+    assert too_long.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_conflicts_while_busy(client, mocker):
+    mocker.patch("shared.debug.sampler.run", side_effect=ProfilerBusy("Another profile is already running"))
+
+    async with client:
+        response = await client.get("/debug/profile", params={"seconds": 0.01}, headers=TOKEN)
+
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_heap_endpoints(client):
+    async with client:
+        started = await client.get("/debug/heap", params={"limit": 3}, headers=TOKEN)
+        again = await client.get("/debug/heap", params={"limit": 3, "group_by": "filename"}, headers=TOKEN)
+        stopped = await client.delete("/debug/heap", headers=TOKEN)
+
+    assert started.json()["started"]
+    assert len(again.json()["top"]) <= 3
+    assert stopped.status_code == 204
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.asyncio
+async def test_consumer_health_app_mounts_debug_endpoints(mocker):
+    from consumer.health.server import create_health_app
+
+    mocker.patch("consumer.health.server.settings.debug_endpoints_enabled", True)
+    mocker.patch("consumer.health.server.settings.debug_token", "secret")
+    app = create_health_app(MagicMock(is_ready=True))
+
+    started = time.perf_counter()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/debug/profile", params={"seconds": 0.02}, headers=TOKEN)
+
+    assert response.status_code == 200
+    assert time.perf_counter() - started >= 0.02
@@ -1,7 +1,15 @@
 import pytest
 from fastapi import FastAPI
 
-from app.metrics.prometheus import setup_metrics, REQUEST_COUNT, REQUEST_LATENCY
+from app.metrics.prometheus import (
+    IN_FLIGHT,
+    MetricsMiddleware,
+    PathLabels,
+    REQUEST_COUNT,
+    REQUEST_LATENCY,
+    RESPONSE_SIZE,
+    setup_metrics,
+)
 
 
 def test_setup_metrics_mounts_endpoint():
@@ -22,7 +30,7 @@ async def test_metrics_middleware_increments_counter():
     async def test_endpoint():
         return {"status": "ok"}
     
-    initial_value = REQUEST_COUNT.labels(method="GET", path="/test")._value._value
+    initial_value = REQUEST_COUNT.labels(method="GET", path="/test", status="200")._value._value
     
     from httpx import AsyncClient, ASGITransport
     
@@ -32,7 +40,7 @@ async def test_metrics_middleware_increments_counter():
     
     assert response.status_code == 200
     
-    final_value = REQUEST_COUNT.labels(method="GET", path="/test")._value._value
+    final_value = REQUEST_COUNT.labels(method="GET", path="/test", status="200")._value._value
     assert final_value > initial_value
 
 
@@ -47,7 +55,7 @@ async def test_metrics_middleware_records_latency():
         await asyncio.sleep(0.01)
         return {"status": "ok"}
     
-    initial_count = REQUEST_LATENCY.labels(method="GET", path="/slow")._sum._value
+    initial_count = REQUEST_LATENCY.labels(method="GET", path="/slow", status="200")._sum._value
     
     from httpx import AsyncClient, ASGITransport
     
@@ -57,7 +65,7 @@ async def test_metrics_middleware_records_latency():
     
     assert response.status_code == 200
     
-    final_count = REQUEST_LATENCY.labels(method="GET", path="/slow")._sum._value
+    final_count = REQUEST_LATENCY.labels(method="GET", path="/slow", status="200")._sum._value
     assert final_count > initial_count
 
 
@@ -81,8 +89,8 @@ async def test_metrics_middleware_handles_different_paths():
         await client.get("/path1")
         await client.get("/path2")
     
-    path1_count = REQUEST_COUNT.labels(method="GET", path="/path1")._value._value
-    path2_count = REQUEST_COUNT.labels(method="GET", path="/path2")._value._value
+    path1_count = REQUEST_COUNT.labels(method="GET", path="/path1", status="200")._value._value
+    path2_count = REQUEST_COUNT.labels(method="GET", path="/path2", status="200")._value._value
     
     assert path1_count >= 1
     assert path2_count >= 1
@@ -108,8 +116,8 @@ async def test_metrics_middleware_handles_different_methods():
         await client.get("/resource")
         await client.post("/resource")
     
-    get_count = REQUEST_COUNT.labels(method="GET", path="/resource")._value._value
-    post_count = REQUEST_COUNT.labels(method="POST", path="/resource")._value._value
+    get_count = REQUEST_COUNT.labels(method="GET", path="/resource", status="200")._value._value
+    post_count = REQUEST_COUNT.labels(method="POST", path="/resource", status="200")._value._value
     
     assert get_count >= 1
     assert post_count >= 1
@@ -136,6 +144,150 @@ async def test_metrics_middleware_passes_response_through():
     assert data["number"] == 42
 
 
+@pytest.mark.asyncio
+async def test_metrics_middleware_labels_route_template_and_status():
+    app = FastAPI()
+    setup_metrics(app)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            from fastapi import HTTPException
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    initial_ok = REQUEST_COUNT.labels(method="GET", path="/items/{item_id}", status="200")._value._value
+    initial_missing = REQUEST_COUNT.labels(method="GET", path="/items/{item_id}", status="404")._value._value
+
+    from httpx import AsyncClient, ASGITransport
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        for item_id in (1, 2, 3, 0):
+            await client.get(f"/items/{item_id}")
+
+    assert REQUEST_COUNT.labels(method="GET", path="/items/{item_id}", status="200")._value._value == initial_ok + 3
+    assert REQUEST_COUNT.labels(method="GET", path="/items/{item_id}", status="404")._value._value == initial_missing + 1
+    assert not any(
+        sample.labels.get("path") == "/items/1"
+        for metric in REQUEST_COUNT.collect()
+        for sample in metric.samples
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_sends_unmatched_paths_and_methods_to_other():
+    app = FastAPI()
+    setup_metrics(app)
+
+    @app.get("/known")
+    async def known():
+        return {}
+
+    initial_unmatched = REQUEST_COUNT.labels(method="GET", path="other", status="404")._value._value
+    initial_method = REQUEST_COUNT.labels(method="other", path="/known", status="405")._value._value
+
+    from httpx import AsyncClient, ASGITransport
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/scan/wp-login.php")
+        await client.request("PROPFIND", "/known")
+
+    assert REQUEST_COUNT.labels(method="GET", path="other", status="404")._value._value == initial_unmatched + 1
+    assert REQUEST_COUNT.labels(method="other", path="/known", status="405")._value._value == initial_method + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_records_failed_requests_as_500():
+    app = FastAPI()
+    setup_metrics(app)
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    initial = REQUEST_COUNT.labels(method="GET", path="/boom", status="500")._value._value
+
+    from httpx import AsyncClient, ASGITransport
+
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/boom")
+
+    assert response.status_code == 500
+    assert REQUEST_COUNT.labels(method="GET", path="/boom", status="500")._value._value == initial + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_records_response_size_and_in_flight():
+    app = FastAPI()
+    setup_metrics(app)
+    seen_in_flight = []
+
+    @app.get("/payload")
+    async def payload():
+        seen_in_flight.append(IN_FLIGHT._value.get())
+        return {"data": "x" * 1000}
+
+    initial_sum = RESPONSE_SIZE.labels(method="GET", path="/payload")._sum.get()
+    initial_in_flight = IN_FLIGHT._value.get()
+
+    from httpx import AsyncClient, ASGITransport
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/payload")
+
+    assert RESPONSE_SIZE.labels(method="GET", path="/payload")._sum.get() == initial_sum + len(response.content)
+    assert seen_in_flight == [initial_in_flight + 1]
+    assert IN_FLIGHT._value.get() == initial_in_flight
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_passes_non_http_scopes_through():
+    calls = []
+
+    async def inner(scope, receive, send):
+        calls.append(scope["type"])
+
+    middleware = MetricsMiddleware(inner, router=FastAPI().router, max_path_labels=10)
+    await middleware({"type": "lifespan"}, None, None)
+
+    assert calls == ["lifespan"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_sets_statement_source():
+    from shared.db.statements import statement_source
+
+    app = FastAPI()
+    setup_metrics(app)
+
+    @app.get("/sources/{source_id}")
+    async def source(source_id: int):
+        return {"source": statement_source.get()}
+
+    from httpx import AsyncClient, ASGITransport
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/sources/1")
+
+    assert response.json() == {"source": "GET /sources/{source_id}"}
+    assert statement_source.get() == "background"
+
+
+def test_path_labels_cap_cardinality():
+    labels = PathLabels(limit=2)
+
+    assert labels("/a") == "/a"
+    assert labels("/b") == "/b"
+    assert labels("/c") == "other"
+    assert labels("/a") == "/a"
+    assert labels(None) == "other"
+
+
 def test_request_count_metric_exists():
     assert REQUEST_COUNT is not None
     assert REQUEST_COUNT._name in ["http_requests_total", "http_requests"]
@@ -0,0 +1,220 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db import session as session_module
+from app.db.routing import (
+    REPLICA_LAG,
+    TOKEN_COOKIE,
+    TOKEN_HEADER,
+    ReplicaRouter,
+    parse_lsn,
+    request_token,
+    setup_consistency,
+)
+
+
+@pytest.fixture
+async def factories():
+    engines = [
+        create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        for _ in range(3)
+    ]
+    yield [async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False) for engine in engines]
+    for engine in engines:
+        await engine.dispose()
+
+
+def make_router(factories, max_lag=5.0):
+    primary, *replicas = factories
+    return ReplicaRouter(
+        primary,
+        {f"replica-{index}": factory for index, factory in enumerate(replicas)},
+        max_lag=max_lag,
+    )
+
+
+def test_parse_lsn():
+    assert parse_lsn("0/16B3748") == 0x16B3748
+    assert parse_lsn("1/0") == 1 << 32
+
+
+def test_reader_uses_primary_until_replicas_are_probed(factories):
+    router = make_router(factories)
+
+    assert router.reader() is factories[0]
+    assert router.writer() is factories[0]
+
+
+@pytest.mark.asyncio
+async def test_reader_round_robins_over_healthy_replicas(factories):
+    router = make_router(factories)
+    await router.refresh()
+
+    assert {router.reader() for _ in range(4)} == set(factories[1:])
+    assert REPLICA_LAG.labels("replica-0")._value.get() == 0.0
+
+
+def test_reader_skips_lagging_replicas(factories):
+    router = make_router(factories, max_lag=1.0)
+    fresh, lagging = router.replicas
+    fresh.lag = 0.2
+    lagging.lag = 3.0
+
+    assert {router.reader() for _ in range(4)} == {fresh.session_factory}
+
+
+def test_lsn_token_waits_for_replay(factories):
+    router = make_router(factories)
+    for replica in router.replicas:
+        replica.lag = 0.0
+        replica.replay_lsn = parse_lsn("0/100")
+    router.replicas[1].replay_lsn = parse_lsn("0/200")
+
+    assert router.reader("lsn:0/180") is router.replicas[1].session_factory
+    assert router.reader("lsn:0/300") is factories[0]
+
+
+def test_timestamp_token_waits_for_replay(factories):
+    router = make_router(factories)
+    for replica in router.replicas:
+        replica.lag = 0.0
+        replica.caught_up_to = 100.0
+
+    assert router.reader("ts:99.5") is not factories[0]
+    assert router.reader("ts:100.5") is factories[0]
+
+
+def test_malformed_token_is_ignored(factories):
+    router = make_router(factories)
+    for replica in router.replicas:
+        replica.lag = 0.0
+
+    assert router.reader("lsn:garbage") is not factories[0]
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_is_taken_out_of_rotation(factories):
+    router = make_router(factories)
+    await router.refresh()
+
+    def broken():
+        raise ConnectionError("replica down")
+
+    router.replicas[0].session_factory = broken
+    await router.refresh()
+
+    assert router.replicas[0].lag is None
+    assert {router.reader() for _ in range(4)} == {factories[2]}
+
+
+@pytest.mark.asyncio
+async def test_get_session_routes_by_method_and_issues_token(mocker, factories):
+    router = make_router(factories)
+    await router.refresh()
+    mocker.patch.object(session_module, "router", router)
+
+    read = SimpleNamespace(method="GET", headers={}, cookies={}, state=SimpleNamespace())
+    gen = session_module.get_session(read)
+    session = await gen.__anext__()
+    assert session.bind is factories[1].kw["bind"] or session.bind is factories[2].kw["bind"]
+    await gen.aclose()
+    assert not hasattr(read.state, "consistency_token")
+
+    write = SimpleNamespace(method="POST", headers={}, cookies={}, state=SimpleNamespace())
+    gen = session_module.get_session(write)
+    session = await gen.__anext__()
+    assert session.bind is factories[0].kw["bind"]
+    await session.execute(text("SELECT 1"))
+    await session.commit()
+    with pytest.raises(StopAsyncIteration):
+        await gen.__anext__()
+
+    assert write.state.consistency_token.startswith("ts:")
+    assert router.reader(write.state.consistency_token) is factories[0]
+
+
+@pytest.mark.asyncio
+async def test_consistency_middleware_returns_token():
+    app = FastAPI()
+    setup_consistency(app, max_age=60)
+
+    @app.post("/write")
+    async def write(request: session_module.Request):
+        request.state.consistency_token = "lsn:0/10"
+        return {}
+
+    @app.get("/read")
+    async def read():
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        written = await client.post("/write")
+        plain = await client.get("/read")
+
+    assert written.headers[TOKEN_HEADER] == "lsn:0/10"
+    assert written.headers["set-cookie"].startswith(f'{TOKEN_COOKIE}="lsn:0/10"; HttpOnly; Max-Age=60')
+    assert TOKEN_HEADER not in plain.headers
+
+
+def test_request_token_prefers_header_over_cookie():
+    from starlette.requests import Request
+
+    def request(headers):
+        return Request({"type": "http", "method": "GET", "headers": headers})
+
+    assert request_token(request([(b"cookie", f'{TOKEN_COOKIE}="ts:1.5"'.encode())])) == "ts:1.5"
+    assert request_token(request([
+        (TOKEN_HEADER.lower().encode(), b"lsn:0/1"),
+        (b"cookie", f'{TOKEN_COOKIE}="ts:1.5"'.encode()),
+    ])) == "lsn:0/1"
+    assert request_token(request([])) is None
+
+
+@pytest.mark.asyncio
+async def test_no_token_or_middleware_without_replicas(mocker, factories):
+    from app.db.routing import ConsistencyMiddleware
+    from app.main import app
+
+    mocker.patch.object(session_module, "router", ReplicaRouter(factories[0], {}, max_lag=5.0))
+
+    write = SimpleNamespace(method="POST", headers={}, cookies={}, state=SimpleNamespace())
+    gen = session_module.get_session(write)
+    session = await gen.__anext__()
+    await session.execute(text("SELECT 1"))
+    await session.commit()
+    with pytest.raises(StopAsyncIteration):
+        await gen.__anext__()
+
+    assert not hasattr(write.state, "consistency_token")
+    assert all(middleware.cls is not ConsistencyMiddleware for middleware in app.user_middleware)
+
+
+@pytest.mark.asyncio
+async def test_consistency_middleware_keeps_streaming_response_headers():
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+    setup_consistency(app, max_age=60)
+
+    @app.post("/write")
+    async def write(request: session_module.Request):
+        request.state.consistency_token = "ts:1.5"
+
+        async def body():
+            yield b"a"
+            yield b"b"
+
+        return StreamingResponse(body(), headers={"X-Request": "1"})
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/write")
+
+    assert response.text == "ab"
+    assert response.headers["x-request"] == "1"
+    assert response.headers[TOKEN_HEADER] == "ts:1.5"
+    assert response.cookies[TOKEN_COOKIE] == "ts:1.5"
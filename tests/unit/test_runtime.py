@@ -0,0 +1,118 @@
+import asyncio
+import gc
+import pytest
+
+from shared import runtime
+from shared.runtime import (
+    PROFILES,
+    apply_gc_threshold,
+    freeze_after_startup,
+    install_event_loop_policy,
+    resolve_profile,
+)
+
+
+@pytest.fixture
+def restore_gc():
+    threshold = gc.get_threshold()
+    yield
+    gc.set_threshold(*threshold)
+    gc.unfreeze()
+
+
+def test_default_profile_uses_stock_runtime():
+    profile = resolve_profile("default")
+
+    assert profile.loop == "asyncio"
+    assert profile.http == "h11"
+    assert profile.gc_freeze is False
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_profile("turbo")
+
+
+def test_performance_profile_falls_back_without_extensions(mocker):
+    mocker.patch.object(runtime, "_available", return_value=False)
+
+    profile = resolve_profile("performance")
+
+    assert profile.loop == "asyncio"
+    assert profile.http == "h11"
+    assert profile.gc_freeze is True
+
+
+def test_performance_profile_uses_uvloop_when_available(mocker):
+    mocker.patch.object(runtime, "_available", return_value=True)
+
+    profile = resolve_profile("performance")
+
+    assert profile.loop == "uvloop"
+    assert profile.http == "httptools"
+
+
+def test_apply_gc_threshold(restore_gc):
+    apply_gc_threshold(PROFILES["default"])
+    before = gc.get_threshold()
+    assert gc.get_threshold() == before
+
+    apply_gc_threshold(PROFILES["performance"])
+    assert gc.get_threshold()[0] == 50_000
+
+
+def test_freeze_after_startup(restore_gc):
+    freeze_after_startup(PROFILES["default"])
+    assert gc.get_freeze_count() == 0
+
+    freeze_after_startup(PROFILES["performance"])
+    assert gc.get_freeze_count() > 0
+
+
+def test_install_event_loop_policy(mocker):
+    set_policy = mocker.patch.object(asyncio, "set_event_loop_policy")
+
+    install_event_loop_policy(PROFILES["default"])
+    set_policy.assert_not_called()
+
+    pytest.importorskip("uvloop")
+    install_event_loop_policy(PROFILES["performance"])
+    set_policy.assert_called_once()
+
+
+def test_run_applies_profile(mocker, restore_gc):
+    install = mocker.patch.object(runtime, "install_event_loop_policy")
+    asyncio_run = mocker.patch.object(runtime.asyncio, "run", return_value=42)
+
+    assert runtime.run("main", PROFILES["performance"]) == 42
+
+    install.assert_called_once_with(PROFILES["performance"])
+    asyncio_run.assert_called_once_with("main")
+
+
+def test_api_server_passes_profile_to_uvicorn(mocker):
+    from app import server
+
+    mocker.patch.object(server.settings, "runtime_profile", "default")
+    uvicorn_run = mocker.patch("app.server.uvicorn.run")
+
+    server.main()
+
+    kwargs = uvicorn_run.call_args[1]
+    assert kwargs["loop"] == "asyncio"
+    assert kwargs["http"] == "h11"
+
+
+def test_api_server_resets_multiprocess_dir_before_workers(mocker, tmp_path, monkeypatch):
+    from app import server
+
+    stale = tmp_path / "counter_1.db"
+    stale.touch()
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    mocker.patch.object(server.settings, "api_workers", 4)
+    uvicorn_run = mocker.patch("app.server.uvicorn.run")
+
+    server.main()
+
+    assert not stale.exists()
+    assert uvicorn_run.call_args[1]["workers"] == 4
@@ -106,6 +106,7 @@ def test_order_item_response_serialization():
         product_id=uuid.uuid4(),
         quantity=3,
         price=Decimal("25.50"),
+        price_minor=2550,
     )
     
     assert isinstance(item.product_id, uuid.UUID)
@@ -123,6 +124,7 @@ def test_order_response_serialization():
             product_id=uuid.uuid4(),
             quantity=1,
             price=Decimal("100.00"),
+            price_minor=10000,
         ),
     ]
     
@@ -131,6 +133,8 @@ def test_order_response_serialization():
         customer_id=customer_id,
         status="NEW",
         total_price=Decimal("100.00"),
+        total_price_minor=10000,
+        currency="USD",
         items=items,
         created_at=now,
         updated_at=now,
@@ -184,11 +188,14 @@ def test_order_response_types():
         customer_id=customer_id,
         status="PROCESSED",
         total_price=Decimal("123.45"),
+        total_price_minor=12345,
+        currency="USD",
         items=[
             OrderItemResponse(
                 product_id=product_id,
                 quantity=2,
-                price=Decimal("61.725"),
+                price=Decimal("61.72"),
+                price_minor=6172,
             )
         ],
         created_at=now,
@@ -202,3 +209,24 @@ def test_order_response_types():
     assert isinstance(response.created_at, datetime)
     assert isinstance(response.updated_at, datetime)
 
+
+
+def test_order_item_create_requires_price():
+    with pytest.raises(ValidationError) as exc_info:
+        OrderItemCreate(product_id=uuid.uuid4(), quantity=1)
+
+    assert "price_minor" in str(exc_info.value)
+
+
+def test_order_create_rejects_excess_precision():
+    item = OrderItemCreate(product_id=uuid.uuid4(), quantity=1, price=Decimal("1.005"))
+
+    with pytest.raises(ValidationError):
+        OrderCreate(customer_id=uuid.uuid4(), items=[item])
+
+    assert OrderCreate(customer_id=uuid.uuid4(), currency="KWD", items=[item]).currency == "KWD"
+
+
+def test_order_create_rejects_unknown_currency_format():
+    with pytest.raises(ValidationError):
+        OrderCreate(customer_id=uuid.uuid4(), currency="usd", items=[])
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from app.standalone import configure, pipeline
+from shared.messaging.transport import InMemoryBroker
+
+
+def test_configure_points_at_memory_broker_and_sqlite(monkeypatch):
+    for name in ("RABBITMQ_URL", "DATABASE_URL", "DATABASE_REPLICA_URLS"):
+        monkeypatch.setenv(name, "unchanged")
+
+    configure("/tmp/orders.db")
+
+    assert os.environ["RABBITMQ_URL"] == "memory://"
+    assert os.environ["DATABASE_URL"] == "sqlite+aiosqlite:////tmp/orders.db?timeout=30"
+    assert os.environ["DATABASE_REPLICA_URLS"] == ""
+
+
+@pytest.mark.asyncio
+async def test_pipeline_starts_and_stops_consumer(test_db_engine, mocker):
+    mocker.patch('app.db.session.engine', test_db_engine)
+    mocker.patch('shared.messaging.transport.broker', InMemoryBroker())
+    mocker.patch('consumer.messaging.consumer.settings.rabbitmq_url', 'memory://')
+
+    async with pipeline() as consumer:
+        assert consumer.is_ready
+
+    assert not consumer.is_ready
@@ -0,0 +1,54 @@
+import pytest
+import uuid
+from decimal import Decimal
+from sqlalchemy import select, text
+
+from shared.db.models import Order
+from shared.db.status import (
+    STATUS_BY_CODE,
+    STATUS_CODES,
+    InvalidStatusTransition,
+    OrderStatus,
+    check_transition,
+)
+
+
+def test_status_codes_are_unique_and_cover_every_status():
+    assert set(STATUS_CODES) == set(OrderStatus)
+    assert len(STATUS_BY_CODE) == len(STATUS_CODES)
+
+
+def test_check_transition_allows_forward_moves_and_repeats():
+    assert check_transition(None, "NEW") is OrderStatus.NEW
+    assert check_transition(OrderStatus.NEW, "PROCESSED") is OrderStatus.PROCESSED
+    assert check_transition("PROCESSED", OrderStatus.PROCESSED) is OrderStatus.PROCESSED
+
+
+def test_check_transition_rejects_backward_and_unknown_statuses():
+    with pytest.raises(InvalidStatusTransition, match="PROCESSED to NEW"):
+        check_transition(OrderStatus.PROCESSED, OrderStatus.NEW)
+    with pytest.raises(ValueError):
+        check_transition(None, "SHIPPED")
+
+
+def test_order_validates_status_on_assignment():
+    order = Order(customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("1.00"))
+
+    assert order.status is OrderStatus.NEW
+    order.status = "PROCESSED"
+    with pytest.raises(InvalidStatusTransition):
+        order.status = OrderStatus.NEW
+    assert order.status is OrderStatus.PROCESSED
+
+
+@pytest.mark.asyncio
+async def test_status_is_stored_as_smallint_code(async_session):
+    order = Order(customer_id=uuid.uuid4(), status="PROCESSED", total_price=Decimal("1.00"))
+    async_session.add(order)
+    await async_session.commit()
+
+    raw = await async_session.scalar(text("SELECT status FROM orders WHERE id = :id"), {"id": order.id.hex})
+    loaded = await async_session.scalar(select(Order.status).where(Order.status == "PROCESSED"))
+
+    assert raw == STATUS_CODES[OrderStatus.PROCESSED]
+    assert loaded is OrderStatus.PROCESSED
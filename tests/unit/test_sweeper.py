@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import pytest
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+from consumer.metrics.prometheus import (
+    SWEEPER_ORDERS_ABANDONED,
+    SWEEPER_ORDERS_REPUBLISHED,
+    SWEEPER_ORDERS_SWEPT,
+    SWEEPER_PUBLISH_FAILURES,
+    SWEEPER_RUNS,
+)
+from consumer.services.sweeper import LEASE_NAME, StuckOrderSweeper
+from shared.clock import as_utc
+from shared.db.leases import HOLDER
+from shared.db.models import Lease, Order
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+async def add_order(session, status, age):
+    order = Order(
+        customer_id=uuid.uuid4(),
+        status=status,
+        total_price=Decimal("10.00"),
+        created_at=NOW - age,
+    )
+    session.add(order)
+    await session.commit()
+    return order
+
+
+@pytest.mark.asyncio
+async def test_sweep_republishes_only_orders_stuck_past_threshold(async_session, session_factory, mocker):
+    stuck = [await add_order(async_session, "NEW", timedelta(minutes=minutes)) for minutes in (30, 20, 10, 6, 7)]
+    await add_order(async_session, "NEW", timedelta(minutes=1))
+    await add_order(async_session, "PROCESSED", timedelta(minutes=30))
+    sleep = mocker.patch("consumer.services.sweeper.asyncio.sleep", AsyncMock())
+    publish = AsyncMock()
+    swept_before = SWEEPER_ORDERS_SWEPT._value.get()
+    republished_before = SWEEPER_ORDERS_REPUBLISHED._value.get()
+
+    sweeper = StuckOrderSweeper(session_factory, publish, timedelta(minutes=5), batch_size=2, max_rate=1)
+    assert await sweeper.sweep_once(now=NOW) == 5
+
+    oldest_first = sorted(stuck, key=lambda order: order.created_at)
+    assert [call.args for call in publish.await_args_list] == [
+        (order.id, order.total_price_minor, order.currency) for order in oldest_first
+    ]
+    assert SWEEPER_ORDERS_SWEPT._value.get() - swept_before == 5
+    assert SWEEPER_ORDERS_REPUBLISHED._value.get() - republished_before == 5
+    # Две полные пачки по 2 заказа при лимите 1 заказ/с — пауза после каждой
+    assert sleep.await_count == 2
+    assert all(call.args[0] > 1 for call in sleep.await_args_list)
+
+
+@pytest.mark.asyncio
+async def test_sweep_counts_failed_publishes(async_session, session_factory):
+    await add_order(async_session, "NEW", timedelta(minutes=30))
+    await add_order(async_session, "NEW", timedelta(minutes=20))
+    publish = AsyncMock(side_effect=[None, ConnectionError("broker is down")])
+    failures_before = SWEEPER_PUBLISH_FAILURES._value.get()
+    swept_before = SWEEPER_ORDERS_SWEPT._value.get()
+
+    sweeper = StuckOrderSweeper(session_factory, publish, timedelta(minutes=5))
+
+    assert await sweeper.sweep_once(now=NOW) == 1
+    assert SWEEPER_PUBLISH_FAILURES._value.get() - failures_before == 1
+    assert SWEEPER_ORDERS_SWEPT._value.get() - swept_before == 1
+
+
+@pytest.mark.asyncio
+async def test_sweep_skips_when_another_instance_holds_the_lease(async_session, session_factory):
+    await add_order(async_session, "NEW", timedelta(minutes=30))
+    async_session.add(Lease(
+        name=LEASE_NAME, holder="other-host:1", expires_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+    ))
+    await async_session.commit()
+    publish = AsyncMock()
+    locked_before = SWEEPER_RUNS.labels("locked")._value.get()
+
+    sweeper = StuckOrderSweeper(session_factory, publish, timedelta(minutes=5))
+
+    assert await sweeper.sweep_once(now=NOW) == 0
+    publish.assert_not_called()
+    assert SWEEPER_RUNS.labels("locked")._value.get() - locked_before == 1
+
+
+@pytest.mark.asyncio
+async def test_sweep_takes_over_an_expired_lease_and_releases_it(async_session, session_factory):
+    await add_order(async_session, "NEW", timedelta(minutes=30))
+    async_session.add(Lease(
+        name=LEASE_NAME, holder="crashed-host:1", expires_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+    ))
+    await async_session.commit()
+
+    sweeper = StuckOrderSweeper(session_factory, AsyncMock(), timedelta(minutes=5))
+
+    assert await sweeper.sweep_once(now=NOW) == 1
+    async with session_factory() as session:
+        lease = await session.get(Lease, LEASE_NAME)
+    assert lease.holder == HOLDER
+    assert as_utc(lease.expires_at) <= datetime.now(timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_sweep_backs_off_and_gives_up_after_max_attempts(async_session, session_factory, caplog):
+    order = await add_order(async_session, "NEW", timedelta(minutes=30))
+    publish = AsyncMock()
+    abandoned_before = SWEEPER_ORDERS_ABANDONED._value.get()
+    swept_before = SWEEPER_ORDERS_SWEPT._value.get()
+    sweeper = StuckOrderSweeper(session_factory, publish, timedelta(minutes=5), max_attempts=3)
+
+    # Повторы через 5, 10 минут; раньше срока заказ не трогаем
+    schedule = [(NOW, 1), (NOW + timedelta(minutes=4), 0), (NOW + timedelta(minutes=5), 1),
+                (NOW + timedelta(minutes=14), 0), (NOW + timedelta(minutes=15), 1), (NOW + timedelta(days=1), 0)]
+    with caplog.at_level(logging.ERROR, logger="consumer.services.sweeper"):
+        for now, expected in schedule:
+            assert await sweeper.sweep_once(now=now) == expected, now
+
+    await async_session.refresh(order)
+    assert order.republish_attempts == 3
+    assert as_utc(order.last_republished_at) == NOW + timedelta(minutes=15)
+    assert publish.await_count == 3
+    assert SWEEPER_ORDERS_SWEPT._value.get() - swept_before == 3
+    assert SWEEPER_ORDERS_ABANDONED._value.get() - abandoned_before == 1
+    assert str(order.id) in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_sweep_does_not_hold_a_transaction_between_pages(async_session, session_factory, mocker):
+    for minutes in (30, 20, 10):
+        await add_order(async_session, "NEW", timedelta(minutes=minutes))
+    open_sessions = []
+
+    @asynccontextmanager
+    async def tracked_session():
+        async with session_factory() as session:
+            open_sessions.append(session)
+            try:
+                yield session
+            finally:
+                open_sessions.remove(session)
+
+    async def outside_transaction(*args):
+        # Ни публикация, ни пауза между страницами не держат соединение
+        assert open_sessions == []
+
+    sleep = mocker.patch("consumer.services.sweeper.asyncio.sleep", AsyncMock(side_effect=outside_transaction))
+    publish = AsyncMock(side_effect=outside_transaction)
+
+    sweeper = StuckOrderSweeper(tracked_session, publish, timedelta(minutes=5), batch_size=1)
+
+    assert await sweeper.sweep_once(now=NOW) == 3
+    assert sleep.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_run_skips_deep_queue_and_survives_failures(mocker):
+    depths = iter([5000, 10, 10])
+    sweeper = StuckOrderSweeper(
+        MagicMock(), AsyncMock(), timedelta(minutes=5),
+        queue_depth=lambda: next(depths), max_queue_depth=1000,
+    )
+    sweep_once = mocker.patch.object(
+        sweeper, "sweep_once", AsyncMock(side_effect=[RuntimeError("db is down"), asyncio.CancelledError()])
+    )
+    skipped_before = SWEEPER_RUNS.labels("skipped")._value.get()
+    failed_before = SWEEPER_RUNS.labels("failed")._value.get()
+
+    with pytest.raises(asyncio.CancelledError):
+        await sweeper.run(interval=0)
+
+    assert sweep_once.await_count == 2
+    assert SWEEPER_RUNS.labels("skipped")._value.get() - skipped_before == 1
+    assert SWEEPER_RUNS.labels("failed")._value.get() - failed_before == 1
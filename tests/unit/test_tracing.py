@@ -0,0 +1,253 @@
+import asyncio
+import json
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.metrics.tracing import TracingMiddleware
+from shared.db.models import Order
+from shared.tracing import (
+    FileExporter,
+    OtlpHttpExporter,
+    SpanContext,
+    build_exporter,
+    configure_tracing,
+    current_span,
+    extract,
+    inject,
+    tracer,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, service, span):
+        self.spans.append((service, span))
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    tracer.configure("test", exporter, 1.0)
+    yield exporter
+    tracer.configure("unknown", None, 1.0)
+
+
+def test_traceparent_round_trip():
+    context = SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)
+
+    assert context.traceparent == "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    assert extract({"traceparent": context.traceparent}) == context
+    assert extract({"traceparent": context.traceparent.encode()}) == context
+    assert extract({"traceparent": "00-bad-00f067aa0ba902b7-01"}) is None
+    assert extract(None) is None
+
+
+def test_tracer_disabled_by_default():
+    with tracer.start_span("noop") as span:
+        assert current_span() is None
+        assert inject({}) == {}
+    assert not span.context.sampled
+
+
+def test_child_spans_share_trace_and_record_errors(exporter):
+    with tracer.start_span("root", kind="server") as root:
+        with tracer.start_span("child", attributes={"order.id": "1"}):
+            assert inject({})["traceparent"].startswith(f"00-{root.context.trace_id}-")
+        with pytest.raises(ValueError):
+            with tracer.start_span("failing"):
+                raise ValueError("boom")
+
+    spans = {span.name: span for _, span in exporter.spans}
+    assert spans["child"].parent_id == root.context.span_id
+    assert spans["child"].context.trace_id == root.context.trace_id
+    assert spans["child"].attributes == {"order.id": "1"}
+    assert spans["failing"].to_otlp()["status"]["code"] == 2
+    assert "parentSpanId" not in spans["root"].to_otlp()
+    assert current_span() is None
+
+
+def test_head_sampling_is_decided_at_root(exporter):
+    tracer.configure("test", exporter, 0.0)
+
+    with tracer.start_span("root"):
+        with tracer.start_span("child") as child:
+            child.set_attribute("ignored", True)
+            assert inject({})["traceparent"].endswith("-00")
+
+    sampled_parent = SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)
+    with tracer.start_span("continued", parent=sampled_parent):
+        pass
+
+    assert [span.name for _, span in exporter.spans] == ["continued"]
+    assert child.attributes == {}
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileExporter(str(path))
+    tracer.configure("api", exporter, 1.0)
+    try:
+        with tracer.start_span("POST /orders/", kind="server", attributes={"http.status_code": 201, "ok": True, "ratio": 0.5}):
+            pass
+    finally:
+        tracer.configure("unknown", None, 1.0)
+    exporter.shutdown()
+
+    document = json.loads(path.read_text().splitlines()[0])
+    resource = document["resourceSpans"][0]
+    span = resource["scopeSpans"][0]["spans"][0]
+    assert resource["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "api"}}]
+    assert span["name"] == "POST /orders/"
+    assert span["kind"] == 2
+    assert {"key": "http.status_code", "value": {"intValue": "201"}} in span["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in span["attributes"]
+    assert {"key": "ratio", "value": {"doubleValue": 0.5}} in span["attributes"]
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+
+def test_file_exporter_writes_from_its_own_thread(tmp_path, mocker):
+    mocker.patch("shared.tracing.threading.Thread")
+    path = tmp_path / "traces.jsonl"
+    exporter = FileExporter(str(path))
+    tracer.configure("api", exporter, 1.0)
+    try:
+        for name in ("decode", "db"):
+            with tracer.start_span(name):
+                pass
+    finally:
+        tracer.configure("unknown", None, 1.0)
+
+    # На event loop спан только кладётся в очередь
+    assert not path.exists()
+    exporter.shutdown()
+
+    names = [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] for line in path.read_text().splitlines()]
+    assert names == ["decode", "db"]
+
+
+def test_exporter_shutdown_stops_the_thread_promptly(tmp_path):
+    exporter = FileExporter(str(tmp_path / "traces.jsonl"), interval=30)
+    started = time.monotonic()
+
+    exporter.shutdown()
+
+    assert time.monotonic() - started < 5
+    assert not exporter._thread.is_alive()
+
+
+def test_otlp_exporter_posts_batches(mocker):
+    mocker.patch("shared.tracing.threading.Thread")
+    urlopen = mocker.patch("shared.tracing.urllib.request.urlopen")
+    exporter = OtlpHttpExporter("http://collector:4318/")
+    tracer.configure("consumer", exporter, 1.0)
+    try:
+        with tracer.start_span("commit"):
+            pass
+    finally:
+        tracer.configure("unknown", None, 1.0)
+
+    exporter.shutdown()
+
+    request = urlopen.call_args[0][0]
+    assert request.full_url == "http://collector:4318/v1/traces"
+    body = json.loads(request.data)
+    assert body["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] == "commit"
+
+
+def test_build_exporter(tmp_path, mocker):
+    mocker.patch("shared.tracing.threading.Thread")
+
+    assert build_exporter("", "", "") is None
+    assert isinstance(build_exporter("file", str(tmp_path / "t.jsonl"), ""), FileExporter)
+    assert isinstance(build_exporter("otlp", "", "http://collector:4318"), OtlpHttpExporter)
+    assert isinstance(build_exporter("tests.unit.test_tracing:ListExporter", "", ""), ListExporter)
+
+
+def test_configure_tracing_from_settings():
+    settings = SimpleNamespace(
+        tracing_exporter="tests.unit.test_tracing:ListExporter",
+        tracing_file="",
+        tracing_otlp_endpoint="",
+        tracing_sample_rate=0.5,
+    )
+    try:
+        configure_tracing("consumer", settings)
+        assert tracer.enabled
+        assert tracer.service == "consumer"
+    finally:
+        tracer.configure("unknown", None, 1.0)
+
+
+@pytest.mark.asyncio
+async def test_tracing_middleware_continues_incoming_trace(exporter):
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, router=app.router)
+
+    @app.get("/orders/{order_id}")
+    async def get_order(order_id: str):
+        return {"traceparent": inject({})["traceparent"]}
+
+    incoming = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/orders/1", headers={"traceparent": incoming})
+
+    (_, span), = exporter.spans
+    assert span.name == "GET /orders/{order_id}"
+    assert span.parent_id == "00f067aa0ba902b7"
+    assert span.context.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert span.attributes["http.status_code"] == 200
+    assert response.json()["traceparent"] == span.context.traceparent
+
+
+@pytest.mark.asyncio
+async def test_consumer_spans_link_to_publishing_request(exporter, async_session, mocker):
+    from app.messaging.producer import OrderProducer
+    from consumer.messaging.consumer import OrderConsumer
+    from shared.messaging.transport import InMemoryBroker
+
+    mocker.patch('shared.messaging.transport.broker', InMemoryBroker())
+    mocker.patch('app.messaging.producer.settings.rabbitmq_url', 'memory://')
+    mocker.patch('consumer.messaging.consumer.settings.rabbitmq_url', 'memory://')
+    session_context = MagicMock()
+    session_context.__aenter__ = AsyncMock(return_value=async_session)
+    session_context.__aexit__ = AsyncMock(return_value=None)
+    mocker.patch('consumer.messaging.consumer.AsyncSessionLocal', MagicMock(return_value=session_context))
+
+    order = Order(customer_id=uuid.uuid4(), status="NEW", total_price=Decimal("10.00"))
+    async_session.add(order)
+    await async_session.commit()
+
+    consumer = OrderConsumer()
+    await consumer.start()
+    producer = OrderProducer()
+    await producer.connect()
+    with tracer.start_span("POST /orders/", kind="server") as request_span:
+        await producer.publish_order_created(order.id, order.total_price_minor, order.currency)
+
+    for _ in range(100):
+        if any(span.name == "order.created process" for _, span in exporter.spans):
+            break
+        await asyncio.sleep(0.01)
+    await consumer.close()
+
+    spans = {span.name: span for _, span in exporter.spans}
+    publish, process = spans["order.created publish"], spans["order.created process"]
+    assert publish.parent_id == request_span.context.span_id
+    assert process.parent_id == publish.context.span_id
+    assert process.context.trace_id == request_span.context.trace_id
+    assert process.attributes["order.id"] == str(order.id)
+    for name in ("decode", "db"):
+        assert spans[name].parent_id == process.context.span_id
+    assert spans["commit"].parent_id == spans["db"].context.span_id